@@ -1,5 +1,9 @@
 USE test
 
+drop table if exists post_trending
+drop table if exists post_mention
+drop table if exists post_tag
+drop table if exists comment_tombstone
 drop table if exists comment
 drop table if exists follow
 drop table if exists likes
@@ -61,4 +65,51 @@ create table comment(
 	constraint PK_comment primary key (comment_id),
 	constraint FK_comment_user foreign key (user_id) references users(user_id) on delete no action,
 	constraint FK_comment_post foreign key (post_id) references post(post_id) on delete cascade
-);
\ No newline at end of file
+);
+
+-- 刪除留言留下的 tombstone：updatedSince 輪詢靠它告訴 client 哪些留言不見了
+-- 只留 COMMENT_TOMBSTONE_RETENTION_HOURS（預設 7 天）：刪留言時順手清掉更舊的（IX_comment_tombstone_time）
+create table comment_tombstone(
+	comment_id	int not null,
+	post_id		int not null,
+	deleted_at	datetime2(0) not null constraint DF_comment_tombstone_time default (sysdatetime()),
+
+	constraint PK_comment_tombstone primary key (comment_id),
+	constraint FK_comment_tombstone_post foreign key (post_id) references post(post_id) on delete cascade
+);
+
+-- 貼文裡的 #tag / @mention（posts_create 時解析，app/tags.py）；tag 存小寫
+create table post_tag(
+	tag			nvarchar(50) not null,
+	post_id		int not null,
+
+	constraint PK_post_tag primary key (tag, post_id),
+	constraint FK_post_tag_post foreign key (post_id) references post(post_id) on delete cascade
+);
+
+create table post_mention(
+	post_id		int not null,
+	user_id		int not null,
+
+	constraint PK_post_mention primary key (post_id, user_id),
+	constraint FK_post_mention_post foreign key (post_id) references post(post_id) on delete cascade,
+	constraint FK_post_mention_user foreign key (user_id) references users(user_id) on delete no action
+);
+
+-- trending 分數（app/trending.py）：score = Σ 權重 × 2^((事件時間 - epoch 起點) / half-life)，每個 epoch 一列
+create table post_trending(
+	epoch		int not null,
+	post_id		int not null,
+	score		float not null,
+
+	constraint PK_post_trending primary key (epoch, post_id),
+	constraint FK_post_trending_post foreign key (post_id) references post(post_id) on delete cascade
+);
+
+-- 增量輪詢：post_id = ? AND updated_at >= ? / deleted_at >= ? 都是一次 index seek
+create index IX_comment_post_updated on comment(post_id, updated_at);
+create index IX_comment_tombstone_post on comment_tombstone(post_id, deleted_at);
+create index IX_comment_tombstone_time on comment_tombstone(deleted_at);
+create index IX_post_trending_post on post_trending(post_id);
+create index IX_post_tag_post on post_tag(post_id);
+create index IX_post_mention_user on post_mention(user_id, post_id);
@@ -0,0 +1,109 @@
+-- SQLite 版 schema（DB_BACKEND=sqlite 時第一次連線會自動建立）
+-- 欄位與 create_table.sql 對齊；Email / user_name 用 NOCASE，跟 SQL Server 預設 collation 一樣不分大小寫
+
+create table if not exists users(
+	user_id			integer primary key autoincrement,
+	Email			varchar(255) not null collate nocase,
+	pwd				varchar(255) not null,
+	bio				nvarchar(1024) null,
+	profile_pic		nvarchar(1024) null,
+	banner_pic		nvarchar(1024) null,
+	user_name		nvarchar(50) not null collate nocase,
+
+	constraint UQ_users_email unique (Email)
+);
+
+create table if not exists post(
+	post_id		integer primary key autoincrement,
+	user_id		int not null,
+	picture		nvarchar(1024) null,
+	content		nvarchar(2048) not null,
+	created_at	datetime2(0) not null default (datetime('now', 'localtime')),
+	likes		int not null default 0,
+
+	constraint FK_post foreign key (user_id) references users(user_id) on delete cascade
+);
+
+create table if not exists likes(
+	post_id		int not null,
+	user_id		int not null,
+
+	constraint PK_likes primary key(post_id, user_id),
+	constraint FK_likes_post foreign key (post_id) references post(post_id) on delete cascade,
+	constraint FK_likes_user foreign key (user_id) references users(user_id) on delete no action
+) without rowid;
+
+create table if not exists follow(
+	follower_id		int not null,
+	followee_id		int not null,
+
+	constraint PK_follow primary key (follower_id, followee_id),
+	constraint FK_follower_id foreign key (follower_id) references users(user_id) on delete no action,
+	constraint FK_followee_id foreign key (followee_id) references users(user_id) on delete no action,
+	constraint CK_follow_not_self check (follower_id <> followee_id)
+) without rowid;
+
+create table if not exists comment(
+	user_id		int not null,
+	comment_id	integer primary key autoincrement,
+	post_id		int not null,
+	content		nvarchar(1024),
+	created_at	datetime2(0) not null default (datetime('now', 'localtime')),
+	updated_at	datetime2(0) null,
+
+	constraint FK_comment_user foreign key (user_id) references users(user_id) on delete no action,
+	constraint FK_comment_post foreign key (post_id) references post(post_id) on delete cascade
+);
+
+-- 刪除留言留下的 tombstone：updatedSince 輪詢靠它告訴 client 哪些留言不見了
+-- 只留 COMMENT_TOMBSTONE_RETENTION_HOURS（預設 7 天）：刪留言時順手清掉更舊的（IX_comment_tombstone_time）
+create table if not exists comment_tombstone(
+	comment_id	integer primary key,
+	post_id		int not null,
+	deleted_at	datetime2(0) not null default (datetime('now', 'localtime')),
+
+	constraint FK_comment_tombstone_post foreign key (post_id) references post(post_id) on delete cascade
+);
+
+-- 貼文裡的 #tag / @mention（posts_create 時解析，app/tags.py）；tag 存小寫
+create table if not exists post_tag(
+	tag			nvarchar(50) not null,
+	post_id		int not null,
+
+	constraint PK_post_tag primary key (tag, post_id),
+	constraint FK_post_tag_post foreign key (post_id) references post(post_id) on delete cascade
+) without rowid;
+
+create table if not exists post_mention(
+	post_id		int not null,
+	user_id		int not null,
+
+	constraint PK_post_mention primary key (post_id, user_id),
+	constraint FK_post_mention_post foreign key (post_id) references post(post_id) on delete cascade,
+	constraint FK_post_mention_user foreign key (user_id) references users(user_id) on delete no action
+) without rowid;
+
+-- trending 分數（app/trending.py）：score = Σ 權重 × 2^((事件時間 - epoch 起點) / half-life)，每個 epoch 一列
+create table if not exists post_trending(
+	epoch		int not null,
+	post_id		int not null,
+	score		float not null,
+
+	constraint PK_post_trending primary key (epoch, post_id),
+	constraint FK_post_trending_post foreign key (post_id) references post(post_id) on delete cascade
+) without rowid;
+
+-- SQLite 不會替 foreign key 自動建 index；沒有這些 cascade / 計數 / 列表都會 full scan
+create index if not exists IX_post_created_at on post(created_at);
+create index if not exists IX_post_user on post(user_id, created_at);
+create index if not exists IX_likes_user on likes(user_id);
+create index if not exists IX_follow_followee on follow(followee_id);
+create index if not exists IX_comment_post on comment(post_id, created_at);
+create index if not exists IX_comment_user on comment(user_id, created_at);
+create index if not exists IX_comment_post_updated on comment(post_id, updated_at);
+create index if not exists IX_comment_tombstone_post on comment_tombstone(post_id, deleted_at);
+create index if not exists IX_comment_tombstone_time on comment_tombstone(deleted_at);
+create index if not exists IX_users_user_name on users(user_name);
+create index if not exists IX_post_trending_post on post_trending(post_id);
+create index if not exists IX_post_tag_post on post_tag(post_id);
+create index if not exists IX_post_mention_user on post_mention(user_id, post_id);
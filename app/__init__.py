@@ -1,5 +1,9 @@
 from flask import Flask
 from .config import Config
+from .query_log import init_slow_query_log
+from .db import replica_router
+from .replicas import init_read_your_writes
+from .queries import init_plan_cache_stats
 from .routes.pages import bp as pages_bp
 from .routes.auth import bp as auth_bp
 from .routes.users import bp as users_bp
@@ -7,11 +11,20 @@ from .routes.posts import bp as posts_bp
 from .routes.comments import bp as comments_bp
 from .routes.follows import bp as follows_bp
 from .routes.upload import bp as upload_bp
+from .routes.stats import bp as stats_bp
+from .routes.stream import bp as stream_bp
+from .routes.batch import bp as batch_bp
+from .routes.tags import bp as tags_bp
 
 def create_app():
     app = Flask(__name__, static_folder="static", static_url_path="/static")
     app.config.from_object(Config)
 
+    init_slow_query_log()
+    init_plan_cache_stats()
+    if replica_router.enabled:
+        init_read_your_writes(app)
+
     # routes
     app.register_blueprint(pages_bp)
     app.register_blueprint(auth_bp)
@@ -20,5 +33,9 @@ def create_app():
     app.register_blueprint(comments_bp)
     app.register_blueprint(follows_bp)
     app.register_blueprint(upload_bp)
+    app.register_blueprint(stats_bp)
+    app.register_blueprint(stream_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(tags_bp)
 
     return app
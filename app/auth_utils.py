@@ -1,7 +1,9 @@
 from .config import Config
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional, Union
 import uuid
 
 import jwt
@@ -37,7 +39,21 @@ def create_refresh_token(user_id: int) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
 
-def _decode_jwt(token: str) -> dict:
+# POST /batch：同一個 batch 裡的 sub-request 共用一次 JWT 驗證結果（token -> payload 或 PermissionError）
+_decoded: ContextVar[Optional[Dict[str, Union[dict, PermissionError]]]] = ContextVar("jwt_decoded", default=None)
+
+
+@contextmanager
+def shared_auth_decode():
+    """這個 block（以及從它 copy_context 出去的 thread）裡，同一個 token 只 decode 一次。"""
+    reset = _decoded.set({})
+    try:
+        yield
+    finally:
+        _decoded.reset(reset)
+
+
+def _decode_jwt_uncached(token: str) -> dict:
     try:
         return jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
     except jwt.ExpiredSignatureError:
@@ -45,6 +61,22 @@ def _decode_jwt(token: str) -> dict:
     except jwt.InvalidTokenError:
         raise PermissionError("invalid_token")
 
+
+def _decode_jwt(token: str) -> dict:
+    memo = _decoded.get()
+    if memo is None:
+        return _decode_jwt_uncached(token)
+    hit = memo.get(token)
+    if hit is None:
+        try:
+            hit = _decode_jwt_uncached(token)
+        except PermissionError as e:
+            hit = e
+        memo[token] = hit
+    if isinstance(hit, PermissionError):
+        raise PermissionError(*hit.args)
+    return hit
+
 def require_auth_user_id() -> int:
     """給需要登入的 API 用：抓 Authorization Bearer token。"""
     auth = request.headers.get("Authorization") or ""
@@ -0,0 +1,282 @@
+"""
+User name autocomplete（GET /users/autocomplete?prefix=）
+
+users_search 每打一個字就跑三個前後都有 % 的 LIKE + difflib；打字提示改查記憶體：
+- 依 casefold 排序的 user_name list + 同位置的 user_id array('i')：prefix 範圍 = 兩次 bisect
+- 追蹤者數：array('i')，index = user_id（id 是 autoincrement，很密）；follow / unfollow 直接 +1 / -1
+- 範圍不大（<= SCAN_LIMIT 人）：範圍內依追蹤者數取前幾名
+- 範圍很大的 prefix（一兩個字）：載入時就算好前 TOP_K 名（跟 tags.py 的 trie 一樣每個 prefix 存一份），
+  查詢只是一次 dict lookup；follow / 註冊 / 改名時只動這個人名字的那幾個 prefix（最多 20 筆的 list 重排）
+  名單裡的人扣追蹤數、改名移出時，名單外的人可能該補上來：那幾個 prefix 的範圍重新取一次前 TOP_K 名
+  （範圍可能有幾萬人，但只有前 TOP_K 名的人被 unfollow / 改名時才會發生）
+每人大約：名字字串 ~50 bytes + list 指標 8 + id 4 + 追蹤者數 4 + 依 id 找名字的 list 指標 8，一百萬人 ≈ 80MB；
+算好的 prefix 只有範圍超過 SCAN_LIMIT 的那些（一百萬人大約幾千個 × TOP_K 筆）。
+
+註冊、改名在這個 process 直接改（write-through）；其他 worker 的改動等 USERS_AUTOCOMPLETE_TTL 秒後
+背景 thread 整個重新載入（重新載入期間照舊用舊的那份）。第一次用到時同步載入。
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from .concurrency import fetch_all
+from .config import Config
+from .queries import USER_NAMES_WITH_FOLLOWERS
+
+logger = logging.getLogger(__name__)
+
+PREFIX_MAX_LEN = 50
+# autocomplete 一次最多回幾個（= 算好的 prefix 存幾名）
+TOP_K = 20
+# prefix 範圍超過這麼多人：不掃範圍，用載入時算好的前 TOP_K 名
+SCAN_LIMIT = 500
+
+_Entry = Tuple[int, str]  # (user_id, user_name)
+
+
+class UserNameIndex:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.reset()
+
+    def reset(self) -> None:
+        """fork 之後呼叫：thread 不會跟著 fork 過來，下次用到時重新載入。"""
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._names: List[str] = []
+        self._ids = array("i")
+        self._followers = array("i")
+        # index = user_id（跟 _followers 一樣長）：follow 時找得到名字，才知道要動哪幾個 prefix
+        self._name_by_id: List[Optional[str]] = []
+        # casefold prefix -> 追蹤者最多的前 TOP_K 名，由多到少（只有範圍超過 SCAN_LIMIT 的 prefix）
+        self._top: Dict[str, List[_Entry]] = {}
+        self._loaded_at: Optional[float] = None
+        self.loads = 0
+        self.top_hits = 0
+        self.scans = 0
+
+    # ===== 讀 =====
+    def complete(self, prefix: str, limit: int) -> List[Tuple[int, str, int]]:
+        """prefix 開頭（不分大小寫）、追蹤者最多的人：[(user_id, user_name, 追蹤者數)]。"""
+        self._ensure_loaded()
+        key = prefix.casefold()
+        with self._lock:
+            lo, hi = _prefix_range(self._names, key)
+            top = self._top.get(key)
+            # 載入之後範圍縮到比 limit 還小時名單也跟著變短：不夠就照樣掃範圍
+            if top is not None and len(top) >= min(limit, hi - lo):
+                self.top_hits += 1
+                return [(uid, name, self._count(uid)) for uid, name in top[:limit]]
+            # 範圍 <= SCAN_LIMIT；或是上次載入之後才長到超過的，掃一次也不會太大
+            self.scans += 1
+            return [
+                (self._ids[i], self._names[i], self._count(self._ids[i]))
+                for i in _top_positions(self._names, self._ids, self._followers, lo, hi, limit)
+            ]
+
+    def _count(self, user_id: int) -> int:
+        return self._followers[user_id] if user_id < len(self._followers) else 0
+
+    def _rank(self, entry: _Entry) -> Tuple[int, str, int]:
+        # 追蹤者多的在前；一樣多照名字（跟範圍內的順序一樣）
+        return -self._count(entry[0]), entry[1].casefold(), entry[0]
+
+    # ===== 載入 =====
+    def _ensure_loaded(self) -> None:
+        if self._loaded_at is None:
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self._reload()
+        elif time.monotonic() - self._loaded_at >= self.ttl and self._load_lock.acquire(blocking=False):
+            # 舊的那份照用，背景重新載入
+            threading.Thread(target=self._reload_in_background, name="user-autocomplete", daemon=True).start()
+
+    def _reload_in_background(self) -> None:
+        try:
+            self._reload()
+        except Exception:
+            logger.warning("user autocomplete reload failed", exc_info=True)
+            self._loaded_at = time.monotonic()  # 過一個 TTL 再試
+        finally:
+            self._load_lock.release()
+
+    def _reload(self) -> None:
+        rows = sorted(
+            ((str(r[1]), int(r[0]), int(r[2] or 0)) for r in fetch_all(USER_NAMES_WITH_FOLLOWERS)),
+            key=lambda t: (t[0].casefold(), t[1]),
+        )
+        followers = array("i", [0]) * (max((t[1] for t in rows), default=0) + 1)
+        for _, uid, n in rows:
+            followers[uid] = n
+        name_by_id: List[Optional[str]] = [None] * len(followers)
+        for name, uid, _ in rows:
+            name_by_id[uid] = name
+        names = [t[0] for t in rows]
+        ids = array("i", (t[1] for t in rows))
+        top = _build_top(names, ids, followers)
+        with self._lock:
+            self._names = names
+            self._ids = ids
+            self._followers = followers
+            self._name_by_id = name_by_id
+            self._top = top
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+
+    # ===== write-through（commit 之後呼叫）=====
+    def on_register(self, user_id: int, user_name: str) -> None:
+        if self._loaded_at is None:
+            return  # 還沒載入：第一次用到時會從 DB 載到最新的
+        with self._lock:
+            self._insert(user_id, user_name)
+            self._rerank(user_id, user_name)
+
+    def on_rename(self, user_id: int, old_name: str, new_name: str) -> None:
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self._delete(user_id, old_name)
+            self._unrank(user_id, old_name)
+            self._insert(user_id, new_name)
+            self._rerank(user_id, new_name)
+
+    def on_follow(self, *followee_ids: int, delta: int = 1) -> None:
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            for uid in followee_ids:
+                if uid < len(self._followers):
+                    self._followers[uid] = max(self._followers[uid] + delta, 0)
+                    name = self._name_by_id[uid]
+                    if name is not None:
+                        self._rerank(uid, name, demoted=delta < 0)
+
+    def on_unfollow(self, *followee_ids: int) -> None:
+        self.on_follow(*followee_ids, delta=-1)
+
+    # ===== internals（呼叫時已拿著 lock）=====
+    def _find(self, user_id: int, name: str) -> int:
+        key = name.casefold()
+        i = bisect_left(self._names, key, key=str.casefold)
+        while i < len(self._names) and self._names[i].casefold() == key:
+            if self._ids[i] == user_id:
+                return i
+            i += 1
+        return -1
+
+    def _prefix_lists(self, name: str):
+        # 算好的 prefix 短的一定也有（範圍更大），第一個沒有的就可以停
+        key = name.casefold()
+        for n in range(1, len(key) + 1):
+            entries = self._top.get(key[:n])
+            if entries is None:
+                return
+            yield key[:n], entries
+
+    def _rerank(self, user_id: int, name: str, demoted: bool = False) -> None:
+        entry = (user_id, name)
+        rank = self._rank(entry)
+        for prefix, entries in self._prefix_lists(name):
+            others = [e for e in entries if e[0] != user_id]
+            if demoted:
+                # 名單外的人不會因為這個人變少就排進來；名單裡的人變少，後面的人可能要補上來
+                if len(others) < len(entries):
+                    entries[:] = self._recompute(prefix)
+                continue
+            if len(others) == len(entries) and len(entries) >= TOP_K and rank >= self._rank(entries[-1]):
+                continue  # 排不進前 TOP_K
+            others.append(entry)
+            others.sort(key=self._rank)
+            entries[:] = others[:TOP_K]
+
+    def _unrank(self, user_id: int, name: str) -> None:
+        # 呼叫前已經 _delete：重算時範圍裡不會有這個人
+        for prefix, entries in self._prefix_lists(name):
+            if any(e[0] == user_id for e in entries):
+                entries[:] = self._recompute(prefix)
+
+    def _recompute(self, prefix: str) -> List[_Entry]:
+        lo, hi = _prefix_range(self._names, prefix)
+        return [
+            (self._ids[i], self._names[i])
+            for i in _top_positions(self._names, self._ids, self._followers, lo, hi, TOP_K)
+        ]
+
+    def _delete(self, user_id: int, name: str) -> None:
+        i = self._find(user_id, name)
+        if i >= 0:
+            del self._names[i]
+            del self._ids[i]
+            self._name_by_id[user_id] = None
+
+    def _insert(self, user_id: int, name: str) -> None:
+        if self._find(user_id, name) >= 0:
+            return
+        # 跟載入時一樣照 (casefold, user_id) 排：同名的人誰排前面要跟 _rank 一致
+        key = name.casefold()
+        i = bisect_left(self._names, key, key=str.casefold)
+        while i < len(self._names) and self._names[i].casefold() == key and self._ids[i] < user_id:
+            i += 1
+        self._names.insert(i, name)
+        self._ids.insert(i, user_id)
+        if user_id >= len(self._followers):
+            self._followers.extend([0] * (user_id + 1 - len(self._followers)))
+            self._name_by_id.extend([None] * (user_id + 1 - len(self._name_by_id)))
+        self._name_by_id[user_id] = name
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "users": len(self._names),
+                "loads": self.loads,
+                "indexedPrefixes": len(self._top),
+                "topHits": self.top_hits,
+                "scans": self.scans,
+                "ttl": self.ttl,
+            }
+
+
+def _prefix_range(names: List[str], key: str) -> Tuple[int, int]:
+    lo = bisect_left(names, key, key=str.casefold)
+    # prefix 後面接什麼字元都比 prefix + U+10FFFF 小
+    return lo, bisect_right(names, key + "\U0010ffff", lo, key=str.casefold)
+
+
+def _top_positions(names: List[str], ids: array, followers: array, lo: int, hi: int, n: int) -> List[int]:
+    # 追蹤者多的在前；一樣多照範圍內的位置（名字順序）
+    size = len(followers)
+    return heapq.nlargest(n, range(lo, hi), key=lambda i: (followers[ids[i]] if ids[i] < size else 0, -i))
+
+
+def _build_top(names: List[str], ids: array, followers: array) -> Dict[str, List[_Entry]]:
+    """範圍超過 SCAN_LIMIT 的每個 prefix 算好前 TOP_K 名；一層一層往下分，範圍夠小就停。"""
+    top: Dict[str, List[_Entry]] = {}
+    stack = [(0, len(names), 0)]
+    while stack:
+        lo, hi, depth = stack.pop()
+        if hi - lo <= SCAN_LIMIT:
+            continue
+        if depth:
+            top[names[lo].casefold()[:depth]] = [
+                (ids[i], names[i]) for i in _top_positions(names, ids, followers, lo, hi, TOP_K)
+            ]
+        # 依下一個字元分組（排序過，同一組一定相鄰）；名字剛好等於 prefix 的排在最前面，跳過
+        i = lo
+        while i < hi:
+            key = names[i].casefold()
+            if len(key) <= depth:
+                i += 1
+                continue
+            j = bisect_right(names, key[: depth + 1] + "\U0010ffff", i, hi, key=str.casefold)
+            stack.append((i, j, depth + 1))
+            i = j
+    return top
+
+
+user_names = UserNameIndex(Config.USERS_AUTOCOMPLETE_TTL)
@@ -0,0 +1,456 @@
+"""
+Shared cache：feed / profile / search 結果放這裡
+
+- CACHE_BACKEND=local：process 內 LRU（單一 worker、開發用；多個 worker 之間不共用）
+- CACHE_BACKEND=redis：Redis（或任何講 Redis protocol 的 server），所有 worker / 機器共用
+
+key 的格式：<prefix>:<namespace>:v<ns 版本>[:<scope>:v<scope 版本>]:<key>
+失效不刪 key，而是把版本號 +1（INCR）：所有 worker 下次讀到新版本，舊 key 自然用不到、等 TTL 過期。
+  - cache.bump("feed")               → 整個 namespace 失效
+  - cache.bump("profile", scope=7)   → 只有 user 7 的資料失效
+版本號本身也會過期（CACHE_VERSION_TTL，>= 最長的資料 TTL，每次 bump 重新計時）：per-post / per-user 的 scope
+很多，不能一直留著。過期後讀到的是 0（這段時間寫進去的舊資料早就過期了）；下一次 bump 從目前的毫秒數
+重新起算，不會跟過期前用過的版本號撞在一起。
+
+Stampede：同一個 key miss 時，process 內用 single-flight 合併，跨 process 用 SET NX 鎖，
+只有一個人去查 DB，其他人等它寫回來（等太久就自己查）。
+
+cache 掛了不影響 API：讀寫失敗只記 log，直接呼叫 loader。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .config import Config
+from .singleflight import SingleFlight
+
+try:
+    import redis
+except ImportError:  # 只有 CACHE_BACKEND=redis 需要
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# namespaces（版本號各自獨立）
+FEED_NAMESPACE = "feed"
+PROFILE_NAMESPACE = "profile"
+POST_SEARCH_NAMESPACE = "post_search"
+COMMENTS_NAMESPACE = "comments"
+COUNTS_NAMESPACE = "counts"
+PROFILE_BUNDLE_NAMESPACE = "profile_bundle"
+PAGES_NAMESPACE = "pages"
+# entity（scope = id）：貼文本身 + 數量，不含作者資料（作者走 PROFILE 的 "row"）
+POST_NAMESPACE = "post"
+# 只用版本號：follow / unfollow 時 bump follower，其他 worker 的 follow graph 看到就重新載入
+FOLLOW_GRAPH_NAMESPACE = "follow_graph"
+# 背景算好的「你可能認識的人」（scope = user_id）；直接覆寫，不靠 bump 失效
+SUGGESTIONS_NAMESPACE = "suggestions"
+
+
+class CacheBackend:
+    """最小的 key-value 介面；值一律是 bytes。ttl 單位秒，None = 不過期。"""
+
+    name = ""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(k) for k in keys]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """key 不存在才寫入（SET NX），回傳有沒有寫入。"""
+        raise NotImplementedError
+
+    def set_many(self, items: Dict[str, bytes], ttl: Optional[float] = None) -> None:
+        for k, v in items.items():
+            self.set(k, v, ttl)
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        """版本號 +1，ttl 重新計時；key 不存在時從 _version_seed() 起算。"""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """fork 之後呼叫：丟掉從 master 繼承來的連線 / lock。"""
+
+
+def _version_seed() -> int:
+    return int(time.time() * 1000)
+
+
+class LocalCache(CacheBackend):
+    name = "local"
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        # 版本號另外放：不能被 LRU 擠掉（擠掉時它的資料可能還在）；只靠 TTL 過期。
+        # 照最後一次 bump 排序，過期的一定在最前面
+        self._counters: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    def _prune_counters(self, now: float) -> None:
+        while self._counters:
+            _, expires = next(iter(self._counters.values()))
+            if not expires or expires > now:
+                break
+            self._counters.popitem(last=False)
+
+    def _live(self, key: str, now: float) -> Optional[bytes]:
+        counter = self._counters.get(key)
+        if counter is not None:
+            if not counter[1] or counter[1] > now:
+                return str(counter[0]).encode("ascii")
+            del self._counters[key]
+            return None
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires and expires <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(key, time.monotonic())
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        now = time.monotonic()
+        with self._lock:
+            return [self._live(k, now) for k in keys]
+
+    def _put(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        self._data[key] = (value, time.monotonic() + ttl if ttl else 0.0)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._put(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key, time.monotonic()) is not None:
+                return False
+            self._put(key, value, ttl)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        now = time.monotonic()
+        with self._lock:
+            self._prune_counters(now)
+            old = self._counters.pop(key, None)
+            n = old[0] + 1 if old is not None else _version_seed()
+            self._counters[key] = (n, now + ttl if ttl else 0.0)
+            return n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._counters = OrderedDict()
+
+
+class RedisCache(CacheBackend):
+    """
+    client 可以直接傳一個 redis-py 相容的物件（例如測試用的 fakeredis），
+    否則用 url 建 redis.Redis。
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = "", client: Any = None):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("CACHE_BACKEND=redis requires the redis package.")
+            client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client = client
+
+    @staticmethod
+    def _px(ttl: Optional[float]) -> Optional[int]:
+        return max(1, int(ttl * 1000)) if ttl else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return list(self.client.mget(keys))
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.client.set(key, value, px=self._px(ttl))
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(key, value, px=self._px(ttl), nx=True))
+
+    def set_many(self, items: Dict[str, bytes], ttl: Optional[float] = None) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for k, v in items.items():
+            pipe.set(k, v, px=self._px(ttl))
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        # MULTI：不存在才設起點 → INCR → 重新設過期時間
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set(key, _version_seed(), nx=True)
+        pipe.incr(key)
+        if ttl:
+            pipe.pexpire(key, self._px(ttl))
+        return int(pipe.execute()[1])
+
+    def reset(self) -> None:
+        # 跟 master 共用 socket 會讀到別人的回應
+        pool = getattr(self.client, "connection_pool", None)
+        if pool is not None:
+            pool.reset()
+
+
+class SharedCache:
+    LOCK_POLL = 0.02
+
+    def __init__(self, backend: CacheBackend, prefix: str = "sm", lock_timeout: float = 2.0,
+                 version_ttl: Optional[float] = None):
+        self.backend = backend
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.version_ttl = version_ttl
+        self._flight = SingleFlight(max_stale=0.0)
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.lock_waits = 0
+        self.errors = 0
+
+    def reset(self) -> None:
+        self.backend.reset()
+        self._flight = SingleFlight(max_stale=0.0)
+        self.hits = self.misses = self.loads = self.lock_waits = self.errors = 0
+
+    # ===== keys =====
+    def _ver_keys(self, namespace: str, scope: Optional[Hashable]) -> List[str]:
+        keys = [f"{self.prefix}:ver:{namespace}"]
+        if scope is not None:
+            keys.append(f"{self.prefix}:ver:{namespace}:{scope}")
+        return keys
+
+    def _data_key(self, namespace: str, key: str, scope: Optional[Hashable]) -> str:
+        versions = [int(v or 0) for v in self.backend.get_many(self._ver_keys(namespace, scope))]
+        k = f"{self.prefix}:{namespace}:v{versions[0]}"
+        if scope is not None:
+            k += f":{scope}:v{versions[1]}"
+        return f"{k}:{key}"
+
+    def _data_keys(self, namespace: str, key: str, scopes: List[Hashable]) -> List[str]:
+        """多個 scope 的 data key：版本號一次 get_many（格式跟 _data_key 一樣）。"""
+        ver_keys = [f"{self.prefix}:ver:{namespace}"] + [f"{self.prefix}:ver:{namespace}:{s}" for s in scopes]
+        ns_ver, *versions = [int(v or 0) for v in self.backend.get_many(ver_keys)]
+        return [f"{self.prefix}:{namespace}:v{ns_ver}:{s}:v{v}:{key}" for s, v in zip(scopes, versions)]
+
+    # ===== invalidation =====
+    def bump(self, namespace: str, scope: Optional[Hashable] = None) -> None:
+        """讓 namespace（或其中一個 scope）目前的資料全部失效；所有 worker 都看得到。"""
+        try:
+            self.backend.incr(self._ver_keys(namespace, scope)[-1], self.version_ttl)
+        except Exception:
+            self.errors += 1
+            logger.warning("cache bump failed: %s/%s", namespace, scope, exc_info=True)
+
+    def version(self, namespace: str, scope: Optional[Hashable] = None) -> Optional[Tuple[int, ...]]:
+        """目前的版本號：給 process 內自己的快取判斷別的 worker 有沒有 bump 過；cache 掛了回 None。"""
+        try:
+            return tuple(int(v or 0) for v in self.backend.get_many(self._ver_keys(namespace, scope)))
+        except Exception:
+            self.errors += 1
+            return None
+
+    # ===== 直接讀寫（背景預先算好的資料，不走 read-through）=====
+    def get(self, namespace: str, key: str, scope: Optional[Hashable] = None) -> Any:
+        """JSON 版本；沒有（或 cache 掛了）回 None。"""
+        try:
+            raw = self.backend.get(self._data_key(namespace, key, scope))
+        except Exception:
+            self.errors += 1
+            logger.warning("cache read failed: %s/%s", namespace, key, exc_info=True)
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float, scope: Optional[Hashable] = None) -> None:
+        try:
+            raw = json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+            self.backend.set(self._data_key(namespace, key, scope), raw, ttl)
+        except Exception:
+            self.errors += 1
+            logger.warning("cache write failed: %s/%s", namespace, key, exc_info=True)
+
+    # ===== read-through =====
+    def fetch(self, namespace: str, key: str, load: Callable[[], bytes], ttl: float,
+              scope: Optional[Hashable] = None) -> bytes:
+        """
+        bytes 版本：load() 直接回傳要存的 bytes（例如已經序列化好的 response body）。
+        ttl <= 0 = 這個 namespace 關閉快取，每次都呼叫 load()。
+        """
+        if ttl <= 0:
+            self.loads += 1
+            return load()
+        try:
+            data_key = self._data_key(namespace, key, scope)
+            value = self.backend.get(data_key)
+        except Exception:
+            self.errors += 1
+            logger.warning("cache read failed: %s/%s", namespace, key, exc_info=True)
+            self.loads += 1
+            return load()
+
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        return self._flight.do(data_key, lambda: self._load_locked(data_key, load, ttl))
+
+    def _load_locked(self, data_key: str, load: Callable[[], bytes], ttl: float) -> bytes:
+        lock_key = data_key + ":lock"
+        try:
+            owner = self.backend.add(lock_key, b"1", self.lock_timeout)
+        except Exception:
+            owner = True
+
+        if not owner:
+            # 別的 process 在查：等它寫回來
+            self.lock_waits += 1
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.LOCK_POLL)
+                try:
+                    value = self.backend.get(data_key)
+                except Exception:
+                    break
+                if value is not None:
+                    return value
+
+        self.loads += 1
+        value = load()
+        try:
+            self.backend.set(data_key, value, ttl)
+            if owner:
+                self.backend.delete(lock_key)
+        except Exception:
+            self.errors += 1
+            logger.warning("cache write failed: %s", data_key, exc_info=True)
+        return value
+
+    def get_or_load(self, namespace: str, key: str, load: Callable[[], Any], ttl: float,
+                    scope: Optional[Hashable] = None) -> Any:
+        """JSON 版本：load() 回傳可以 json 化的值；拿到的是新 decode 出來的物件，可以直接改。"""
+        raw = self.fetch(
+            namespace, key,
+            lambda: json.dumps(load(), ensure_ascii=False, default=str).encode("utf-8"),
+            ttl, scope,
+        )
+        return json.loads(raw)
+
+    def get_or_load_many(self, namespace: str, key: str, scopes: Iterable[Hashable],
+                         load: Callable[[List[Hashable]], Dict[Hashable, Any]], ttl: float) -> Dict[Hashable, Any]:
+        """
+        多個 scope（通常是 entity id）一次讀：版本號、資料各一次 get_many，
+        沒命中的一次交給 load(missing) 查回來（例如一個 IN 查詢），回傳 {scope: value}。
+        load 沒給的 scope（例如不存在的 id）不寫入 cache、也不會出現在結果裡。
+        批次讀取不做 single-flight / 鎖：每個 key 都很小，重複查一次的代價比等鎖低。
+        """
+        scopes = list(dict.fromkeys(scopes))
+        if not scopes:
+            return {}
+        if ttl <= 0:
+            self.loads += 1
+            return load(scopes)
+        try:
+            data_keys = self._data_keys(namespace, key, scopes)
+            raw = self.backend.get_many(data_keys)
+        except Exception:
+            self.errors += 1
+            logger.warning("cache read failed: %s/%s", namespace, key, exc_info=True)
+            self.loads += 1
+            return load(scopes)
+
+        out: Dict[Hashable, Any] = {}
+        missing: List[Tuple[Hashable, str]] = []
+        for s, dk, value in zip(scopes, data_keys, raw):
+            if value is None:
+                missing.append((s, dk))
+            else:
+                out[s] = json.loads(value)
+        self.hits += len(out)
+        self.misses += len(missing)
+        if not missing:
+            return out
+
+        self.loads += 1
+        loaded = load([s for s, _ in missing])
+        to_set: Dict[str, bytes] = {}
+        for s, dk in missing:
+            if s in loaded:
+                to_set[dk] = json.dumps(loaded[s], ensure_ascii=False, default=str).encode("utf-8")
+                out[s] = json.loads(to_set[dk])
+        try:
+            if to_set:
+                self.backend.set_many(to_set, ttl)
+        except Exception:
+            self.errors += 1
+            logger.warning("cache write failed: %s/%s", namespace, key, exc_info=True)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else None,
+            "loads": self.loads,
+            "lockWaits": self.lock_waits,
+            "errors": self.errors,
+        }
+
+
+def build_backend() -> CacheBackend:
+    if Config.CACHE_BACKEND == "redis":
+        return RedisCache(Config.CACHE_REDIS_URL)
+    if Config.CACHE_BACKEND == "local":
+        return LocalCache(Config.CACHE_LOCAL_MAX_ENTRIES)
+    raise RuntimeError(f"Unknown CACHE_BACKEND: {Config.CACHE_BACKEND!r}")
+
+
+cache = SharedCache(
+    build_backend(),
+    Config.CACHE_PREFIX,
+    Config.CACHE_LOCK_TIMEOUT_MS / 1000.0,
+    Config.CACHE_VERSION_TTL,
+)
@@ -0,0 +1,106 @@
+"""
+DB executors：async view 與 sync handler 裡的平行查詢
+
+pyodbc 沒有 async driver，所以 async view 裡的查詢丟到一個共用的 thread pool 跑，
+event loop 只負責等；同一個 handler 裡互不相依的查詢用 gather_db 同時送出（各自一條連線），
+延遲 = 最慢的那一個，而不是全部加起來。
+
+每次呼叫都 copy_context()：Flask 的 request / app context 跟 bench 的 round-trip counter 都是 ContextVar，
+複製過去 get_optional_auth_user_id()、get_conn(readonly=True)（read-your-writes）才會照常運作。
+同一個 Context 不能同時在兩個 thread 裡 run，所以不能共用一份。
+
+sync handler 用 run_parallel(*fns)：一樣是互不相依的查詢同時跑，handler 本身不用改成 async。
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Optional, Sequence
+
+from .config import Config
+from .db import get_conn
+
+
+class _LazyPool:
+    # lazy：gunicorn preload 時 master 不會先開 thread（fork 之後 thread 不會跟過去）
+    def __init__(self, size: Callable[[], int], prefix: str):
+        self._size = size
+        self._prefix = prefix
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self._size(), thread_name_prefix=self._prefix)
+        return self._pool
+
+    def reset(self) -> None:
+        self._pool = None
+        self._lock = threading.Lock()
+
+
+# async view 用（run_db / gather_db）
+_executor = _LazyPool(lambda: Config.DB_EXECUTOR_THREADS, "db")
+# sync handler 用（run_parallel）；分開兩個 pool，snapshot builder 這種「在 db pool 裡再呼叫 run_parallel」才不會互等
+_parallel = _LazyPool(lambda: Config.DB_PARALLEL_THREADS, "dbpar")
+
+# 已經在 run_parallel 的工作裡：再呼叫 run_parallel 就直接依序跑，避免 pool 被自己塞滿卡死
+_in_parallel: contextvars.ContextVar[bool] = contextvars.ContextVar("db_in_parallel", default=False)
+
+
+def reset_executor() -> None:
+    """fork 之後呼叫（app.worker.init_worker）。"""
+    _executor.reset()
+    _parallel.reset()
+
+
+async def run_db(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor.get(), ctx.run, functools.partial(fn, *args, **kwargs))
+
+
+async def gather_db(*fns: Callable[[], Any]) -> List[Any]:
+    """同時跑多個 DB 函式，照傳入順序回傳結果；任何一個丟例外就往上丟。"""
+    return list(await asyncio.gather(*(run_db(fn) for fn in fns)))
+
+
+def _parallel_task(fn: Callable[[], Any]) -> Any:
+    _in_parallel.set(True)
+    return fn()
+
+
+def run_parallel(*fns: Callable[[], Any]) -> List[Any]:
+    """
+    sync 版的 gather_db：第一個在目前 thread 跑，其他丟到 pool，各自一條連線，全部跑完照順序回傳。
+    任何一個丟例外就往上丟（其他的還是會等它跑完，連線不會留在半路）。
+    """
+    if len(fns) <= 1 or _in_parallel.get():
+        return [fn() for fn in fns]
+    pool = _parallel.get()
+    futures = [pool.submit(contextvars.copy_context().run, _parallel_task, fn) for fn in fns[1:]]
+    try:
+        first = fns[0]()
+    finally:
+        wait(futures)
+    return [first] + [f.result() for f in futures]
+
+
+# ===== 單一查詢的小 helper（每次自己拿一條連線，給 gather_db / run_parallel 用）=====
+def fetch_one(sql: str, params: Sequence[Any] = ()) -> Any:
+    with get_conn(readonly=True) as conn:
+        cur = conn.cursor()
+        cur.execute(sql, tuple(params))
+        return cur.fetchone()
+
+
+def fetch_all(sql: str, params: Sequence[Any] = ()) -> List[Any]:
+    with get_conn(readonly=True) as conn:
+        cur = conn.cursor()
+        cur.execute(sql, tuple(params))
+        return cur.fetchall()
@@ -24,4 +24,119 @@ class Config:
 
     DB_SCHEMA = os.environ.get("SCHEMA", "dbo")
 
+    # mssql (pyodbc) | sqlite（單機 / 本機 benchmark，不需要 SQL Server）
+    DB_BACKEND = os.environ.get("DB_BACKEND", "mssql")
+    SQLITE_PATH = os.environ.get("SQLITE_PATH", "social.db")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    # read replicas：完整 ODBC 連線字串，多台用 | 分隔（只有 mssql 有效）
+    READ_REPLICA_DSNS = [d.strip() for d in os.environ.get("READ_REPLICA_DSNS", "").split("|") if d.strip()]
+    REPLICA_HEALTH_INTERVAL = float(os.environ.get("REPLICA_HEALTH_INTERVAL", "10"))
+    REPLICA_FAILURE_COOLDOWN = float(os.environ.get("REPLICA_FAILURE_COOLDOWN", "30"))
+    READ_YOUR_WRITES_SECONDS = int(os.environ.get("READ_YOUR_WRITES_SECONDS", "5"))
+
+    # shared cache：local（process 內 LRU）| redis（多 worker / 多機器共用）
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "local")
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_PREFIX = os.environ.get("CACHE_PREFIX", "sm")
+    CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get("CACHE_LOCAL_MAX_ENTRIES", "10000"))
+    CACHE_LOCK_TIMEOUT_MS = int(os.environ.get("CACHE_LOCK_TIMEOUT_MS", "2000"))
+    PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", "60"))
+    SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", "30"))
+    COMMENTS_CACHE_TTL = float(os.environ.get("COMMENTS_CACHE_TTL", "30"))
+    # hydration 用的貼文 entity（按讚 / 留言時逐篇失效）
+    POST_CACHE_TTL = float(os.environ.get("POST_CACHE_TTL", "60"))
+    # profile-bundle：自己的寫入會立刻失效；別人按讚 / 留言造成的數字變化最多舊這麼久
+    PROFILE_BUNDLE_CACHE_TTL = float(os.environ.get("PROFILE_BUNDLE_CACHE_TTL", "15"))
+    # ?total=approx 的 COUNT 快取秒數
+    APPROX_COUNT_TTL = float(os.environ.get("APPROX_COUNT_TTL", "60"))
+
+    # 未登入首頁 feed 快照：前幾頁、幾秒（TTL=0 關閉）
+    ANON_FEED_CACHE_PAGES = int(os.environ.get("ANON_FEED_CACHE_PAGES", "3"))
+    ANON_FEED_CACHE_TTL = float(os.environ.get("ANON_FEED_CACHE_TTL", "10"))
+
+    # single-flight：相同查詢共用結果，完成後最多再沿用幾毫秒
+    SINGLEFLIGHT_MAX_STALE_MS = int(os.environ.get("SINGLEFLIGHT_MAX_STALE_MS", "250"))
+
+    # async view 用的 DB thread pool 大小（同時在跑的查詢上限 / process）
+    DB_EXECUTOR_THREADS = int(os.environ.get("DB_EXECUTOR_THREADS", "16"))
+    # sync handler 裡 run_parallel 用的 thread pool 大小
+    DB_PARALLEL_THREADS = int(os.environ.get("DB_PARALLEL_THREADS", "32"))
+
+    # gunicorn 每個 worker 的 thread 數（gunicorn.conf.py 讀同一個環境變數）
+    WEB_THREADS = int(os.environ.get("WEB_THREADS", "4"))
+    # GET /api/v1/stream（SSE）：每個 process 的連線上限、一條連線最多訂閱幾篇、最長幾秒（之後 client 自動 reconnect）
+    # gthread worker 每條 SSE 連線佔住一個 thread 直到結束：上限預設 WEB_THREADS // 4，而且一定留至少一個 thread
+    # 給一般 request（WEB_THREADS=4 → 1 條；sync worker → 0 條，一律 503，client 改輪詢）
+    STREAM_MAX_SUBSCRIBERS = min(
+        int(os.environ.get("STREAM_MAX_SUBSCRIBERS", str(WEB_THREADS // 4))),
+        max(WEB_THREADS - 1, 0),
+    )
+    STREAM_MAX_POSTS = int(os.environ.get("STREAM_MAX_POSTS", "200"))
+    STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "300"))
+    # 合併推播：最少隔幾毫秒送一次、沒事時幾秒送一次 heartbeat、每篇最多帶幾個新留言 id
+    STREAM_FLUSH_MS = int(os.environ.get("STREAM_FLUSH_MS", "250"))
+    STREAM_HEARTBEAT_SECONDS = float(os.environ.get("STREAM_HEARTBEAT_SECONDS", "15"))
+    STREAM_MAX_COMMENT_IDS = int(os.environ.get("STREAM_MAX_COMMENT_IDS", "20"))
+
+    # in-memory follow graph：最多放幾條邊（每條 4 bytes）、名單最多用多久就重新載入
+    FOLLOW_GRAPH_MAX_EDGES = int(os.environ.get("FOLLOW_GRAPH_MAX_EDGES", "2000000"))
+    FOLLOW_GRAPH_TTL = float(os.environ.get("FOLLOW_GRAPH_TTL", "300"))
+
+    # GET /users/suggestions：每人存幾個、存多久、多舊就在背景重算、背景佇列最多排幾個人
+    SUGGESTIONS_MAX = int(os.environ.get("SUGGESTIONS_MAX", "50"))
+    SUGGESTIONS_CACHE_TTL = float(os.environ.get("SUGGESTIONS_CACHE_TTL", "86400"))
+    SUGGESTIONS_REFRESH_SECONDS = float(os.environ.get("SUGGESTIONS_REFRESH_SECONDS", "3600"))
+    SUGGESTIONS_QUEUE_MAX = int(os.environ.get("SUGGESTIONS_QUEUE_MAX", "10000"))
+
+    # tag autocomplete：每個 worker 的 tag trie 幾秒整個重新載入一次（看到其他 worker 的新 tag）
+    TAGS_TRIE_TTL = float(os.environ.get("TAGS_TRIE_TTL", "300"))
+
+    # GET /users/autocomplete：每個 worker 的名字索引幾秒在背景整個重新載入一次（看到其他 worker 的註冊 / 改名）
+    USERS_AUTOCOMPLETE_TTL = float(os.environ.get("USERS_AUTOCOMPLETE_TTL", "300"))
+
+    # GET /posts/trending：讚 / 留言的權重、分數幾小時減半、幾秒寫回 DB 一次
+    TRENDING_LIKE_WEIGHT = float(os.environ.get("TRENDING_LIKE_WEIGHT", "1"))
+    TRENDING_COMMENT_WEIGHT = float(os.environ.get("TRENDING_COMMENT_WEIGHT", "3"))
+    TRENDING_HALF_LIFE_HOURS = float(os.environ.get("TRENDING_HALF_LIFE_HOURS", "6"))
+    TRENDING_FLUSH_SECONDS = float(os.environ.get("TRENDING_FLUSH_SECONDS", "30"))
+
+    # GET /users?ids= / GET /posts?ids=：一次最多幾個 id
+    MULTI_GET_MAX_IDS = int(os.environ.get("MULTI_GET_MAX_IDS", "300"))
+
+    # POST /follows/bulk、/posts/likes/bulk：一次最多幾個目標
+    BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", "100"))
+
+    # POST /api/v1/batch：一次最多幾個 sub-request
+    BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "20"))
+
+    # 刪除留言的 tombstone 留多久（小時）：updatedSince 比這個還舊就回 410，client 整串重新載入；
+    # 更舊的 tombstone 在刪留言時順手清掉（每個 process 最多 COMMENT_TOMBSTONE_PRUNE_SECONDS 秒清一次）
+    COMMENT_TOMBSTONE_RETENTION_HOURS = float(os.environ.get("COMMENT_TOMBSTONE_RETENTION_HOURS", "168"))
+    COMMENT_TOMBSTONE_PRUNE_SECONDS = float(os.environ.get("COMMENT_TOMBSTONE_PRUNE_SECONDS", "60"))
+
+    # 首頁 / 個人頁 HTML 直接內嵌第一頁資料（省掉第一個 API round trip）；1 = 開啟
+    PAGES_EMBED_INITIAL_DATA = os.environ.get("PAGES_EMBED_INITIAL_DATA", "0") == "1"
+    # 內嵌的筆數要跟 app.js 第一次載入的一樣（首頁 feed / 個人頁分頁）
+    PAGES_FEED_PAGE_SIZE = int(os.environ.get("PAGES_FEED_PAGE_SIZE", "50"))
+    PAGES_PROFILE_PAGE_SIZE = int(os.environ.get("PAGES_PROFILE_PAGE_SIZE", "50"))
+    # gzip 過的 HTML 在 shared cache 裡放多久（內容變了 key 就會變，這只是清掉用不到的舊版本）
+    PAGES_CACHE_TTL = float(os.environ.get("PAGES_CACHE_TTL", "300"))
+
+    # shared cache 的版本號多久沒 bump 就過期（per-post / per-user scope 很多，不能無限累積）；
+    # 一定要 >= 最長的資料 TTL，預設就取最長的那個
+    CACHE_VERSION_TTL = float(os.environ.get("CACHE_VERSION_TTL", str(max(
+        PROFILE_CACHE_TTL, SEARCH_CACHE_TTL, COMMENTS_CACHE_TTL, POST_CACHE_TTL, PROFILE_BUNDLE_CACHE_TTL,
+        APPROX_COUNT_TTL, SUGGESTIONS_CACHE_TTL, PAGES_CACHE_TTL,
+    ))))
+
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB
+
+    # slow query log：0 = 關閉
+    SLOW_QUERY_MS = int(os.environ.get("SLOW_QUERY_MS", "0"))
+    SLOW_QUERY_PLAN_DIR = os.environ.get("SLOW_QUERY_PLAN_DIR", "query_plans")
+    SLOW_QUERY_PLAN_KEEP = int(os.environ.get("SLOW_QUERY_PLAN_KEEP", "3"))
+
+    # /stats/db 的 planCache（statement 文字重用率）：1 = 開啟；開了之後每個 execute 多一次 sha1 + 一個 lock，
+    # 量測的時候才開
+    PLAN_CACHE_STATS = os.environ.get("PLAN_CACHE_STATS", "0") == "1"
@@ -1,6 +1,10 @@
 import re
-import pyodbc
+import time
+from typing import Any, Callable, List, Sequence
+
 from .config import Config
+from .dialect import Dialect, MssqlDialect, SqliteDialect
+from .replicas import ReplicaRouter, must_read_primary
 
 SAFE_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
@@ -10,7 +14,7 @@ if not SAFE_IDENT_RE.match(Config.DB_SCHEMA):
 def tbl(name: str) -> str:
     if not SAFE_IDENT_RE.match(name):
         raise RuntimeError("Invalid table name.")
-    return f"[{Config.DB_SCHEMA}].[{name}]"
+    return dialect.quote_table(Config.DB_SCHEMA, name)
 
 def build_conn_str() -> str:
     return (
@@ -25,5 +29,148 @@ def build_conn_str() -> str:
 
 CONN_STR = build_conn_str()
 
-def get_conn() -> pyodbc.Connection:
-    return pyodbc.connect(CONN_STR, timeout=5)
+
+def build_dialect() -> Dialect:
+    backend = (Config.DB_BACKEND or "mssql").lower()
+    if backend == "sqlite":
+        return SqliteDialect(Config.SQLITE_PATH, Config.SQLITE_BUSY_TIMEOUT_MS)
+    if backend == "mssql":
+        return MssqlDialect(CONN_STR)
+    raise RuntimeError("Invalid DB_BACKEND in env. Use mssql or sqlite.")
+
+
+dialect = build_dialect()
+
+# SQLite 是單機模式，沒有 replica
+replica_router = ReplicaRouter(
+    Config.READ_REPLICA_DSNS if dialect.name == "mssql" else [],
+    dialect.connect_dsn,
+    health_interval=Config.REPLICA_HEALTH_INTERVAL,
+    cooldown=Config.REPLICA_FAILURE_COOLDOWN,
+)
+
+# except IntegrityError: 不用管底下是 pyodbc 還是 sqlite3
+IntegrityError = dialect.integrity_errors
+
+
+def page_clause() -> str:
+    return dialect.page_clause()
+
+
+def top_clause(n: int) -> str:
+    return dialect.top_clause(n)
+
+
+def limit_clause(n: int) -> str:
+    return dialect.limit_clause(n)
+
+
+def insert_returning(table: str, columns: Sequence[str], key: str, select: str = "") -> str:
+    return dialect.insert_returning(table, columns, key, select)
+
+
+def now_expr() -> str:
+    return dialect.now_expr()
+
+
+def hours_ago_expr() -> str:
+    return dialect.hours_ago_expr()
+
+
+def json_array_source(kind: str = "int") -> str:
+    return dialect.json_array_source(kind)
+
+# ===== query hooks =====
+# hook(sql, params, elapsed_seconds, raw_conn)：每次 cursor.execute 結束後呼叫
+QueryHook = Callable[[str, tuple, float, Any], None]
+QUERY_HOOKS: List[QueryHook] = []
+
+
+def add_query_hook(hook: QueryHook) -> None:
+    if hook not in QUERY_HOOKS:
+        QUERY_HOOKS.append(hook)
+
+
+def remove_query_hook(hook: QueryHook) -> None:
+    if hook in QUERY_HOOKS:
+        QUERY_HOOKS.remove(hook)
+
+
+class TracedCursor:
+    """包一層 cursor：量 execute 時間並通知 QUERY_HOOKS，其餘屬性直接轉給原 cursor。"""
+
+    def __init__(self, cursor, raw_conn):
+        self._cursor = cursor
+        self._raw_conn = raw_conn
+
+    def execute(self, sql: str, *params):
+        # 支援 execute(sql, (a, b)) 與 execute(sql, a, b) 兩種寫法
+        bound = tuple(params[0]) if len(params) == 1 and isinstance(params[0], (tuple, list)) else tuple(params)
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(sql, bound)
+        finally:
+            elapsed = time.perf_counter() - started
+            for hook in list(QUERY_HOOKS):
+                hook(sql, bound, elapsed, self._raw_conn)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name: str, value) -> None:
+        # 例如 cur.fast_executemany = True 要設到原 cursor 上
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+
+class TracedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def cursor(self) -> TracedCursor:
+        return TracedCursor(self._conn.cursor(), self._conn)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value) -> None:
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+
+def connect_raw():
+    return dialect.connect()
+
+
+def get_conn(readonly: bool = False):
+    """
+    readonly=True：只讀的 handler（GET）用，有設定 replica 就走 replica；
+    replica 全掛或使用者剛寫過資料（read-your-writes）時回 primary。
+    """
+    conn = None
+    if readonly and replica_router.enabled and not must_read_primary():
+        conn = replica_router.connect()
+    if conn is None:
+        conn = connect_raw()
+    if QUERY_HOOKS:
+        return TracedConnection(conn)
+    return conn
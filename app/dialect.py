@@ -0,0 +1,198 @@
+"""
+SQL dialect layer：SQL Server (pyodbc) 與 SQLite（嵌入式部署 / 本機 benchmark）
+
+route 裡只用 db.py 提供的 helper（tbl / page_clause / top_clause / limit_clause /
+insert_returning / now_expr / hours_ago_expr），不要直接寫 TOP、OFFSET FETCH、OUTPUT INSERTED 這類語法。
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Sequence, Tuple
+
+try:
+    import pyodbc
+except ImportError:  # SQLite 模式不需要 pyodbc（也不需要系統上有 ODBC driver）
+    pyodbc = None
+
+
+class Dialect:
+    name = ""
+    integrity_errors: Tuple[type, ...] = ()
+
+    def quote_table(self, schema: str, name: str) -> str:
+        raise NotImplementedError
+
+    def page_clause(self) -> str:
+        """接在 ORDER BY 後面；參數順序固定是 (offset, page_size)。"""
+        raise NotImplementedError
+
+    def top_clause(self, n: int) -> str:
+        return ""
+
+    def limit_clause(self, n: int) -> str:
+        return ""
+
+    def insert_returning(self, table: str, columns: Sequence[str], key: str, select: str = "") -> str:
+        """INSERT ... 回傳新增那幾列的 key；select 有給時用 INSERT ... SELECT（可能一次新增好幾列）。"""
+        raise NotImplementedError
+
+    def now_expr(self) -> str:
+        raise NotImplementedError
+
+    def hours_ago_expr(self) -> str:
+        """DB 時鐘往前推 ? 小時（一個 int 參數）；跟 now_expr 寫進去的欄位比才不會混到 app server 的時鐘。"""
+        raise NotImplementedError
+
+    def json_array_source(self, kind: str = "int") -> str:
+        """
+        把一個 JSON array 參數（'[1,2,3]'）展開成單欄 value 的子查詢，
+        讓 IN (...) 不管幾個元素都只用一個 ? → 同一段 SQL、同一份 cached plan。
+        kind: int | nvarchar
+        """
+        raise NotImplementedError
+
+    def connect(self) -> Any:
+        raise NotImplementedError
+
+    def connect_dsn(self, dsn: str) -> Any:
+        """連到另一台同 dialect 的 server（read replica）。"""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """fork 之後或測試時丟掉手上的連線。"""
+
+
+class MssqlDialect(Dialect):
+    name = "mssql"
+
+    def __init__(self, conn_str: str):
+        if pyodbc is None:
+            raise RuntimeError("DB_BACKEND=mssql requires pyodbc.")
+        self.conn_str = conn_str
+        self.integrity_errors = (pyodbc.IntegrityError,)
+
+    def quote_table(self, schema: str, name: str) -> str:
+        return f"[{schema}].[{name}]"
+
+    def page_clause(self) -> str:
+        return "OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+
+    def top_clause(self, n: int) -> str:
+        return f"TOP {int(n)}"
+
+    def insert_returning(self, table: str, columns: Sequence[str], key: str, select: str = "") -> str:
+        cols = ", ".join(columns)
+        source = select or "VALUES ({})".format(", ".join(["?"] * len(columns)))
+        return f"INSERT INTO {table}({cols}) OUTPUT INSERTED.{key} {source};"
+
+    def now_expr(self) -> str:
+        return "sysdatetime()"
+
+    def hours_ago_expr(self) -> str:
+        return "DATEADD(hour, -CAST(? AS int), sysdatetime())"
+
+    def json_array_source(self, kind: str = "int") -> str:
+        # OPENJSON 需要 compatibility level >= 130（SQL Server 2016）
+        sql_type = "int" if kind == "int" else "nvarchar(4000)"
+        return f"SELECT CAST([value] AS {sql_type}) AS value FROM OPENJSON(?)"
+
+    def connect(self) -> Any:
+        return pyodbc.connect(self.conn_str, timeout=5)
+
+    def connect_dsn(self, dsn: str) -> Any:
+        return pyodbc.connect(dsn, timeout=5)
+
+
+# SQLite 沒有 datetime2，存 'YYYY-MM-DD HH:MM:SS' 文字，讀回來時轉成 datetime（跟 pyodbc 行為一致）
+sqlite3.register_adapter(datetime, lambda dt: dt.isoformat(" ", timespec="seconds"))
+sqlite3.register_converter("datetime2", lambda b: datetime.fromisoformat(b.decode("utf-8")))
+
+SQLITE_SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "SQL", "create_table_sqlite.sql")
+
+
+class SqliteDialect(Dialect):
+    """
+    WAL + 每個 thread 一條連線（sqlite3 連線不能跨 thread 共用）。
+    with get_conn() as conn 的語意跟 pyodbc 一樣：離開時 commit / 例外時 rollback，不會關連線。
+    """
+
+    name = "sqlite"
+    integrity_errors = (sqlite3.IntegrityError,)
+
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -65536",      # 64MB page cache
+        "PRAGMA mmap_size = 268435456",    # 256MB
+    )
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def quote_table(self, schema: str, name: str) -> str:
+        return f"[{name}]"
+
+    def page_clause(self) -> str:
+        # LIMIT <offset>, <count>：參數順序跟 OFFSET ... FETCH NEXT 一樣
+        return "LIMIT ?, ?"
+
+    def limit_clause(self, n: int) -> str:
+        return f"LIMIT {int(n)}"
+
+    def insert_returning(self, table: str, columns: Sequence[str], key: str, select: str = "") -> str:
+        cols = ", ".join(columns)
+        source = select or "VALUES ({})".format(", ".join(["?"] * len(columns)))
+        return f"INSERT INTO {table}({cols}) {source} RETURNING {key};"
+
+    def now_expr(self) -> str:
+        return "datetime('now', 'localtime')"
+
+    def hours_ago_expr(self) -> str:
+        return "datetime('now', 'localtime', '-' || ? || ' hours')"
+
+    def json_array_source(self, kind: str = "int") -> str:
+        return "SELECT value FROM json_each(?)"
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            cached_statements=512,
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            # schema 全部是 if not exists：每次啟動都跑，舊的 DB 檔也會補上後來加的表 / index
+            with open(SQLITE_SCHEMA_FILE, "r", encoding="utf-8") as f:
+                conn.executescript(f.read())
+            self._schema_ready = True
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def reset(self) -> None:
+        self._local = threading.local()
+        self._schema_ready = False
@@ -0,0 +1,85 @@
+"""
+Anonymous feed snapshot cache
+
+未登入的 posts_list 前 N 頁大家看到的都一樣：第一次查完就把整個 response 序列化成 bytes 存進 shared cache，
+之後直接回 bytes，不碰 DB。發文 / 刪文 / 留言 / 改個人資料時整批失效（版本號 +1，所有 worker 都看得到），
+另外有短 TTL 兜底（likes 最多舊 TTL 秒）。
+登入者共用同一份順序（post_id），貼文本身照常 hydrate（走 entity cache，按讚後 likes 是新的）+ likedByMe。
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from flask import current_app
+
+from .cache import FEED_NAMESPACE, SharedCache, cache
+from .config import Config
+from .pagination import page_cursor
+
+
+@dataclass(frozen=True)
+class FeedSnapshot:
+    body: bytes  # 未登入直接回傳的 JSON bytes
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        # 每次都是新 decode 的物件，呼叫端可以直接改
+        return json.loads(self.body)
+
+
+class FeedSnapshotCache:
+    def __init__(self, shared: SharedCache, pages: int, ttl: float):
+        self.shared = shared
+        self.pages = pages
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def cacheable(self, page: int) -> bool:
+        return self.ttl > 0 and 1 <= page <= self.pages
+
+    def invalidate(self) -> None:
+        self.shared.bump(FEED_NAMESPACE)
+
+    def get(
+        self,
+        page: int,
+        page_size: int,
+        load: Callable[[], Tuple[List[Dict[str, Any]], int, bool]],
+    ) -> FeedSnapshot:
+        """load() -> (items, total, hasMore)；同一頁同時只會有一個 request 去查 DB。"""
+        loaded = False
+
+        def build() -> bytes:
+            nonlocal loaded
+            loaded = True
+            items, total, has_more = load()
+            payload = {
+                "items": items,
+                "page": page,
+                "pageSize": page_size,
+                "total": total,
+                "hasMore": has_more,
+                "cursor": page_cursor(it["postId"] for it in items),
+            }
+            return current_app.json.dumps(payload).encode("utf-8")
+
+        body = self.shared.fetch(FEED_NAMESPACE, f"{page}:{page_size}", build, self.ttl)
+        if loaded:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return FeedSnapshot(body=body)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else None,
+        }
+
+
+anon_feed_cache = FeedSnapshotCache(cache, Config.ANON_FEED_CACHE_PAGES, Config.ANON_FEED_CACHE_TTL)
@@ -0,0 +1,176 @@
+"""
+In-memory follow graph（每個 process 一份）
+
+followedByMe / followOnly 原本每一列都要 EXISTS 查一次 follow；改成在記憶體裡查：
+- 每個 user 一份「追蹤誰」的 sorted array('i')（每個 id 4 bytes），bisect 查 → O(log n)
+- lazy：第一次用到某個 user 才從 DB 載入（一個查詢），之後這個 process 的 follow / unfollow 直接改（write-through）
+- 上限 FOLLOW_GRAPH_MAX_EDGES：超過就從最久沒用到的 user 開始丟（LRU），下次用到再載入
+- 其他 worker 的寫入：寫入時 bump shared cache 的版本號（scope = follower），讀的時候版本不同就重新載入；
+  cache 掛了就只靠 FOLLOW_GRAPH_TTL（載入超過這麼久的名單下次用到時重新載入）
+
+載入跟寫入的 race：載入期間有人改了同一個 user 的名單，查回來的結果只回給這次呼叫、不放進 index。
+寫入是 copy-on-write：做一份新的 array 再換掉 entry.ids，已經拿到舊 array、在 lock 外面 bisect / 迭代的讀者不受影響。
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .cache import FOLLOW_GRAPH_NAMESPACE, cache
+from .concurrency import fetch_all
+from .config import Config
+from .db import tbl
+
+_FOLLOWING_SQL = f"SELECT followee_id FROM {tbl('follow')} WHERE follower_id = ? ORDER BY followee_id"
+
+
+def _contains(arr: array, x: int) -> bool:
+    i = bisect_left(arr, x)
+    return i < len(arr) and arr[i] == x
+
+
+class _Entry:
+    __slots__ = ("ids", "loaded_at", "version")
+
+    def __init__(self, ids: array, loaded_at: float, version: Optional[Tuple[int, ...]]):
+        self.ids = ids
+        self.loaded_at = loaded_at
+        self.version = version
+
+
+class FollowGraph:
+    def __init__(self, max_edges: int, ttl: float):
+        self.max_edges = max_edges
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._following: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._edges = 0
+        # user_id -> 寫入次數（只記 index 裡沒有、正在載入的 user 也要看得到）
+        self._writes: Dict[int, int] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self._following = OrderedDict()
+        self._edges = 0
+        self._writes = {}
+        self.hits = self.loads = self.evictions = 0
+
+    # ===== read =====
+    def following(self, user_id: int) -> array:
+        """user_id 追蹤的人（sorted array('i')，之後不會再被改）；呼叫端也不要改它。"""
+        now = time.monotonic()
+        version = cache.version(FOLLOW_GRAPH_NAMESPACE, user_id)
+        with self._lock:
+            entry = self._following.get(user_id)
+            if (
+                entry is not None
+                and now - entry.loaded_at < self.ttl
+                and (version is None or version == entry.version)
+            ):
+                self._following.move_to_end(user_id)
+                self.hits += 1
+                return entry.ids
+            seq = self._writes.get(user_id, 0)
+
+        ids = array("i", (int(r[0]) for r in fetch_all(_FOLLOWING_SQL, (user_id,))))
+        with self._lock:
+            self.loads += 1
+            if self._writes.get(user_id, 0) == seq:
+                self._install(user_id, _Entry(ids, now, version))
+        return ids
+
+    def follows(self, follower_id: int, followee_id: int) -> bool:
+        return _contains(self.following(follower_id), followee_id)
+
+    def is_mutual(self, a: int, b: int) -> bool:
+        return self.follows(a, b) and self.follows(b, a)
+
+    def followed_among(self, follower_id: int, user_ids: Iterable[int]) -> Set[int]:
+        """user_ids 裡 follower_id 有追蹤的那些（一次載入，每個 id 一次 bisect）。"""
+        arr = self.following(follower_id)
+        return {uid for uid in user_ids if _contains(arr, uid)}
+
+    def common_following(self, a: int, b: int) -> List[int]:
+        """a、b 都有追蹤的人：拿短的那份逐一 bisect 長的那份。"""
+        x, y = self.following(a), self.following(b)
+        if len(x) > len(y):
+            x, y = y, x
+        return [uid for uid in x if _contains(y, uid)]
+
+    # ===== write-through（commit 之後呼叫）=====
+    def _bump(self, follower_id: int) -> Optional[Tuple[int, ...]]:
+        cache.bump(FOLLOW_GRAPH_NAMESPACE, scope=follower_id)
+        return cache.version(FOLLOW_GRAPH_NAMESPACE, follower_id)
+
+    def on_follow(self, follower_id: int, *followee_ids: int) -> None:
+        version = self._bump(follower_id)
+        with self._lock:
+            self._writes[follower_id] = self._writes.get(follower_id, 0) + 1
+            entry = self._following.get(follower_id)
+            if entry is None:
+                return
+            entry.version = version
+            added = sorted({uid for uid in followee_ids if not _contains(entry.ids, uid)})
+            if not added:
+                return
+            entry.ids = array("i", sorted(entry.ids.tolist() + added))
+            self._edges += len(added)
+            self._evict()
+
+    def on_unfollow(self, follower_id: int, *followee_ids: int) -> None:
+        version = self._bump(follower_id)
+        with self._lock:
+            self._writes[follower_id] = self._writes.get(follower_id, 0) + 1
+            entry = self._following.get(follower_id)
+            if entry is None:
+                return
+            entry.version = version
+            removed = {uid for uid in followee_ids if _contains(entry.ids, uid)}
+            if not removed:
+                return
+            entry.ids = array("i", (uid for uid in entry.ids if uid not in removed))
+            self._edges -= len(removed)
+
+    # ===== internals（呼叫時已拿著 lock）=====
+    def _install(self, user_id: int, entry: _Entry) -> None:
+        old = self._following.pop(user_id, None)
+        if old is not None:
+            self._edges -= len(old.ids)
+        self._following[user_id] = entry
+        self._edges += len(entry.ids)
+        self._evict()
+
+    def _evict(self) -> None:
+        # 至少留最新的一個（單一名單比上限還大時照樣能用）
+        while self._edges > self.max_edges and len(self._following) > 1:
+            _, entry = self._following.popitem(last=False)
+            self._edges -= len(entry.ids)
+            self.evictions += 1
+        # 寫入計數只要蓋住「正在載入」的那一小段時間；太多就整個清掉（最壞只是少放一次 index）
+        if len(self._writes) > 4 * max(len(self._following), 1024):
+            self._writes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.loads
+            return {
+                "users": len(self._following),
+                "edges": self._edges,
+                "maxEdges": self.max_edges,
+                "bytes": sum(sys.getsizeof(e.ids) for e in self._following.values()),
+                "hits": self.hits,
+                "loads": self.loads,
+                "hitRate": round(self.hits / total, 4) if total else None,
+                "evictions": self.evictions,
+            }
+
+
+follow_graph = FollowGraph(Config.FOLLOW_GRAPH_MAX_EDGES, Config.FOLLOW_GRAPH_TTL)
@@ -0,0 +1,100 @@
+"""
+Entity hydration：列表先查「有序的 id（+ 排序欄位）」，實體再一批撈回來組 JSON
+
+- 貼文：post 欄位 + commentCount，不 JOIN users（只有 authorId）；POST namespace，scope = post_id
+- 使用者：跟 GET /users/{id} 同一份 cache（PROFILE namespace 的 "row"），改名只要失效那一個人
+每種 entity 一個 IN (json) 查詢（OPENJSON / json_each）：先走 shared cache（一次 get_many），沒命中的才查。
+同一個 Hydrator 查過的 id 不會再查第二次（例如 profile bundle 三個分頁的作者大多是同幾個人）。
+
+Hydrator 不是 thread-safe：平行的查詢只拿 id，hydrate 在 request 的 thread 裡做。
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .cache import POST_NAMESPACE, PROFILE_NAMESPACE, cache
+from .concurrency import fetch_all
+from .config import Config
+from .queries import POSTS_BY_IDS, USERS_BY_IDS, VIEWER_LIKED_POST_IDS, json_param
+from .serializers import dt_to_iso, make_author_json, make_comment_json, make_post_json
+
+ENTITY_KEY = "row"
+
+
+def post_entity(r) -> Dict[str, Any]:
+    # r: POSTS_BY_IDS 的一列
+    return {
+        "postId": int(r[0]),
+        "picture": r[1],
+        "content": r[2] or "",
+        "likes": int(r[3] or 0),
+        "createdAt": dt_to_iso(r[4]),
+        "authorId": int(r[5]),
+        "commentCount": int(r[6] or 0),
+    }
+
+
+def _load_posts(ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    return {int(r[0]): post_entity(r) for r in fetch_all(POSTS_BY_IDS, (json_param(ids),))}
+
+
+def _load_users(ids: List[int]) -> Dict[int, List[Any]]:
+    return {int(r[0]): list(r) for r in fetch_all(USERS_BY_IDS, (json_param(ids),))}
+
+
+def invalidate_posts(*post_ids: int) -> None:
+    """按讚數 / 留言數 / 刪除：那幾篇的 entity 失效。"""
+    for pid in post_ids:
+        cache.bump(POST_NAMESPACE, scope=pid)
+
+
+def viewer_liked_post_ids(viewer: int, post_ids: Iterable[int]) -> set:
+    post_ids = sorted(set(post_ids))
+    if not post_ids:
+        return set()
+    return {int(r[0]) for r in fetch_all(VIEWER_LIKED_POST_IDS, (viewer, json_param(post_ids)))}
+
+
+class Hydrator:
+    def __init__(self):
+        self._posts: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._users: Dict[int, Optional[List[Any]]] = {}
+
+    def _fetch(self, memo: Dict[int, Any], ids: Iterable[int], namespace: str, load, ttl: float) -> Dict[int, Any]:
+        ids = list(dict.fromkeys(ids))
+        want = [i for i in ids if i not in memo]
+        if want:
+            got = cache.get_or_load_many(namespace, ENTITY_KEY, want, load, ttl)
+            for i in want:
+                memo[i] = got.get(i)
+        return {i: memo[i] for i in ids if memo[i] is not None}
+
+    def posts(self, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """{post_id: entity}；不存在的 id 不在結果裡。"""
+        return self._fetch(self._posts, ids, POST_NAMESPACE, _load_posts, Config.POST_CACHE_TTL)
+
+    def users(self, ids: Iterable[int]) -> Dict[int, List[Any]]:
+        """{user_id: users row}（make_user_json 的格式）；不存在的 id 不在結果裡。"""
+        return self._fetch(self._users, ids, PROFILE_NAMESPACE, _load_users, Config.PROFILE_CACHE_TTL)
+
+    def authors(self, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        return {uid: make_author_json(row) for uid, row in self.users(ids).items()}
+
+    def post_items(self, post_ids: Sequence[int], viewer: Optional[int] = None) -> List[Dict[str, Any]]:
+        """照 post_ids 的順序組 make_post_json；查的時候剛好被刪掉的貼文直接略過。"""
+        posts = self.posts(post_ids)
+        authors = self.authors(p["authorId"] for p in posts.values())
+        liked = viewer_liked_post_ids(viewer, posts) if viewer is not None else set()
+        return [
+            make_post_json(posts[pid], authors.get(posts[pid]["authorId"]), pid in liked)
+            for pid in post_ids
+            if pid in posts
+        ]
+
+    def comment_items(self, rows: Sequence[Any], viewer: Optional[int] = None) -> List[Dict[str, Any]]:
+        """rows: comment_id, post_id, content, created_at, updated_at, author_id（順序照舊）。"""
+        authors = self.authors(int(r[5]) for r in rows)
+        return [
+            make_comment_json(r, authors.get(int(r[5])), viewer is not None and int(r[5]) == viewer)
+            for r in rows
+        ]
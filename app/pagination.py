@@ -0,0 +1,92 @@
+"""
+分頁 total 模式：?total=exact|approx|none
+
+- exact ：COUNT(*)（第 1 頁的預設，前端要顯示「共 N 人」）
+- approx：COUNT(*) 結果放 shared cache，APPROX_COUNT_TTL 秒內共用（不會因為寫入失效）
+- none  ：不算 total（回 null），只靠 hasMore（第 2 頁以後的預設：無限捲動不需要每頁重算總數）
+
+不管哪一種，分頁查詢都多抓一筆（pageSize + 1）來判斷 hasMore。
+
+增量輪詢：列表回應帶 cursor（這一頁最大的 id），之後用 ?sinceCursor=<cursor> 只拿比它新的。
+id 是 identity / autoincrement，只會變大，所以 WHERE id > ? 就是一次 PK / index seek。
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from flask import request
+
+from .cache import COUNTS_NAMESPACE, cache
+from .concurrency import fetch_one
+from .config import Config
+from .errors import api_error
+
+TOTAL_MODES = ("exact", "approx", "none")
+
+
+def parse_total_mode(page: int) -> Tuple[Optional[str], Any]:
+    """回傳 (mode, error_response)。"""
+    raw = (request.args.get("total") or "").strip().lower()
+    if not raw:
+        return ("exact" if page <= 1 else "none"), None
+    if raw not in TOTAL_MODES:
+        return None, api_error(
+            400, "VALIDATION_ERROR", "Invalid total mode.", [{"field": "total", "reason": "invalid"}]
+        )
+    return raw, None
+
+
+def counter(mode: str, key: str, sql: str, params: Sequence[Any] = ()) -> Callable[[], Optional[int]]:
+    """依模式回傳一個「算 total」的函式（可以直接丟給 run_parallel / gather_db）。"""
+
+    def exact() -> int:
+        return int(fetch_one(sql, params)[0])
+
+    if mode == "exact":
+        return exact
+    if mode == "approx":
+        return lambda: cache.get_or_load(COUNTS_NAMESPACE, key, exact, Config.APPROX_COUNT_TTL)
+    return lambda: None
+
+
+def parse_cursor(name: str = "sinceCursor") -> Tuple[Optional[int], Any]:
+    """回傳 (cursor, error_response)；沒帶參數是 (None, None)。"""
+    raw = (request.args.get(name) or "").strip()
+    if not raw:
+        return None, None
+    try:
+        value = int(raw)
+    except ValueError:
+        value = -1
+    if value < 0:
+        return None, api_error(
+            400, "VALIDATION_ERROR", "Invalid cursor.", [{"field": name, "reason": "invalid"}]
+        )
+    return value, None
+
+
+def parse_ids(name: str = "ids") -> Tuple[Optional[List[int]], Any]:
+    """ids=3,1,2 → [3, 1, 2]（保留順序跟重複，回應照這個順序對齊）；沒帶參數是 (None, None)。"""
+    raw = request.args.get(name)
+    if raw is None:
+        return None, None
+    try:
+        ids = [int(x) for x in raw.split(",") if x.strip()]
+    except ValueError:
+        ids = []
+    if not ids or any(i < 1 for i in ids):
+        return None, api_error(400, "VALIDATION_ERROR", f"Invalid {name}.", [{"field": name, "reason": "invalid"}])
+    if len(ids) > Config.MULTI_GET_MAX_IDS:
+        return None, api_error(400, "VALIDATION_ERROR", f"Too many {name}.", [{"field": name, "reason": "too_many"}])
+    return ids, None
+
+
+def page_cursor(ids: Iterable[int], since: Optional[int] = None) -> Optional[str]:
+    """這一批裡最大的 id（沒有新資料就沿用呼叫端給的 cursor）；一律回字串，client 當 opaque 值存。"""
+    top = max(ids, default=since)
+    return None if top is None else str(top)
+
+
+def split_page(rows: List[Any], page_size: int) -> Tuple[List[Any], bool]:
+    """rows 是用 pageSize + 1 查回來的：回傳 (這一頁, hasMore)。"""
+    return rows[:page_size], len(rows) > page_size
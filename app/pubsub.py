@@ -0,0 +1,152 @@
+"""
+In-process pub/sub：按讚 / 留言的即時推播（給 GET /api/v1/stream 用）
+
+寫入路徑（like_post / unlike_post / 留言新增刪除）commit 之後呼叫 hub.publish(post_id, ...)；
+每個 SSE 連線是一個 Subscriber，只訂閱畫面上那幾篇貼文。
+
+Backpressure / 記憶體上限：Subscriber 不排 queue，而是把同一篇貼文的變化合併成一筆
+（likes 取最新值、delta 相加、新留言 id 最多留 STREAM_MAX_COMMENT_IDS 個，超過就標 truncated 讓 client 用 sinceCursor 補）。
+client 讀得慢只會讓合併的時間變長，每個連線佔的記憶體 = O(訂閱的貼文數)，不會越積越多。
+
+推播不碰 DB，SSE 連線也不拿 DB 連線。
+只看得到同一個 process 的寫入：多個 worker 時，client 在 reconnect / 重新整理時用 sinceCursor 補齊。
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .config import Config
+
+
+class _Pending:
+    __slots__ = ("likes", "likes_delta", "comments_delta", "comment_ids", "truncated")
+
+    def __init__(self):
+        self.likes: Optional[int] = None
+        self.likes_delta = 0
+        self.comments_delta = 0
+        self.comment_ids: List[int] = []
+        self.truncated = False
+
+
+class Subscriber:
+    def __init__(self, post_ids: Iterable[int], max_comment_ids: int):
+        self.post_ids = frozenset(post_ids)
+        self.max_comment_ids = max_comment_ids
+        self._cond = threading.Condition()
+        self._pending: Dict[int, _Pending] = {}
+        self.closed = False
+
+    def _merge(self, post_id: int, likes: Optional[int], likes_delta: int, comments_delta: int,
+               comment_id: Optional[int]) -> None:
+        with self._cond:
+            p = self._pending.get(post_id)
+            if p is None:
+                p = self._pending[post_id] = _Pending()
+            if likes is not None:
+                p.likes = likes
+            p.likes_delta += likes_delta
+            p.comments_delta += comments_delta
+            if comment_id is not None:
+                if len(p.comment_ids) < self.max_comment_ids:
+                    p.comment_ids.append(comment_id)
+                else:
+                    p.truncated = True
+            self._cond.notify()
+
+    def wait(self, timeout: float) -> List[Dict[str, Any]]:
+        """等到有變化（或 timeout / close）；回傳合併後的變化並清空。"""
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            pending, self._pending = self._pending, {}
+        return [
+            {
+                "postId": post_id,
+                "likes": p.likes,
+                "likesDelta": p.likes_delta,
+                "commentsDelta": p.comments_delta,
+                "newCommentIds": p.comment_ids,
+                "truncated": p.truncated,
+            }
+            for post_id, p in sorted(pending.items())
+        ]
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class PubSubHub:
+    def __init__(self, max_subscribers: int, max_comment_ids: int):
+        self.max_subscribers = max_subscribers
+        self.max_comment_ids = max_comment_ids
+        self._lock = threading.Lock()
+        self._by_post: Dict[int, Set[Subscriber]] = {}
+        self._subs: Set[Subscriber] = set()
+        self.published = 0
+        self.delivered = 0
+        self.rejected = 0
+
+    def subscribe(self, post_ids: Iterable[int]) -> Optional[Subscriber]:
+        """連線數超過上限回 None（呼叫端回 503）。"""
+        sub = Subscriber(post_ids, self.max_comment_ids)
+        with self._lock:
+            if len(self._subs) >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            self._subs.add(sub)
+            for pid in sub.post_ids:
+                self._by_post.setdefault(pid, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        sub.close()
+        with self._lock:
+            self._subs.discard(sub)
+            for pid in sub.post_ids:
+                subs = self._by_post.get(pid)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._by_post[pid]
+
+    def publish(self, post_id: int, likes: Optional[int] = None, likes_delta: int = 0,
+                comments_delta: int = 0, comment_id: Optional[int] = None) -> None:
+        """寫入 commit 之後呼叫；沒有人訂閱這篇時只是一次 dict lookup。"""
+        with self._lock:
+            self.published += 1
+            subs = self._by_post.get(post_id)
+            if not subs:
+                return
+            subs = list(subs)
+            self.delivered += len(subs)
+        for sub in subs:
+            sub._merge(post_id, likes, likes_delta, comments_delta, comment_id)
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self._by_post = {}
+        self._subs = set()
+        self.published = self.delivered = self.rejected = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subs),
+                "maxSubscribers": self.max_subscribers,
+                "watchedPosts": len(self._by_post),
+                "published": self.published,
+                "delivered": self.delivered,
+                "rejected": self.rejected,
+            }
+
+
+def sse_event(event: str, data: str, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {data}\n\n"
+
+
+hub = PubSubHub(Config.STREAM_MAX_SUBSCRIBERS, Config.STREAM_MAX_COMMENT_IDS)
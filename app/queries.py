@@ -0,0 +1,377 @@
+"""
+Precompiled query templates
+
+feed / search 的 SQL 在 import 時就把所有變體組好（authorIds、關鍵字），
+request 裡只查表，不再做字串拼接 / replace。
+ID 列表與 LIKE pattern 一律用「一個 JSON 參數」傳（OPENJSON / json_each），
+不管幾個 id 都是同一段 SQL 文字，server 端只會有一份 cached plan。
+
+另外用 query hook 統計 statement 文字重複率（= plan cache 可重用的比例），給 /stats 用。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from itertools import product
+from typing import Any, Dict, Iterable, Tuple
+
+from .config import Config
+from .db import add_query_hook, insert_returning, json_array_source, limit_clause, page_clause, tbl, top_clause
+
+# 所有 template：name -> sql（只在 import 時寫入）
+REGISTRY: Dict[str, str] = {}
+
+
+def _register(name: str, sql: str) -> str:
+    REGISTRY[name] = sql
+    return sql
+
+
+def json_param(values: Iterable[Any]) -> str:
+    return json.dumps(list(values), ensure_ascii=False)
+
+
+_IDS = json_array_source("int")
+_PATTERNS = json_array_source("nvarchar")
+
+
+def _post_ids_select(top: str = "", extra: str = "") -> str:
+    # 列表只回 id + 排序欄位；貼文內容、作者、數量交給 hydrate.py 一批撈（cache 命中就不查）
+    return f"SELECT {top} p.post_id, p.created_at{extra} FROM {tbl('post')} p"
+
+
+def _where(parts) -> str:
+    parts = [x for x in parts if x]
+    return (" WHERE " + " AND ".join(parts)) if parts else ""
+
+
+_AUTHOR_FILTER = f"p.user_id IN ({_IDS})"
+# 粗篩：只用 content LIKE（title 是 content 的第一行），pattern 列表是一個 JSON 參數
+_TOKEN_FILTER = f"EXISTS (SELECT 1 FROM ({_PATTERNS}) t WHERE LOWER(p.content) LIKE t.value)"
+
+
+# ===== posts_list =====
+# 參數順序：[authorIds json]
+POSTS_LIST_COUNT: Dict[bool, str] = {
+    authors: _register(
+        f"posts_list.count[authors={int(authors)}]",
+        f"SELECT COUNT(*) FROM {tbl('post')} p" + _where([_AUTHOR_FILTER if authors else ""]),
+    )
+    for authors in (False, True)
+}
+
+# key: authors；參數順序：[authorIds json], offset, page_size
+POSTS_LIST_PAGE: Dict[bool, str] = {
+    authors: _register(
+        f"posts_list.page[authors={int(authors)}]",
+        _post_ids_select()
+        + _where([_AUTHOR_FILTER if authors else ""])
+        + f" ORDER BY p.created_at DESC {page_clause()};",
+    )
+    for authors in (False, True)
+}
+
+# key: authors；參數順序：sinceCursor, [authorIds json], 0, page_size
+# 增量輪詢：post_id 只會變大，post_id > ? 直接走 PK seek；新到舊
+POSTS_LIST_SINCE: Dict[bool, str] = {
+    authors: _register(
+        f"posts_list.since[authors={int(authors)}]",
+        _post_ids_select()
+        + _where(["p.post_id > ?", _AUTHOR_FILTER if authors else ""])
+        + f" ORDER BY p.post_id DESC {page_clause()};",
+    )
+    for authors in (False, True)
+}
+
+# 登入者在一批貼文裡按過讚的 post_id；參數：me, [postIds json]
+VIEWER_LIKED_POST_IDS = _register(
+    "likes.viewer_liked",
+    f"SELECT l.post_id FROM {tbl('likes')} l WHERE l.user_id = ? AND l.post_id IN ({_IDS})",
+)
+
+# ===== posts_search =====
+SEARCH_CANDIDATE_LIMIT = 500
+
+# key: (authors, tokens)；回傳 post_id, created_at, content（fuzzy 要用）
+# followOnly 在呼叫端用 follow graph 換成 authorIds（自己 + 追蹤的人），不再每篇 EXISTS
+# 參數順序：[authorIds json], [patterns json]
+POSTS_SEARCH: Dict[Tuple[bool, bool], str] = {
+    (authors, tokens): _register(
+        f"posts_search[authors={int(authors)},tokens={int(tokens)}]",
+        _post_ids_select(top_clause(SEARCH_CANDIDATE_LIMIT), ", p.content")
+        + _where([
+            _AUTHOR_FILTER if authors else "",
+            _TOKEN_FILTER if tokens else "",
+        ])
+        + f" ORDER BY p.created_at DESC {limit_clause(SEARCH_CANDIDATE_LIMIT)};",
+    )
+    for authors, tokens in product((False, True), repeat=2)
+}
+
+
+# ===== hydration：一種 entity 一個 IN 查詢；參數：[ids json] =====
+# NOTE: commentCount 用 correlated subquery（每篇一次 index seek）
+POSTS_BY_IDS = _register(
+    "hydrate.posts",
+    f"""
+    SELECT
+        p.post_id, p.picture, p.content, p.likes, p.created_at, p.user_id,
+        (SELECT COUNT(*) FROM {tbl('comment')} c WHERE c.post_id = p.post_id) AS commentCount
+    FROM {tbl('post')} p
+    WHERE p.post_id IN ({_IDS})
+    """,
+)
+
+USERS_BY_IDS = _register(
+    "hydrate.users",
+    f"SELECT user_id, Email, user_name, bio, profile_pic, banner_pic FROM {tbl('users')} WHERE user_id IN ({_IDS})",
+)
+
+
+# ===== bulk writes：一個 transaction、固定幾個 statement，跟目標數量無關 =====
+# 目標存不存在 + 是否已追蹤；參數：me, [ids json]
+BULK_FOLLOW_STATUS = _register(
+    "follows_bulk.status",
+    f"""
+    SELECT u.user_id,
+        CASE WHEN EXISTS (
+            SELECT 1 FROM {tbl('follow')} f WHERE f.follower_id = ? AND f.followee_id = u.user_id
+        ) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END AS followed
+    FROM {tbl('users')} u
+    WHERE u.user_id IN ({_IDS})
+    """,
+)
+
+# 回傳這次真的新增的 followee_id（OUTPUT INSERTED / RETURNING）：同時有別的 request 先插了同一列時不算進去
+# 參數：me, [ids json], me, me
+BULK_FOLLOW_INSERT = _register(
+    "follows_bulk.insert",
+    insert_returning(
+        tbl('follow'),
+        ["follower_id", "followee_id"],
+        "followee_id",
+        f"""
+        SELECT ?, u.user_id
+        FROM {tbl('users')} u
+        WHERE u.user_id IN ({_IDS})
+          AND u.user_id <> ?
+          AND NOT EXISTS (SELECT 1 FROM {tbl('follow')} f WHERE f.follower_id = ? AND f.followee_id = u.user_id)
+        """,
+    ),
+)
+
+# 參數：me, [ids json]
+BULK_LIKE_STATUS = _register(
+    "likes_bulk.status",
+    f"""
+    SELECT p.post_id,
+        CASE WHEN EXISTS (
+            SELECT 1 FROM {tbl('likes')} l WHERE l.post_id = p.post_id AND l.user_id = ?
+        ) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END AS liked
+    FROM {tbl('post')} p
+    WHERE p.post_id IN ({_IDS})
+    """,
+)
+
+# 回傳這次真的新增的 post_id（OUTPUT INSERTED / RETURNING），counters / 推播只算這些
+# 參數：me, [ids json], me
+BULK_LIKE_INSERT = _register(
+    "likes_bulk.insert",
+    insert_returning(
+        tbl('likes'),
+        ["post_id", "user_id"],
+        "post_id",
+        f"""
+        SELECT p.post_id, ?
+        FROM {tbl('post')} p
+        WHERE p.post_id IN ({_IDS})
+          AND NOT EXISTS (SELECT 1 FROM {tbl('likes')} l WHERE l.post_id = p.post_id AND l.user_id = ?)
+        """,
+    ),
+)
+
+# 這次真的新增的貼文各 +1：一個 UPDATE；參數：[ids json]
+BULK_LIKE_COUNTERS = _register(
+    "likes_bulk.counters",
+    f"UPDATE {tbl('post')} SET likes = likes + 1 WHERE post_id IN ({_IDS})",
+)
+
+# 參數：[ids json]
+POST_LIKES_BY_IDS = _register(
+    "likes_bulk.likes",
+    f"SELECT post_id, likes FROM {tbl('post')} WHERE post_id IN ({_IDS})",
+)
+
+
+# ===== people you may know（背景預先算，不在 request 裡跑）=====
+SUGGESTION_CANDIDATE_LIMIT = 500
+
+# 朋友的朋友：我追蹤的人追蹤了誰、被幾個人追蹤（mutual），排除自己跟已追蹤的；
+# last_active = 最後一篇貼文時間（IX_post_user seek），排序權重在 suggestions.py 算
+# 參數：me, me, me
+SUGGESTION_CANDIDATES = _register(
+    "suggestions.candidates",
+    f"""
+    SELECT {top_clause(SUGGESTION_CANDIDATE_LIMIT)}
+        f2.followee_id, COUNT(*) AS mutual,
+        (SELECT MAX(p.created_at) FROM {tbl('post')} p WHERE p.user_id = f2.followee_id) AS last_active
+    FROM {tbl('follow')} f1
+    JOIN {tbl('follow')} f2 ON f2.follower_id = f1.followee_id
+    WHERE f1.follower_id = ? AND f2.followee_id <> ?
+      AND NOT EXISTS (
+        SELECT 1 FROM {tbl('follow')} f3 WHERE f3.follower_id = ? AND f3.followee_id = f2.followee_id
+      )
+    GROUP BY f2.followee_id
+    ORDER BY mutual DESC, f2.followee_id {limit_clause(SUGGESTION_CANDIDATE_LIMIT)}
+    """,
+)
+
+# 一批使用者的最後活動時間（增量更新時新加進來的候選人用）；參數：[ids json]
+USERS_LAST_ACTIVE = _register(
+    "suggestions.last_active",
+    f"SELECT p.user_id, MAX(p.created_at) FROM {tbl('post')} p WHERE p.user_id IN ({_IDS}) GROUP BY p.user_id",
+)
+
+
+# ===== #tag / @mention（posts_create 時解析，app/tags.py）=====
+# 參數：post_id, [tags json]（已正規化、去重）
+POST_TAGS_INSERT = _register(
+    "tags.insert",
+    f"INSERT INTO {tbl('post_tag')}(tag, post_id) SELECT DISTINCT j.value, ? FROM ({_PATTERNS}) j",
+)
+
+# @user_name 對到的使用者（同名的都算，不提到自己）；參數：post_id, [names json], me
+POST_MENTIONS_INSERT = _register(
+    "mentions.insert",
+    f"""
+    INSERT INTO {tbl('post_mention')}(post_id, user_id)
+    SELECT DISTINCT ?, u.user_id FROM {tbl('users')} u
+    WHERE u.user_name IN (SELECT j.value FROM ({_PATTERNS}) j) AND u.user_id <> ?
+    """,
+)
+
+# 刪文前查這篇的 tag（autocomplete 的計數要扣）；參數：post_id
+POST_TAGS_OF_POST = _register(
+    "tags.of_post",
+    f"SELECT tag FROM {tbl('post_tag')} WHERE post_id = ?",
+)
+
+# tag feed：keyset（post_id 越大越新），PK (tag, post_id) 一次 seek
+# 參數：tag, before post_id, 0, size
+TAG_POSTS_PAGE = _register(
+    "tags.posts",
+    f"SELECT t.post_id FROM {tbl('post_tag')} t WHERE t.tag = ? AND t.post_id < ? ORDER BY t.post_id DESC {page_clause()}",
+)
+
+# autocomplete 的 trie 整個載入；回傳 tag, 篇數
+TAG_COUNTS = _register(
+    "tags.counts",
+    f"SELECT tag, COUNT(*) FROM {tbl('post_tag')} GROUP BY tag",
+)
+
+
+# ===== user name autocomplete（app/autocomplete.py 整個載入）=====
+# 回傳 user_id, user_name, 追蹤者數（IX_follow_followee 每人一次 seek）
+USER_NAMES_WITH_FOLLOWERS = _register(
+    "autocomplete.users",
+    f"""
+    SELECT u.user_id, u.user_name,
+        (SELECT COUNT(*) FROM {tbl('follow')} f WHERE f.followee_id = u.user_id) AS followers
+    FROM {tbl('users')} u
+    """,
+)
+
+
+# ===== trending（app/trending.py）=====
+# score = Σ 權重 × 2^((事件時間 - epoch 起點) / half-life)：同一個 epoch 裡直接相加就好，不用每次衰減所有列
+# 參數：delta, epoch, post_id
+TRENDING_ADD = _register(
+    "trending.add",
+    f"UPDATE {tbl('post_trending')} SET score = score + ? WHERE epoch = ? AND post_id = ?",
+)
+
+# 這個 epoch 還沒有那一列（貼文已經被刪就不插）；參數：epoch, post_id, delta, post_id
+TRENDING_INSERT = _register(
+    "trending.insert",
+    f"""
+    INSERT INTO {tbl('post_trending')}(epoch, post_id, score)
+    SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM {tbl('post')} WHERE post_id = ?)
+    """,
+)
+
+# 只留目前和上一個 epoch；參數：oldest epoch
+TRENDING_PRUNE = _register(
+    "trending.prune",
+    f"DELETE FROM {tbl('post_trending')} WHERE epoch < ?",
+)
+
+TRENDING_TOP_LIMIT = 1000
+
+# 上一個 epoch 的分數乘上 factor 換算到目前 epoch 的基準再相加
+# 參數：epoch, factor, previous epoch, epoch, factor
+_TRENDING_SUM = "SUM(CASE WHEN t.epoch = ? THEN t.score ELSE t.score * ? END)"
+TRENDING_TOP = _register(
+    "trending.top",
+    f"""
+    SELECT {top_clause(TRENDING_TOP_LIMIT)} t.post_id, {_TRENDING_SUM} AS score
+    FROM {tbl('post_trending')} t
+    WHERE t.epoch >= ?
+    GROUP BY t.post_id
+    HAVING {_TRENDING_SUM} > 0
+    ORDER BY score DESC, t.post_id DESC {limit_clause(TRENDING_TOP_LIMIT)}
+    """,
+)
+
+
+# ===== plan cache stats =====
+class PlanCacheStats:
+    """
+    server 的 plan cache 以 statement 文字為 key；同一段文字第二次以後執行就能重用 plan。
+    這裡記錄每段文字（hash）出現過沒，hit rate = 重複文字的執行次數 / 總執行次數。
+    """
+
+    MAX_TEXTS = 20000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen: Dict[str, int] = {}
+        self.executions = 0
+        self.hits = 0
+
+    def record(self, sql: str, params: tuple, elapsed: float, raw_conn: Any) -> None:
+        key = hashlib.sha1(sql.encode("utf-8")).hexdigest()
+        with self._lock:
+            self.executions += 1
+            n = self._seen.get(key)
+            if n is not None:
+                self.hits += 1
+                self._seen[key] = n + 1
+            elif len(self._seen) < self.MAX_TEXTS:
+                self._seen[key] = 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": Config.PLAN_CACHE_STATS,
+                "executions": self.executions,
+                "distinctStatements": len(self._seen),
+                "hits": self.hits,
+                "hitRate": round(self.hits / self.executions, 4) if self.executions else None,
+                "templates": len(REGISTRY),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._seen.clear()
+            self.executions = 0
+            self.hits = 0
+
+
+plan_cache_stats = PlanCacheStats()
+
+
+def init_plan_cache_stats() -> None:
+    # 沒有任何 hook 時 get_conn 不包 TracedConnection：預設關閉，hot path 不用付這個成本
+    if Config.PLAN_CACHE_STATS:
+        add_query_hook(plan_cache_stats.record)
@@ -0,0 +1,129 @@
+"""
+Slow query log
+
+- 執行時間超過 Config.SLOW_QUERY_MS 的 statement 會寫進 log（參數只記型別，不記值）
+- 每個 fingerprint 只抓一次執行計畫：SQL Server 用 SHOWPLAN_XML（估計計畫），SQLite 用 EXPLAIN QUERY PLAN
+- 計畫存到 Config.SLOW_QUERY_PLAN_DIR，同一個 fingerprint 計畫變了就輪替成 .1/.2...，migration 後可以直接 diff
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Optional, Set
+
+from .config import Config
+from .db import add_query_hook, connect_raw
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+_PLACEHOLDER_LIST_RE = re.compile(r"\?(\s*,\s*\?)+")
+_MAX_SEEN = 10000
+
+_seen: Set[str] = set()
+_seen_lock = threading.Lock()
+
+
+def normalize_sql(sql: str) -> str:
+    return _WS_RE.sub(" ", sql or "").strip()
+
+
+def fingerprint(sql: str) -> str:
+    # IN (?,?,?) 不管幾個參數都算同一種 statement
+    norm = _PLACEHOLDER_LIST_RE.sub("?...", normalize_sql(sql)).upper()
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()[:16]
+
+
+def redact_params(params: tuple) -> list:
+    out = []
+    for p in params:
+        if p is None:
+            out.append(None)
+        elif isinstance(p, str):
+            out.append(f"<str len={len(p)}>")
+        else:
+            out.append(f"<{type(p).__name__}>")
+    return out
+
+
+def _capture_plan(sql: str, params: tuple, raw_conn: Any) -> Optional[tuple[str, str]]:
+    """回傳 (副檔名, 計畫內容)。抓計畫不會真的執行 statement。"""
+    if isinstance(raw_conn, sqlite3.Connection):
+        rows = raw_conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        text = "\n".join(f"{r[0]}|{r[1]}|{r[3]}" for r in rows)
+        return "plan.txt", text + "\n"
+
+    # SHOWPLAN 必須自己一個 batch，另外開連線避免影響目前的 transaction
+    conn = connect_raw()
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute("SET SHOWPLAN_XML ON")
+        try:
+            cur.execute(sql, params)
+            row = cur.fetchone()
+        finally:
+            cur.execute("SET SHOWPLAN_XML OFF")
+        if not row or row[0] is None:
+            return None
+        return "sqlplan", str(row[0])
+    finally:
+        conn.close()
+
+
+def _rotate_and_write(path: str, content: str, keep: int) -> None:
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return
+        # 舊的往後推：x -> x.1 -> x.2 ...
+        for i in range(keep - 1, 0, -1):
+            src = path if i == 1 else f"{path}.{i - 1}"
+            dst = f"{path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, dst)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def store_plan(fp: str, sql: str, ext: str, plan: str) -> None:
+    plan_dir = Config.SLOW_QUERY_PLAN_DIR
+    os.makedirs(plan_dir, exist_ok=True)
+    keep = max(1, Config.SLOW_QUERY_PLAN_KEEP)
+    _rotate_and_write(os.path.join(plan_dir, f"{fp}.sql"), normalize_sql(sql) + "\n", keep)
+    _rotate_and_write(os.path.join(plan_dir, f"{fp}.{ext}"), plan, keep)
+
+
+def _on_query(sql: str, params: tuple, elapsed: float, raw_conn: Any) -> None:
+    elapsed_ms = elapsed * 1000.0
+    if elapsed_ms < Config.SLOW_QUERY_MS:
+        return
+
+    fp = fingerprint(sql)
+    logger.warning(
+        "slow query %.1fms fp=%s params=%s sql=%s",
+        elapsed_ms, fp, redact_params(params), normalize_sql(sql),
+    )
+
+    with _seen_lock:
+        if fp in _seen:
+            return
+        if len(_seen) >= _MAX_SEEN:
+            _seen.clear()
+        _seen.add(fp)
+
+    try:
+        captured = _capture_plan(sql, params, raw_conn)
+        if captured:
+            store_plan(fp, sql, captured[0], captured[1])
+    except Exception:
+        logger.exception("failed to capture plan fp=%s", fp)
+
+
+def init_slow_query_log() -> None:
+    if Config.SLOW_QUERY_MS > 0:
+        add_query_hook(_on_query)
@@ -0,0 +1,164 @@
+"""
+Read replica routing
+
+- get_conn(readonly=True) 會輪流挑一台健康的 replica；連不上就標記 down 一段時間，全部 down 就回 primary
+- read-your-writes：使用者寫入後 Config.READ_YOUR_WRITES_SECONDS 秒內的讀取一律走 primary
+  （同 process 記 user_id；跨 worker / 跨機器靠 cookie）
+"""
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import has_request_context, request
+
+from .auth_utils import get_optional_auth_user_id
+from .config import Config
+
+RW_COOKIE_NAME = "rw_until"
+
+
+class Replica:
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.down_until = 0.0
+        self.last_check = 0.0
+        self.failures = 0
+
+    def is_up(self, now: float) -> bool:
+        return now >= self.down_until
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        dsns: List[str],
+        connect: Callable[[str], Any],
+        health_interval: float = 10.0,
+        cooldown: float = 30.0,
+    ):
+        self.replicas = [Replica(d) for d in dsns]
+        self._connect = connect
+        self._health_interval = health_interval
+        self._cooldown = cooldown
+        self._rr = itertools.count()
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """fork 之後呼叫：每個 worker 自己重新做健康檢查。"""
+        self._lock = threading.Lock()
+        self._rr = itertools.count()
+        for rep in self.replicas:
+            rep.down_until = 0.0
+            rep.last_check = 0.0
+            rep.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def _mark_down(self, rep: Replica) -> None:
+        with self._lock:
+            rep.failures += 1
+            rep.down_until = time.monotonic() + self._cooldown
+
+    def _mark_up(self, rep: Replica, now: float) -> None:
+        with self._lock:
+            rep.failures = 0
+            rep.down_until = 0.0
+            rep.last_check = now
+
+    def connect(self) -> Optional[Any]:
+        """回傳 replica 連線；沒有可用的 replica 回 None（呼叫端自己 fallback 到 primary）。"""
+        n = len(self.replicas)
+        if n == 0:
+            return None
+        start = next(self._rr)
+        now = time.monotonic()
+        for i in range(n):
+            rep = self.replicas[(start + i) % n]
+            if not rep.is_up(now):
+                continue
+            try:
+                conn = self._connect(rep.dsn)
+                # 健康檢查：每 health_interval 秒對新連線打一次 SELECT 1
+                if now - rep.last_check >= self._health_interval:
+                    cur = conn.cursor()
+                    cur.execute("SELECT 1")
+                    cur.fetchone()
+                    self._mark_up(rep, now)
+                return conn
+            except Exception:
+                self._mark_down(rep)
+        return None
+
+    def status(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "index": i,
+                "up": rep.is_up(now),
+                "failures": rep.failures,
+                "downForSeconds": max(0.0, round(rep.down_until - now, 1)),
+            }
+            for i, rep in enumerate(self.replicas)
+        ]
+
+
+# ===== read-your-writes =====
+_recent_writers: Dict[int, float] = {}
+_recent_lock = threading.Lock()
+
+
+def note_write(user_id: int) -> float:
+    until = time.time() + Config.READ_YOUR_WRITES_SECONDS
+    with _recent_lock:
+        _recent_writers[user_id] = until
+        if len(_recent_writers) > 10000:
+            now = time.time()
+            for uid in [u for u, t in _recent_writers.items() if t < now]:
+                _recent_writers.pop(uid, None)
+    return until
+
+
+def must_read_primary() -> bool:
+    """目前 request 的使用者是不是剛寫過資料（還在 read-your-writes 視窗內）。"""
+    if not has_request_context():
+        return False
+    now = time.time()
+    try:
+        if float(request.cookies.get(RW_COOKIE_NAME) or 0) > now:
+            return True
+    except ValueError:
+        pass
+    me = get_optional_auth_user_id()
+    if me is None:
+        return False
+    with _recent_lock:
+        return _recent_writers.get(me, 0.0) > now
+
+
+def init_read_your_writes(app) -> None:
+    """寫入成功（非 GET 且 2xx）之後記錄使用者，並發一個短效 cookie 讓其他 worker 也知道。"""
+
+    @app.after_request
+    def _track_writes(resp):
+        if request.method in ("GET", "HEAD", "OPTIONS") or not (200 <= resp.status_code < 300):
+            return resp
+        # POST /batch 本身不算寫入：裡面的寫入 sub-request 自己會記（cookie 也會帶回來）
+        if request.endpoint == "batch.batch":
+            return resp
+        me = get_optional_auth_user_id()
+        if me is None:
+            return resp
+        until = note_write(me)
+        resp.set_cookie(
+            RW_COOKIE_NAME,
+            str(int(until) + 1),
+            max_age=max(1, Config.READ_YOUR_WRITES_SECONDS),
+            httponly=True,
+            samesite="Lax",
+        )
+        return resp
@@ -1,9 +1,8 @@
 from flask import Blueprint, jsonify, request
 import bcrypt
-import pyodbc
 
 from ..errors import api_error
-from ..db import get_conn, tbl
+from ..db import IntegrityError, get_conn, insert_returning, tbl
 from ..auth_utils import (
     create_access_token,
     create_refresh_token,
@@ -13,6 +12,8 @@ from ..auth_utils import (
     clear_refresh_cookie
 )
 from ..serializers import make_user_json
+from ..suggestions import suggestions
+from ..autocomplete import user_names
 from ..validators import is_valid_email
 from typing import Any, Dict, List
 
@@ -64,11 +65,7 @@ def register_v1():
                 return api_error(409, "CONFLICT", "UserName already used.", [{"field": "userName", "reason": "already_used"}])
 
             cur.execute(
-                f"""
-                INSERT INTO {tbl('users')} (Email, pwd, bio, profile_pic, banner_pic, user_name)
-                OUTPUT INSERTED.user_id
-                VALUES (?, ?, NULL, NULL, NULL, ?);
-                """,
+                insert_returning(tbl('users'), ["Email", "pwd", "user_name"], "user_id"),
                 (email, pwd_hash, user_name),
             )
             row = cur.fetchone()
@@ -77,6 +74,7 @@ def register_v1():
                 return api_error(500, "INTERNAL_ERROR", "Failed to create user.")
             new_id = int(row[0])
             conn.commit()
+            user_names.on_register(new_id, user_name)
 
             # fetch user
             cur.execute(
@@ -93,7 +91,7 @@ def register_v1():
         
         return resp, 201
 
-    except pyodbc.IntegrityError:
+    except IntegrityError:
         return api_error(409, "CONFLICT", "Conflict.")
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
@@ -134,6 +132,8 @@ def login_v1():
 
         access_token = create_access_token(user_id)
         refresh_token = create_refresh_token(user_id)
+        # 活躍使用者：登入時先在背景把「你可能認識的人」算好
+        suggestions.warm(user_id)
         user_json = make_user_json((row[0], row[1], row[2], row[3], row[4], row[5]))
 
         resp = jsonify({"accessToken": access_token, "user": user_json})
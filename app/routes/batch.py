@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.test import EnvironBuilder
+
+from ..auth_utils import get_optional_auth_user_id, shared_auth_decode
+from ..concurrency import run_parallel
+from ..config import Config
+from ..errors import api_error
+
+
+bp = Blueprint("batch", __name__, url_prefix=Config.API_PREFIX)
+
+_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+# 不能放進 batch 的：自己、SSE（長連線）、auth（refresh cookie 的 path 只在 /auth 底下）
+_BLOCKED_PREFIXES = (
+    f"{Config.API_PREFIX}/batch",
+    f"{Config.API_PREFIX}/stream",
+    f"{Config.API_PREFIX}/auth/",
+)
+# sub-request 沿用外層 request 的這些 header（登入狀態、read-your-writes cookie）
+_FORWARD_HEADERS = ("Authorization", "Cookie")
+
+
+def _validate(items: Any) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    if not isinstance(items, list) or not items:
+        return [], [{"field": "requests", "reason": "required"}]
+    if len(items) > Config.BATCH_MAX_REQUESTS:
+        return [], [{"field": "requests", "reason": "too_many"}]
+
+    parsed: List[Dict[str, Any]] = []
+    details: List[Dict[str, str]] = []
+    for i, it in enumerate(items):
+        if not isinstance(it, dict):
+            details.append({"field": f"requests[{i}]", "reason": "invalid"})
+            continue
+        method = str(it.get("method") or "GET").upper()
+        path = str(it.get("path") or "")
+        if method not in _METHODS:
+            details.append({"field": f"requests[{i}].method", "reason": "invalid"})
+        if not path.startswith(Config.API_PREFIX + "/") or path.startswith(_BLOCKED_PREFIXES):
+            details.append({"field": f"requests[{i}].path", "reason": "invalid"})
+        parsed.append({"id": it.get("id", i), "method": method, "path": path, "body": it.get("body")})
+    return parsed, details
+
+
+def _phases(items: List[Dict[str, Any]]) -> List[List[int]]:
+    """連續的 GET 互不相依，放同一組同時跑；寫入自己一組，照順序跑（後面的 GET 看得到它的結果）。"""
+    phases: List[List[int]] = []
+    for i, it in enumerate(items):
+        if it["method"] == "GET" and phases and items[phases[-1][0]]["method"] == "GET":
+            phases[-1].append(i)
+        else:
+            phases.append([i])
+    return phases
+
+
+def _dispatch(app, item: Dict[str, Any], headers: Dict[str, str], base_url: str, remote_addr: str):
+    """在新的 request context 裡跑一個 sub-request（before/after_request hooks 都照常）。"""
+    path, _, query = item["path"].partition("?")
+    builder = EnvironBuilder(
+        path=path,
+        query_string=query,
+        method=item["method"],
+        headers=headers,
+        json=item["body"] if item["body"] is not None else None,
+        base_url=base_url,
+        environ_base={"REMOTE_ADDR": remote_addr},
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    try:
+        with app.request_context(environ):
+            resp = app.full_dispatch_request()
+    except Exception as e:
+        return {"id": item["id"], "status": 500, "body": {"error": {"code": "INTERNAL_ERROR", "message": str(e), "details": []}}}, []
+
+    body = resp.get_json(silent=True) if resp.is_json else resp.get_data(as_text=True)
+    return {"id": item["id"], "status": resp.status_code, "body": body}, resp.headers.getlist("Set-Cookie")
+
+
+@bp.post("/batch")
+def batch():
+    """
+    POST /api/v1/batch
+    body: {"requests": [{"id": "me", "method": "GET", "path": "/api/v1/users/me"}, ...]}
+    回傳: {"results": [{"id": "me", "status": 200, "body": {...}}, ...]}（順序跟 requests 一樣）
+    """
+    data: Dict[str, Any] = request.get_json(silent=True) or {}
+    items, details = _validate(data.get("requests"))
+    if details:
+        return api_error(400, "VALIDATION_ERROR", "Invalid batch.", details)
+
+    app = current_app._get_current_object()
+    headers = {h: request.headers[h] for h in _FORWARD_HEADERS if h in request.headers}
+    base_url = request.host_url
+    remote_addr = request.remote_addr or ""
+
+    results: List[Any] = [None] * len(items)
+    cookies: List[str] = []
+    # JWT 整個 batch 只驗一次；每個 sub-request 各自從 pool 拿連線（pyodbc 連線不能同時給兩個 thread 用）
+    with shared_auth_decode():
+        get_optional_auth_user_id()  # 先驗一次，同時跑的 sub-request 直接拿結果
+        for phase in _phases(items):
+            outs = run_parallel(*(
+                (lambda it=items[i]: _dispatch(app, it, headers, base_url, remote_addr)) for i in phase
+            ))
+            for i, (result, set_cookies) in zip(phase, outs):
+                results[i] = result
+                cookies.extend(set_cookies)
+
+    resp = jsonify({"results": results})
+    for c in cookies:
+        resp.headers.add("Set-Cookie", c)
+    return resp, 200
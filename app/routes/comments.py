@@ -1,18 +1,47 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
 
 from flask import Blueprint, jsonify, request
 
 from ..auth_utils import get_optional_auth_user_id, require_auth_user_id
+from ..concurrency import fetch_all, fetch_one, run_parallel
 from ..config import Config
-from ..db import get_conn, tbl
+from ..db import get_conn, hours_ago_expr, insert_returning, now_expr, page_clause, tbl
 from ..errors import api_error
-from ..serializers import make_comment_json
+from ..serializers import dt_to_iso
+from ..hydrate import Hydrator, invalidate_posts
+from ..cache import COMMENTS_NAMESPACE, POST_SEARCH_NAMESPACE, cache
+from ..feed_cache import anon_feed_cache
+from ..pubsub import hub
+from ..trending import trending
+from ..pagination import counter, page_cursor, parse_cursor, parse_total_mode, split_page
+from .users import invalidate_profile_bundle
 
 
 bp = Blueprint("comments", __name__, url_prefix=Config.API_PREFIX)
 
+# DB 存的是沒有時區的 +08:00 時間（serializers.dt_to_iso 同一個假設）
+_DB_TZ = timezone(timedelta(hours=8))
+# 這個 process 上次清 tombstone 的時間（monotonic）
+_tombstone_pruned_at = 0.0
+
+
+def _prune_tombstones(cur) -> None:
+    # 刪留言時順手清過期的 tombstone（IX_comment_tombstone_time seek）；每個 process 最多隔一段時間做一次
+    global _tombstone_pruned_at
+    now = time.monotonic()
+    if now - _tombstone_pruned_at < Config.COMMENT_TOMBSTONE_PRUNE_SECONDS:
+        return
+    _tombstone_pruned_at = now
+    # 保留期限用 DB 的時鐘算：deleted_at 是 DB 寫的，跟 app server 的時鐘 / 時區無關
+    cur.execute(
+        f"DELETE FROM {tbl('comment_tombstone')} WHERE deleted_at < {hours_ago_expr()};",
+        (Config.COMMENT_TOMBSTONE_RETENTION_HOURS,),
+    )
+
 
 def _validate_comment_content(data: Dict[str, Any]) -> tuple[str, List[Dict[str, str]]]:
     content = (data.get("content") or "").strip()
@@ -47,46 +76,164 @@ def comments_list(post_id: int):
         page_size = 200
 
     offset = (page - 1) * page_size
+    total_mode, err = parse_total_mode(page)
+    if err:
+        return err
+    since, err = parse_cursor()
+    if err:
+        return err
+    updated_since, err = _parse_updated_since()
+    if err:
+        return err
 
     me = get_optional_auth_user_id()
-    me_for_case = me if me is not None else -1
 
-    try:
-        with get_conn() as conn:
-            cur = conn.cursor()
+    if since is not None or updated_since is not None:
+        return _comments_delta(post_id, me, since, updated_since, page_size)
 
-            # 先確認 post 存在
-            cur.execute(f"SELECT 1 FROM {tbl('post')} WHERE post_id = ?", (post_id,))
-            if not cur.fetchone():
-                return api_error(404, "NOT_FOUND", "Post not found.")
-
-            # total
-            cur.execute(f"SELECT COUNT(*) FROM {tbl('comment')} WHERE post_id = ?", (post_id,))
-            total = int(cur.fetchone()[0])
-
-            cur.execute(
-                f"""
-                SELECT
-                    c.comment_id, c.post_id, c.content, c.created_at, c.updated_at,
-                    u.user_id, u.user_name, u.profile_pic,
-                    CASE WHEN c.user_id = ? THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END AS editableByMe
-                FROM {tbl('comment')} c
-                JOIN {tbl('users')} u ON u.user_id = c.user_id
-                WHERE c.post_id = ?
-                ORDER BY c.created_at ASC, c.comment_id ASC
-                OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
-                """,
-                (me_for_case, post_id, offset, page_size),
-            )
+    try:
+        # 同一頁留言不分 viewer 共用（shared cache + single-flight），editableByMe 之後各自算
+        result = cache.get_or_load(
+            COMMENTS_NAMESPACE, f"{page}:{page_size}:{total_mode}",
+            lambda: _load_comments_page(post_id, offset, page_size, total_mode),
+            Config.COMMENTS_CACHE_TTL,
+            scope=post_id,
+        )
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
 
-            rows = cur.fetchall()
+    if result is None:
+        return api_error(404, "NOT_FOUND", "Post not found.")
+
+    items = result["items"]
+    for it in items:
+        it["editableByMe"] = me is not None and it["author"]["userId"] == me
+    return jsonify({
+        "items": items,
+        "total": result["total"],
+        "hasMore": result["hasMore"],
+        "page": page,
+        "pageSize": page_size,
+        "cursor": page_cursor(it["commentId"] for it in items),
+    }), 200
+
+
+# 不 JOIN users：作者由 Hydrator 一批撈（同一頁重複的作者只查一次，cache 命中就不查）
+_COMMENT_SELECT = f"""
+    SELECT c.comment_id, c.post_id, c.content, c.created_at, c.updated_at, c.user_id
+    FROM {tbl('comment')} c
+"""
+
+
+def _parse_updated_since():
+    """updatedSince=<ISO 8601>（通常就是上一次回應的 asOf）→ 跟 DB 一樣的 naive +08:00 datetime。"""
+    raw = (request.args.get("updatedSince") or "").strip()
+    if not raw:
+        return None, None
+    # query string 裡沒 encode 的 '+08:00' 會變成空白
+    raw = raw.replace(" ", "+") if "T" in raw else raw
+    try:
+        dt = datetime.fromisoformat(raw)
+    except ValueError:
+        return None, api_error(
+            400, "VALIDATION_ERROR", "Invalid updatedSince.", [{"field": "updatedSince", "reason": "invalid"}]
+        )
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(_DB_TZ).replace(tzinfo=None)
+    # 有沒有超過 tombstone 保留期限要跟 DB 的時鐘比，在 _comments_delta 跟其他查詢一起問
+    return dt, None
 
-        items = [make_comment_json(r) for r in rows]
-        return jsonify({"items": items, "total": total, "page": page, "pageSize": page_size}), 200
 
+def _comments_delta(post_id: int, me: Optional[int], since: Optional[int], updated_since: Optional[datetime], page_size: int):
+    """
+    增量輪詢（不走 cache：每個查詢都是 post_id + 一個範圍的 index seek，沒變化時回應只有幾十 bytes）
+    - sinceCursor ：comment_id > cursor 的新留言（舊 -> 新）
+    - updatedSince：updated_at >= 它的編輯、deleted_at >= 它的 tombstone（同一秒內可能重複回傳，client 覆蓋即可）
+    """
+    skip = lambda: []
+    try:
+        exists, expired, new_rows, edited_rows, deleted_rows = run_parallel(
+            lambda: fetch_one(f"SELECT 1 FROM {tbl('post')} WHERE post_id = ?", (post_id,)),
+            (lambda: fetch_one(
+                f"SELECT CASE WHEN ? < {hours_ago_expr()} THEN 1 ELSE 0 END;",
+                (updated_since, Config.COMMENT_TOMBSTONE_RETENTION_HOURS),
+            )[0]) if updated_since is not None else (lambda: 0),
+            (lambda: fetch_all(
+                _COMMENT_SELECT + f" WHERE c.post_id = ? AND c.comment_id > ? ORDER BY c.comment_id ASC {page_clause()};",
+                (post_id, since, 0, page_size + 1),
+            )) if since is not None else skip,
+            (lambda: fetch_all(
+                _COMMENT_SELECT + " WHERE c.post_id = ? AND c.updated_at >= ? ORDER BY c.updated_at ASC, c.comment_id ASC;",
+                (post_id, updated_since),
+            )) if updated_since is not None else skip,
+            (lambda: fetch_all(
+                f"SELECT comment_id, deleted_at FROM {tbl('comment_tombstone')} WHERE post_id = ? AND deleted_at >= ?;",
+                (post_id, updated_since),
+            )) if updated_since is not None else skip,
+        )
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
 
+    if exists is None:
+        return api_error(404, "NOT_FOUND", "Post not found.")
+    if expired:
+        # 比保留期限還舊：那之後的刪除可能已經清掉了，給不出完整的差異，請 client 整串重新載入
+        return api_error(
+            410, "RESYNC_REQUIRED", "updatedSince is older than the tombstone retention window.",
+            [{"field": "updatedSince", "reason": "expired"}],
+        )
+
+    new_rows, has_more = split_page(new_rows, page_size)
+    # sinceCursor 已經涵蓋的新留言不用在 updated 再給一次
+    seen = {int(r[0]) for r in new_rows}
+    edited_rows = [r for r in edited_rows if int(r[0]) not in seen]
+    hydrator = Hydrator()
+    items = hydrator.comment_items(new_rows, me)
+    updated = hydrator.comment_items(edited_rows, me)
+
+    payload: Dict[str, Any] = {
+        "items": items,
+        "cursor": page_cursor((it["commentId"] for it in items), since),
+        "hasMore": has_more,
+    }
+    if updated_since is not None:
+        # 下一次的 updatedSince：用 DB 寫進去的時間當水位線，不看 app server 的時鐘
+        marks = [r[4] for r in edited_rows] + [r[1] for r in deleted_rows]
+        payload["updated"] = updated
+        payload["deleted"] = [int(r[0]) for r in deleted_rows]
+        payload["asOf"] = dt_to_iso(max(marks, default=updated_since))
+    return jsonify(payload), 200
+
+
+def _load_comments_page(post_id: int, offset: int, page_size: int, total_mode: str):
+    """貼文不存在回 None；items 的 editableByMe 一律是 False。"""
+    # 存在檢查、COUNT、分頁互不相依：同時跑
+    exists, total, rows = run_parallel(
+        lambda: fetch_one(f"SELECT 1 FROM {tbl('post')} WHERE post_id = ?", (post_id,)),
+        counter(
+            total_mode, f"comments.post:{post_id}",
+            f"SELECT COUNT(*) FROM {tbl('comment')} WHERE post_id = ?", (post_id,),
+        ),
+        lambda: fetch_all(
+            _COMMENT_SELECT + f" WHERE c.post_id = ? ORDER BY c.created_at ASC, c.comment_id ASC {page_clause()};",
+            (post_id, offset, page_size + 1),
+        ),
+    )
+    if exists is None:
+        return None
+    rows, has_more = split_page(rows, page_size)
+
+    return {"items": Hydrator().comment_items(rows), "total": total, "hasMore": has_more}
+
+
+def invalidate_post_comments(post_id: int, count_changed: bool = True) -> None:
+    """留言寫入後：這篇的留言頁失效；新增 / 刪除還會改到 commentCount（feed、搜尋結果）。"""
+    cache.bump(COMMENTS_NAMESPACE, scope=post_id)
+    if count_changed:
+        invalidate_posts(post_id)
+        anon_feed_cache.invalidate()
+        cache.bump(POST_SEARCH_NAMESPACE)
+
 
 @bp.post("/posts/<int:post_id>/comments")
 def comments_create(post_id: int):
@@ -112,31 +259,20 @@ def comments_create(post_id: int):
                 return api_error(404, "NOT_FOUND", "Post not found.")
 
             cur.execute(
-                f"""
-                INSERT INTO {tbl('comment')}(user_id, post_id, content)
-                OUTPUT INSERTED.comment_id
-                VALUES (?, ?, ?);
-                """,
+                insert_returning(tbl('comment'), ["user_id", "post_id", "content"], "comment_id"),
                 (me, post_id, content),
             )
             new_comment_id = int(cur.fetchone()[0])
             conn.commit()
+            invalidate_post_comments(post_id)
+            hub.publish(post_id, comments_delta=1, comment_id=new_comment_id)
+            trending.on_comment(post_id)
+            invalidate_profile_bundle(me)
 
-            cur.execute(
-                f"""
-                SELECT
-                    c.comment_id, c.post_id, c.content, c.created_at, c.updated_at,
-                    u.user_id, u.user_name, u.profile_pic,
-                    CAST(1 AS bit) AS editableByMe
-                FROM {tbl('comment')} c
-                JOIN {tbl('users')} u ON u.user_id = c.user_id
-                WHERE c.comment_id = ?;
-                """,
-                (new_comment_id,),
-            )
+            cur.execute(_COMMENT_SELECT + " WHERE c.comment_id = ?;", (new_comment_id,))
             row = cur.fetchone()
 
-        return jsonify(make_comment_json(row)), 201
+        return jsonify(Hydrator().comment_items([row], me)[0]), 201
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
@@ -168,7 +304,17 @@ def comments_delete(comment_id: int):
                 f"DELETE FROM {tbl('comment')} WHERE comment_id = ? AND user_id = ?",
                 (comment_id, me),
             )
+            # 同一個 transaction 留 tombstone，updatedSince 輪詢才看得到這筆刪除
+            cur.execute(
+                f"INSERT INTO {tbl('comment_tombstone')}(comment_id, post_id) VALUES (?, ?);",
+                (comment_id, int(row[1])),
+            )
+            _prune_tombstones(cur)
             conn.commit()
+            invalidate_post_comments(int(row[1]))
+            hub.publish(int(row[1]), comments_delta=-1)
+            trending.on_uncomment(int(row[1]))
+            invalidate_profile_bundle(me)
 
         return jsonify({"deleted": True, "commentId": comment_id}), 200
 
@@ -194,7 +340,7 @@ def comments_edit(comment_id: int):
             cur = conn.cursor()
 
             cur.execute(
-                f"SELECT user_id FROM {tbl('comment')} WHERE comment_id = ?",
+                f"SELECT user_id, post_id FROM {tbl('comment')} WHERE comment_id = ?",
                 (comment_id,),
             )
             r = cur.fetchone()
@@ -206,26 +352,17 @@ def comments_edit(comment_id: int):
                 return api_error(403, "FORBIDDEN", "You can only edit your own comment.")
 
             cur.execute(
-                f"UPDATE {tbl('comment')} SET content = ?, updated_at = sysdatetime() WHERE comment_id = ?",
+                f"UPDATE {tbl('comment')} SET content = ?, updated_at = {now_expr()} WHERE comment_id = ?",
                 (content, comment_id),
             )
             conn.commit()
+            invalidate_post_comments(int(r[1]), count_changed=False)
+            invalidate_profile_bundle(me)
 
-            cur.execute(
-                f"""
-                SELECT
-                    c.comment_id, c.post_id, c.content, c.created_at, c.updated_at,
-                    u.user_id, u.user_name, u.profile_pic,
-                    CAST(1 AS bit) AS editableByMe
-                FROM {tbl('comment')} c
-                JOIN {tbl('users')} u ON u.user_id = c.user_id
-                WHERE c.comment_id = ?;
-                """,
-                (comment_id,),
-            )
+            cur.execute(_COMMENT_SELECT + " WHERE c.comment_id = ?;", (comment_id,))
             row = cur.fetchone()
 
-        return jsonify(make_comment_json(row)), 200
+        return jsonify(Hydrator().comment_items([row], me)[0]), 200
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
@@ -1,10 +1,18 @@
 from flask import Blueprint, jsonify, request
 
+from ..concurrency import fetch_all, fetch_one, gather_db, run_db, run_parallel
 from ..config import Config
-from ..db import get_conn, tbl
+from ..db import get_conn, page_clause, tbl
 from ..errors import api_error
+from ..follow_graph import follow_graph
+from ..suggestions import suggestions
+from ..autocomplete import user_names
+from ..pagination import counter, parse_total_mode, split_page
 from ..auth_utils import require_auth_user_id, get_optional_auth_user_id
+from ..queries import BULK_FOLLOW_INSERT, BULK_FOLLOW_STATUS, json_param
 from ..serializers import make_like_user_json
+from ..validators import parse_id_list
+from .users import invalidate_profile_bundle
 
 bp = Blueprint("follows", __name__, url_prefix=f"{Config.API_PREFIX}/follows")
 
@@ -13,6 +21,11 @@ def _ensure_user_exists(cur, user_id: int):
     cur.execute(f"SELECT 1 FROM {tbl('users')} WHERE user_id = ?", (user_id,))
     return cur.fetchone() is not None
 
+def _with_followed_by_me(rows, me):
+    """followedByMe 查記憶體裡的 follow graph（me 的追蹤名單載入一次），不再每列 EXISTS。"""
+    followed = follow_graph.followed_among(me, (int(r[0]) for r in rows)) if me is not None else set()
+    return [make_like_user_json((r[0], r[1], r[2], int(r[0]) in followed)) for r in rows]
+
 @bp.get("/<int:target_user_id>")
 def follow_status(target_user_id: int):
     """
@@ -22,25 +35,15 @@ def follow_status(target_user_id: int):
     me = get_optional_auth_user_id()
 
     try:
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             cur = conn.cursor()
 
             if not _ensure_user_exists(cur, target_user_id):
                 return api_error(404, "NOT_FOUND", "User not found.")
 
-            if me is None:
-                return jsonify({"userId": target_user_id, "followedByMe": False}), 200
-
-            cur.execute(
-                f"""
-                SELECT CASE WHEN EXISTS (
-                    SELECT 1 FROM {tbl('follow')}
-                    WHERE follower_id = ? AND followee_id = ?
-                ) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END
-                """,
-                (me, target_user_id),
-            )
-            followed = bool(cur.fetchone()[0])
+        if me is None:
+            return jsonify({"userId": target_user_id, "followedByMe": False}), 200
+        followed = follow_graph.follows(me, target_user_id)
 
         return jsonify({"userId": target_user_id, "followedByMe": followed}), 200
 
@@ -78,12 +81,65 @@ def follow_user(target_user_id: int):
                 (me, target_user_id),
             )
             conn.commit()
+            follow_graph.on_follow(me, target_user_id)
+            suggestions.on_follow(me, target_user_id)
+            user_names.on_follow(target_user_id)
+            invalidate_profile_bundle(me, target_user_id)
 
         return jsonify({"followed": True}), 201
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
 
+@bp.post("/bulk")
+def follow_users_bulk():
+    """
+    POST /api/v1/follows/bulk
+    body: {"userIds": [3, 5, 8]}（例如 onboarding 一次追蹤推薦名單）
+    回傳: {"results": [{"userId": 3, "status": "followed" | "already" | "not_found" | "invalid"}, ...]}
+    一個 transaction、固定三個 statement（查狀態、INSERT ... WHERE NOT EXISTS、commit），跟人數無關。
+    """
+    try:
+        me = require_auth_user_id()
+    except PermissionError:
+        return api_error(401, "UNAUTHORIZED", "Unauthorized.")
+
+    data = request.get_json(silent=True) or {}
+    ids, details = parse_id_list(data.get("userIds"), "userIds", Config.BULK_MAX_ITEMS)
+    if details:
+        return api_error(400, "VALIDATION_ERROR", "Invalid request body.", details)
+
+    try:
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute(BULK_FOLLOW_STATUS, (me, json_param(ids)))
+            followed = {int(r[0]): bool(r[1]) for r in cur.fetchall()}
+
+            # INSERT 回傳真的新增的那幾列：狀態查完之後別的 request 先追蹤了的不算（不然追蹤數會重複 +1）
+            cur.execute(BULK_FOLLOW_INSERT, (me, json_param(ids), me, me))
+            created = [int(r[0]) for r in cur.fetchall()]
+            conn.commit()
+
+        if created:
+            follow_graph.on_follow(me, *created)
+            suggestions.on_follow(me, *created)
+            user_names.on_follow(*created)
+            invalidate_profile_bundle(me, *created)
+
+        inserted = set(created)
+
+        def status(uid: int) -> str:
+            if uid == me:
+                return "invalid"
+            if uid not in followed:
+                return "not_found"
+            return "followed" if uid in inserted else "already"
+
+        return jsonify({"results": [{"userId": uid, "status": status(uid)} for uid in ids]}), 200
+
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
+
 @bp.delete("/<int:target_user_id>")
 def unfollow_user(target_user_id: int):
     try:
@@ -105,7 +161,14 @@ def unfollow_user(target_user_id: int):
                 f"DELETE FROM {tbl('follow')} WHERE follower_id=? AND followee_id=?",
                 (me, target_user_id),
             )
+            deleted = cur.rowcount
             conn.commit()
+            follow_graph.on_unfollow(me, target_user_id)
+            if deleted:
+                # 計數類的增量只在真的刪到時做（重複 unfollow 不能再扣一次）
+                suggestions.on_unfollow(me, target_user_id)
+                user_names.on_unfollow(target_user_id)
+            invalidate_profile_bundle(me, target_user_id)
 
         # idempotent：刪不到也當作已是 unfollow 狀態
         return jsonify({"followed": False}), 200
@@ -134,44 +197,41 @@ def following_list(user_id: int):
         page_size = 200
 
     offset = (page - 1) * page_size
+    total_mode, err = parse_total_mode(page)
+    if err:
+        return err
     me = get_optional_auth_user_id()
 
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-
-            cur.execute(
-                f"SELECT COUNT(*) FROM {tbl('follow')} WHERE follower_id = ?",
-                (user_id,),
-            )
-            total = int(cur.fetchone()[0])
-
-            cur.execute(
+        total, rows = run_parallel(
+            counter(
+                total_mode, f"following:{user_id}",
+                f"SELECT COUNT(*) FROM {tbl('follow')} WHERE follower_id = ?", (user_id,),
+            ),
+            lambda: fetch_all(
                 f"""
-                SELECT
-                    u.user_id, u.user_name, u.profile_pic,
-                    CASE WHEN EXISTS (
-                        SELECT 1 FROM {tbl('follow')} f2
-                        WHERE f2.follower_id = ? AND f2.followee_id = u.user_id
-                    ) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END AS followedByMe
+                SELECT u.user_id, u.user_name, u.profile_pic
                 FROM {tbl('follow')} f
                 JOIN {tbl('users')} u ON u.user_id = f.followee_id
                 WHERE f.follower_id = ?
                 ORDER BY u.user_name ASC
-                OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
+                {page_clause()};
                 """,
-                (me, user_id, offset, page_size),
-            )
-            rows = cur.fetchall()
+                (user_id, offset, page_size + 1),
+            ),
+        )
+        rows, has_more = split_page(rows, page_size)
 
-        items = [make_like_user_json(r) for r in rows]
-        return jsonify({"items": items, "total": total, "page": page, "pageSize": page_size}), 200
+        items = _with_followed_by_me(rows, me)
+        return jsonify(
+            {"items": items, "total": total, "hasMore": has_more, "page": page, "pageSize": page_size}
+        ), 200
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
     
 @bp.get("/<int:user_id>/followers")
-def followers_list(user_id: int):
+async def followers_list(user_id: int):
     """
     取得某個 user 的粉絲(追蹤他的人)列表
     GET /api/v1/follows/<user_id>/followers?page=1&pageSize=200
@@ -193,41 +253,39 @@ def followers_list(user_id: int):
         page_size = 200
 
     offset = (page - 1) * page_size
+    total_mode, err = parse_total_mode(page)
+    if err:
+        return err
     me = get_optional_auth_user_id()
 
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-
-            if not _ensure_user_exists(cur, user_id):
-                return api_error(404, "NOT_FOUND", "User not found.")
-
-            cur.execute(
-                f"SELECT COUNT(*) FROM {tbl('follow')} WHERE followee_id = ?",
-                (user_id,),
-            )
-            total = int(cur.fetchone()[0])
-
-            cur.execute(
+        # 存在檢查、COUNT、列表互不相依：同時送出，user 不存在時丟掉另外兩個結果
+        exists, total, rows = await gather_db(
+            lambda: fetch_one(f"SELECT 1 FROM {tbl('users')} WHERE user_id = ?", (user_id,)),
+            counter(
+                total_mode, f"followers:{user_id}",
+                f"SELECT COUNT(*) FROM {tbl('follow')} WHERE followee_id = ?", (user_id,),
+            ),
+            lambda: fetch_all(
                 f"""
-                SELECT
-                    u.user_id, u.user_name, u.profile_pic,
-                    CASE WHEN EXISTS (
-                        SELECT 1 FROM {tbl('follow')} f2
-                        WHERE f2.follower_id = ? AND f2.followee_id = u.user_id
-                    ) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END AS followedByMe
+                SELECT u.user_id, u.user_name, u.profile_pic
                 FROM {tbl('follow')} f
                 JOIN {tbl('users')} u ON u.user_id = f.follower_id
                 WHERE f.followee_id = ?
                 ORDER BY u.user_name ASC
-                OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
+                {page_clause()};
                 """,
-                (me, user_id, offset, page_size),
-            )
-            rows = cur.fetchall()
-
-        items = [make_like_user_json(r) for r in rows]
-        return jsonify({"items": items, "total": total, "page": page, "pageSize": page_size}), 200
+                (user_id, offset, page_size + 1),
+            ),
+        )
+        if exists is None:
+            return api_error(404, "NOT_FOUND", "User not found.")
+        rows, has_more = split_page(rows, page_size)
+
+        items = await run_db(_with_followed_by_me, rows, me)
+        return jsonify(
+            {"items": items, "total": total, "hasMore": has_more, "page": page, "pageSize": page_size}
+        ), 200
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
\ No newline at end of file
@@ -1,16 +1,102 @@
-from flask import Blueprint, current_app
+"""
+靜態頁面（index / profile / create）
+
+PAGES_EMBED_INITIAL_DATA=1 時，首頁和個人頁的 HTML 直接內嵌第一屏要用的資料
+（<script id="initialData" type="application/json">），app.js 讀到就不用再打第一個 API。
+
+- 資料來自跟 API 共用的快取：首頁 = 未登入 feed snapshot（bytes，不重新序列化），個人頁 = 不分 viewer 的 profile bundle
+- 打開頁面的 request 不帶 Authorization（token 在 localStorage），所以內嵌的一律是未登入版本；登入者由 app.js 補查
+- 組好的 HTML 以 gzip 存進 shared cache，key = sha1(模板 + 資料)；ETag = key（gzip 版再加 -gz），沒變就回 304
+- 查資料失敗就退回原本的靜態檔，頁面照樣能用
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import os
+from typing import Dict, Tuple
+
+from flask import Blueprint, Response, current_app, request
+
+from ..cache import PAGES_NAMESPACE, cache
+from ..config import Config
+from .posts import anon_feed_page
+from .users import PROFILE_BUNDLE_TABS, profile_bundle_base
 
 
 bp = Blueprint("pages", __name__)
+logger = logging.getLogger(__name__)
+
+# 模板讀一次就好：name -> (html bytes, sha1)
+_templates: Dict[str, Tuple[bytes, bytes]] = {}
+
+
+def _template(name: str) -> Tuple[bytes, bytes]:
+    tpl = _templates.get(name)
+    if tpl is None or current_app.debug:
+        with open(os.path.join(current_app.static_folder, name), "rb") as f:
+            html = f.read()
+        tpl = _templates[name] = (html, hashlib.sha1(html).digest())
+    return tpl
+
+
+def _embed(html: bytes, data: bytes) -> bytes:
+    # JSON 裡的 "<" 換成 \u003c：字串裡出現 </script> 也不會提早結束 script
+    script = b'<script id="initialData" type="application/json">' + data.replace(b"<", b"\\u003c") + b"</script>\n"
+    return html.replace(b"</head>", script + b"</head>", 1)
+
+
+def _render(name: str, data: bytes):
+    html, digest = _template(name)
+    key = hashlib.sha1(digest + data).hexdigest()
+    # gzip 跟未壓縮是兩個不同的 representation：strong ETag 要分開（-gz），不然 cache 會拿錯編碼回 304
+    gzipped = bool(request.accept_encodings["gzip"])
+    etag = key + "-gz" if gzipped else key
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        body = cache.fetch(
+            PAGES_NAMESPACE, key,
+            lambda: gzip.compress(_embed(html, data), compresslevel=6),
+            Config.PAGES_CACHE_TTL,
+        )
+        if gzipped:
+            resp = Response(body, mimetype="text/html")
+            resp.headers["Content-Encoding"] = "gzip"
+        else:
+            resp = Response(gzip.decompress(body), mimetype="text/html")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.vary.add("Accept-Encoding")
+    return resp
 
 
 @bp.get("/")
 def index():
-    return current_app.send_static_file("index.html")
+    if not Config.PAGES_EMBED_INITIAL_DATA:
+        return current_app.send_static_file("index.html")
+    try:
+        snap = anon_feed_page(1, Config.PAGES_FEED_PAGE_SIZE)
+        return _render("index.html", b'{"feed":' + snap.body + b"}")
+    except Exception:
+        logger.warning("initial data for index failed", exc_info=True)
+        return current_app.send_static_file("index.html")
 
 @bp.get("/u/<int:user_id>")
 def profile_page(user_id: int):
-    return current_app.send_static_file("profile.html")
+    if not Config.PAGES_EMBED_INITIAL_DATA:
+        return current_app.send_static_file("profile.html")
+    try:
+        bundle = profile_bundle_base(user_id, list(PROFILE_BUNDLE_TABS), Config.PAGES_PROFILE_PAGE_SIZE)
+        if bundle is None:
+            return current_app.send_static_file("profile.html")
+        bundle["viewer"] = {"isMe": False, "followedByMe": False}
+        data = current_app.json.dumps({"userId": user_id, "profileBundle": bundle}).encode("utf-8")
+        return _render("profile.html", data)
+    except Exception:
+        logger.warning("initial data for profile %s failed", user_id, exc_info=True)
+        return current_app.send_static_file("profile.html")
 
 @bp.get("/create")
 def create_page():
@@ -1,26 +1,80 @@
 from __future__ import annotations
 
 import difflib
+import hashlib
 import re
 
 from typing import Any, Dict, List, Optional
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 
 from ..auth_utils import get_optional_auth_user_id, require_auth_user_id
+from ..cache import COMMENTS_NAMESPACE, POST_SEARCH_NAMESPACE, cache
+from ..concurrency import fetch_all, fetch_one, gather_db, run_db, run_parallel
 from ..config import Config
-from ..db import get_conn, tbl
+from ..db import get_conn, insert_returning, page_clause, tbl
 from ..errors import api_error
+from ..feed_cache import anon_feed_cache
+from ..follow_graph import follow_graph
+from ..pubsub import hub
+from ..pagination import counter, page_cursor, parse_cursor, parse_ids, parse_total_mode, split_page
+from ..singleflight import flight_key, hot_reads
+from ..tags import parse_entities, tag_trie
+from ..trending import trending
+from ..hydrate import Hydrator, invalidate_posts, post_entity, viewer_liked_post_ids
+from ..queries import (
+    BULK_LIKE_COUNTERS,
+    BULK_LIKE_INSERT,
+    BULK_LIKE_STATUS,
+    POST_LIKES_BY_IDS,
+    POST_MENTIONS_INSERT,
+    POST_TAGS_INSERT,
+    POST_TAGS_OF_POST,
+    POSTS_BY_IDS,
+    POSTS_LIST_COUNT,
+    POSTS_LIST_PAGE,
+    POSTS_LIST_SINCE,
+    POSTS_SEARCH,
+    json_param,
+)
 from ..serializers import make_like_user_json, make_post_json
+from ..validators import parse_id_list
+from .users import invalidate_profile_bundle
 
 
 bp = Blueprint("posts", __name__, url_prefix=f"{Config.API_PREFIX}/posts")
 
 
+def _parse_author_ids(limit: int = 50) -> List[int]:
+    """authorIds=1,2,3 -> [1, 2, 3]（去重、保留順序、忽略壞掉的值）"""
+    raw_author_ids = (request.args.get("authorIds") or "").strip()
+    author_ids: List[int] = []
+    if raw_author_ids:
+        for part in raw_author_ids.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                author_ids.append(int(part))
+            except ValueError:
+                continue
+        # unique & keep order
+        seen = set()
+        author_ids = [x for x in author_ids if (x not in seen and not seen.add(x))]
+        author_ids = author_ids[:limit]
+    return author_ids
+
+
 @bp.get("")
 @bp.get("/")
-def posts_list():
+async def posts_list():
     # GET /api/v1/posts?page=1&pageSize=20
+    ids, err = parse_ids()
+    if err:
+        return err
+    if ids is not None:
+        return await _posts_multi_get(ids)
+
     try:
         page = int(request.args.get("page", 1))
         page_size = int(request.args.get("pageSize", 20))
@@ -35,87 +89,115 @@ def posts_list():
         page_size = 100
 
     offset = (page - 1) * page_size
+    total_mode, err = parse_total_mode(page)
+    if err:
+        return err
+
+    since, err = parse_cursor()
+    if err:
+        return err
 
     # optional filter: authorIds=1,2,3
-    raw_author_ids = (request.args.get("authorIds") or "").strip()
-    author_ids: List[int] = []
-    if raw_author_ids:
-        for part in raw_author_ids.split(','):
-            part = part.strip()
-            if not part:
-                continue
-            try:
-                author_ids.append(int(part))
-            except ValueError:
-                continue
-        # unique & keep order
-        seen = set()
-        author_ids = [x for x in author_ids if (x not in seen and not seen.add(x))]
-        author_ids = author_ids[:50]
+    author_ids = _parse_author_ids()
     me = get_optional_auth_user_id()
-    me_for_case = me if me is not None else -1
 
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-
-            if author_ids:
-                placeholders = ",".join(["?"] * len(author_ids))
-                cur.execute(f"SELECT COUNT(*) FROM {tbl('post')} WHERE user_id IN ({placeholders})", tuple(author_ids))
-            else:
-                cur.execute(f"SELECT COUNT(*) FROM {tbl('post')}")
-            total = int(cur.fetchone()[0])
-
-            # NOTE: commentCount 用 correlated subquery（小專案量級 OK）
-            base_select = f"""
-                SELECT
-                    p.post_id, p.picture, p.content, p.likes, p.created_at,
-                    u.user_id, u.user_name, u.profile_pic,
-                    {{LIKED_BY_ME}} AS likedByMe,
-                    (
-                        SELECT COUNT(*)
-                        FROM {tbl('comment')} c
-                        WHERE c.post_id = p.post_id
-                    ) AS commentCount
-                FROM {tbl('post')} p
-                JOIN {tbl('users')} u ON u.user_id = p.user_id
-            """
-
-            where_sql = ""
-            where_params: List[Any] = []
-            if author_ids:
-                where_sql = " WHERE p.user_id IN (" + ",".join(["?"] * len(author_ids)) + ") "
-                where_params.extend(author_ids)
-
-
+        if since is not None:
+            # 增量輪詢：只回 sinceCursor 之後的新貼文；hasMore=true 表示新的比 pageSize 還多，client 直接重抓第 1 頁
+            items, has_more = await run_db(_load_posts_since, me, author_ids, since, page_size)
+            return jsonify({
+                "items": items,
+                "cursor": page_cursor((it["postId"] for it in items), since),
+                "hasMore": has_more,
+            }), 200
+
+        # 沒有篩選的前幾頁：共用快照（未登入、total=exact 直接回 bytes，不碰 DB）
+        if not author_ids and anon_feed_cache.cacheable(page):
+            snap = await run_db(anon_feed_page, page, page_size)
+            if me is None and total_mode == "exact":
+                return Response(snap.body, status=200, mimetype="application/json")
+
+            payload = snap.payload
+            # 快照裡存的是 exact total；其他模式照 total 參數換掉，結果不會因為這頁剛好走快照而不同
+            if total_mode != "exact":
+                payload["total"] = await run_db(_posts_counter([], total_mode))
             if me is None:
-                sql = (
-                    base_select.replace("{LIKED_BY_ME}", "CAST(0 AS bit)")
-                    + where_sql
-                    + " ORDER BY p.created_at DESC OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;"
-                )
-                cur.execute(sql, tuple(where_params + [offset, page_size]))
-            else:
-                sql = (
-                    base_select.replace(
-                        "{LIKED_BY_ME}",
-                        f"CASE WHEN EXISTS (\n"
-                        f"    SELECT 1 FROM {tbl('likes')} l\n"
-                        f"    WHERE l.post_id = p.post_id AND l.user_id = ?\n"
-                        f") THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END",
-                    )
-                    + where_sql
-                    + " ORDER BY p.created_at DESC OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;"
-                )
-                cur.execute(sql, tuple([me_for_case] + where_params + [offset, page_size]))
+                return jsonify(payload), 200
+
+            # 登入者：快照只用來決定順序，貼文重新 hydrate（entity cache 按讚 / 留言時已逐篇失效，
+            # 自己剛按的讚 likes 數才會對；likedByMe 也一起算），不用為了每個讚整份快照失效
+            payload["items"] = await run_db(Hydrator().post_items, [it["postId"] for it in payload["items"]], me)
+            return jsonify(payload), 200
+
+        items, total, has_more = await _load_posts_page_async(me, author_ids, offset, page_size, total_mode)
+        return jsonify({
+            "items": items,
+            "page": page,
+            "pageSize": page_size,
+            "total": total,
+            "hasMore": has_more,
+            "cursor": page_cursor(it["postId"] for it in items),
+        }), 200
 
-            rows = cur.fetchall()
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
 
-        items = [make_post_json(r) for r in rows]
-        return jsonify({"items": items, "page": page, "pageSize": page_size, "total": total}), 200
 
+async def _posts_multi_get(ids: List[int]):
+    """
+    GET /api/v1/posts?ids=3,1,2
+    items 跟 ids 一一對應（不存在 / 已刪除是 null）；貼文、作者都走 entity cache，沒命中的各一個 IN 查詢。
+    """
+    me = get_optional_auth_user_id()
+    try:
+        items = await run_db(Hydrator().post_items, list(dict.fromkeys(ids)), me)
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
+    by_id = {it["postId"]: it for it in items}
+    return jsonify({"items": [by_id.get(i) for i in ids]}), 200
+
+
+def anon_feed_page(page: int, page_size: int):
+    """未登入首頁第 page 頁的共用快照（FeedSnapshot）；首頁 HTML 內嵌的初始資料也用這份。"""
+    offset = (page - 1) * page_size
+    return anon_feed_cache.get(page, page_size, lambda: _load_posts_page(None, [], offset, page_size, "exact"))
+
+
+def _posts_counter(author_ids: List[int], total_mode: str):
+    filters: List[Any] = [json_param(author_ids)] if author_ids else []
+    count_key = "posts:" + hashlib.sha1(json_param(author_ids).encode("utf-8")).hexdigest()
+    return counter(total_mode, count_key, POSTS_LIST_COUNT[bool(author_ids)], filters)
+
+
+def _posts_page_queries(author_ids: List[int], offset: int, page_size: int, total_mode: str):
+    # COUNT 跟分頁查詢互不相依：各用一條連線同時跑；分頁多抓一筆判斷 hasMore
+    filters: List[Any] = [json_param(author_ids)] if author_ids else []
+    return (
+        _posts_counter(author_ids, total_mode),
+        lambda: fetch_all(POSTS_LIST_PAGE[bool(author_ids)], filters + [offset, page_size + 1]),
+    )
+
+
+def _load_posts_page(me: Optional[int], author_ids: List[int], offset: int, page_size: int, total_mode: str):
+    total, rows = run_parallel(*_posts_page_queries(author_ids, offset, page_size, total_mode))
+    rows, has_more = split_page(rows, page_size)
+    return Hydrator().post_items([int(r[0]) for r in rows], me), total, has_more
+
+
+async def _load_posts_page_async(me: Optional[int], author_ids: List[int], offset: int, page_size: int, total_mode: str):
+    total, rows = await gather_db(*_posts_page_queries(author_ids, offset, page_size, total_mode))
+    rows, has_more = split_page(rows, page_size)
+    items = await run_db(Hydrator().post_items, [int(r[0]) for r in rows], me)
+    return items, total, has_more
+
+
+def _load_posts_since(me: Optional[int], author_ids: List[int], since: int, page_size: int):
+    params: List[Any] = [since]
+    if author_ids:
+        params.append(json_param(author_ids))
+    rows = fetch_all(POSTS_LIST_SINCE[bool(author_ids)], params + [0, page_size + 1])
+    rows, has_more = split_page(rows, page_size)
+    return Hydrator().post_items([int(r[0]) for r in rows], me), has_more
 
 # ===== post search (title + content, fuzzy match) =====
 def _norm(s: str) -> str:
@@ -140,6 +222,35 @@ def _best_match(query: str, text: str):
 
     return None
 
+@bp.get("/trending")
+def posts_trending():
+    """
+    熱門貼文
+    GET /api/v1/posts/trending?limit=20
+
+    回傳：{ items: [{...Post, trendingScore}] }，分數高的在前
+    排名來自記憶體裡的 top-K（app/trending.py，讚 / 留言即時加分、隨時間衰減），不掃 post 表；
+    只 hydrate 前 limit 篇。
+    """
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return api_error(400, "VALIDATION_ERROR", "Invalid limit.", [{"field": "limit", "reason": "invalid"}])
+    limit = max(1, min(limit, 100))
+    me = get_optional_auth_user_id()
+
+    try:
+        ranked = trending.top(limit)
+        items = Hydrator().post_items([pid for pid, _ in ranked], me)
+        scores = dict(ranked)
+        for it in items:
+            it["trendingScore"] = round(scores[it["postId"]], 4)
+        return jsonify({"items": items}), 200
+
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
+
+
 @bp.get("/search")
 def posts_search():
     """
@@ -166,23 +277,9 @@ def posts_search():
     follow_only = follow_only_raw in ("1", "true", "yes", "y", "on")
 
     # optional filter: authorIds=1,2,3 (沿用搜尋用戶後的行為，也可單獨用)
-    raw_author_ids = (request.args.get("authorIds") or "").strip()
-    author_ids: List[int] = []
-    if raw_author_ids:
-        for part in raw_author_ids.split(','):
-            part = part.strip()
-            if not part:
-                continue
-            try:
-                author_ids.append(int(part))
-            except ValueError:
-                continue
-        seen = set()
-        author_ids = [x for x in author_ids if (x not in seen and not seen.add(x))]
-        author_ids = author_ids[:50]
+    author_ids = _parse_author_ids()
 
     me = get_optional_auth_user_id()
-    me_for_case = me if me is not None else -1
 
     if not query:
         return jsonify({"items": [], "page": page, "pageSize": page_size, "total": 0, "query": ""}), 200
@@ -190,120 +287,73 @@ def posts_search():
     ql = _norm(query)
     tokens = [t for t in re.split(r"\s+", ql) if t][:6]
 
-    try:
-        with get_conn() as conn:
-            cur = conn.cursor()
+    use_follow = follow_only and me is not None
 
-            base_select = f"""
-                SELECT
-                    p.post_id, p.picture, p.content, p.likes, p.created_at,
-                    u.user_id, u.user_name, u.profile_pic,
-                    {{LIKED_BY_ME}} AS likedByMe,
-                    (
-                        SELECT COUNT(*)
-                        FROM {tbl('comment')} c
-                        WHERE c.post_id = p.post_id
-                    ) AS commentCount
-                FROM {tbl('post')} p
-                JOIN {tbl('users')} u ON u.user_id = p.user_id
-            """
-
-            where_parts: List[str] = []
-            params: List[Any] = []
-
-            if author_ids:
-                where_parts.append("p.user_id IN (" + ",".join(["?"] * len(author_ids)) + ")")
-                params.extend(author_ids)
-
-            if follow_only and me is not None:
-                # 自己 or 追蹤的人
-                where_parts.append(
-                    f"(p.user_id = ? OR EXISTS (SELECT 1 FROM {tbl('follow')} f WHERE f.follower_id = ? AND f.followee_id = p.user_id))"
-                )
-                params.extend([me, me])
-
-            # 粗篩：只用 content LIKE（title 是 content 的第一行）
-            like_parts: List[str] = []
-            like_params: List[str] = []
-            for t in tokens:
-                like_parts.append("LOWER(p.content) LIKE ?")
-                like_params.append(f"%{t}%")
-            if like_parts:
-                where_parts.append("(" + " OR ".join(like_parts) + ")")
-                params.extend(like_params)
-
-            where_sql = (" WHERE " + " AND ".join(where_parts)) if where_parts else ""
-
-            # 先用 LIKE 粗篩；若太少，fallback 抓最近貼文做 fuzzy
-            sql1 = (
-                base_select.replace("SELECT", "SELECT TOP 500", 1)
-                .replace("{LIKED_BY_ME}", "CAST(0 AS bit)" if me is None else
-                         f"CASE WHEN EXISTS (SELECT 1 FROM {tbl('likes')} l WHERE l.post_id = p.post_id AND l.user_id = ?) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END")
-                + where_sql
-                + " ORDER BY p.created_at DESC;"
+    try:
+        if use_follow:
+            ranked = _search_ranked(query, tokens, me, author_ids, use_follow)
+        else:
+            # 排序結果跟 viewer 無關 → 放 shared cache；likedByMe 之後只對這一頁補（followOnly 也一樣）
+            key = hashlib.sha1(json_param([ql, author_ids]).encode("utf-8")).hexdigest()
+            ranked = cache.get_or_load(
+                POST_SEARCH_NAMESPACE, key,
+                lambda: _search_ranked(query, tokens, None, author_ids, False),
+                Config.SEARCH_CACHE_TTL,
             )
 
-            if me is None:
-                cur.execute(sql1, tuple(params))
-            else:
-                cur.execute(sql1, tuple([me_for_case] + params))
-            rows = cur.fetchall()
-
-            # fallback：LIKE 找不到就抓最近 500 篇（仍套用 followOnly/authorIds）
-            if not rows:
-                where_parts2: List[str] = []
-                params2: List[Any] = []
-
-                if author_ids:
-                    where_parts2.append("p.user_id IN (" + ",".join(["?"] * len(author_ids)) + ")")
-                    params2.extend(author_ids)
-                if follow_only and me is not None:
-                    where_parts2.append(
-                        f"(p.user_id = ? OR EXISTS (SELECT 1 FROM {tbl('follow')} f WHERE f.follower_id = ? AND f.followee_id = p.user_id))"
-                    )
-                    params2.extend([me, me])
-                where_sql2 = (" WHERE " + " AND ".join(where_parts2)) if where_parts2 else ""
-
-                sql2 = (
-                    base_select.replace("SELECT", "SELECT TOP 500", 1)
-                    .replace("{LIKED_BY_ME}", "CAST(0 AS bit)" if me is None else
-                             f"CASE WHEN EXISTS (SELECT 1 FROM {tbl('likes')} l WHERE l.post_id = p.post_id AND l.user_id = ?) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END")
-                    + where_sql2
-                    + " ORDER BY p.created_at DESC;"
-                )
-                if me is None:
-                    cur.execute(sql2, tuple(params2))
-                else:
-                    cur.execute(sql2, tuple([me_for_case] + params2))
-                rows = cur.fetchall()
-
-        # Python 端做 fuzzy + relevance 排序
-        hits = []
-        for r in rows:
-            content = r[2] or ""
-            m = _best_match(query, content)
-            if not m:
-                continue
-            score, field, mtext = m
-            payload = make_post_json(r)
-            
-            # make_post_json 已含 title，但保險起見再覆蓋
-            payload["match"] = {"field": field, "text": mtext, "score": float(score)}
-            hits.append((float(score), r[4], payload))
-
-        # relevance desc, created_at desc
-        hits.sort(key=lambda x: (x[0], x[1]), reverse=True)
-        total = len(hits)
-
+        total = len(ranked)
         start = (page - 1) * page_size
         end = start + page_size
-        items = [x[2] for x in hits[start:end]]
+        items = ranked[start:end]
+
+        if me is not None:
+            liked = viewer_liked_post_ids(me, [it["postId"] for it in items])
+            for it in items:
+                it["likedByMe"] = it["postId"] in liked
 
         return jsonify({"items": items, "page": page, "pageSize": page_size, "total": total, "query": query}), 200
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
 
+
+def _search_ranked(query: str, tokens: List[str], me: Optional[int], author_ids: List[int], use_follow: bool):
+    """SQL 粗篩（id + created_at + content）+ Python fuzzy，命中的再 hydrate；回傳依 relevance 排好的全部 payload。"""
+    if use_follow:
+        # followOnly = 自己 + 追蹤的人（follow graph），跟 authorIds 取交集後就是一般的作者篩選
+        allowed = set(follow_graph.following(me))
+        allowed.add(me)
+        author_ids = [a for a in author_ids if a in allowed] if author_ids else sorted(allowed)
+        if not author_ids:
+            return []
+
+    filters: List[Any] = [json_param(author_ids)] if author_ids else []
+
+    # 先用 LIKE 粗篩；若太少，fallback 抓最近貼文做 fuzzy
+    patterns = [f"%{t}%" for t in tokens]
+    rows = fetch_all(POSTS_SEARCH[(bool(author_ids), True)], filters + [json_param(patterns)])
+
+    # fallback：LIKE 找不到就抓最近 500 篇（仍套用 followOnly/authorIds）
+    if not rows:
+        rows = fetch_all(POSTS_SEARCH[(bool(author_ids), False)], filters)
+
+    # Python 端做 fuzzy + relevance 排序
+    hits = []
+    for r in rows:
+        m = _best_match(query, r[2] or "")
+        if not m:
+            continue
+        score, field, mtext = m
+        hits.append((float(score), r[1], int(r[0]), {"field": field, "text": mtext, "score": float(score)}))
+
+    # relevance desc, created_at desc
+    hits.sort(key=lambda x: (x[0], x[1]), reverse=True)
+    matches = {h[2]: h[3] for h in hits}
+    items = Hydrator().post_items([h[2] for h in hits])
+    for it in items:
+        it["match"] = matches[it["postId"]]
+    return items
+
 @bp.post("")
 @bp.post("/")
 def posts_create():
@@ -331,32 +381,28 @@ def posts_create():
         with get_conn() as conn:
             cur = conn.cursor()
             cur.execute(
-                f"""
-                INSERT INTO {tbl('post')}(user_id, picture, content)
-                OUTPUT INSERTED.post_id
-                VALUES (?, ?, ?);
-                """,
+                insert_returning(tbl('post'), ["user_id", "picture", "content"], "post_id"),
                 (me, picture, content),
             )
             new_post_id = int(cur.fetchone()[0])
+            # #tag / @mention 同一個 transaction 寫進去（各一個 statement）
+            tags, mentions = parse_entities(content)
+            if tags:
+                cur.execute(POST_TAGS_INSERT, (new_post_id, json_param(tags)))
+            if mentions:
+                cur.execute(POST_MENTIONS_INSERT, (new_post_id, json_param(mentions), me))
             conn.commit()
+            tag_trie.add(tags)
+            anon_feed_cache.invalidate()
+            cache.bump(POST_SEARCH_NAMESPACE)
+            invalidate_profile_bundle(me)
 
-            cur.execute(
-                f"""
-                SELECT
-                    p.post_id, p.picture, p.content, p.likes, p.created_at,
-                    u.user_id, u.user_name, u.profile_pic,
-                    CAST(0 AS bit) AS likedByMe,
-                    CAST(0 AS int) AS commentCount
-                FROM {tbl('post')} p
-                JOIN {tbl('users')} u ON u.user_id = p.user_id
-                WHERE p.post_id = ?;
-                """,
-                (new_post_id,),
-            )
-            row = cur.fetchone()
+            # 剛寫入的貼文用同一條（primary）連線讀，不走 replica / cache
+            cur.execute(POSTS_BY_IDS, (json_param([new_post_id]),))
+            post = post_entity(cur.fetchone())
 
-        return jsonify(make_post_json(row)), 201
+        author = Hydrator().authors([me]).get(me)
+        return jsonify(make_post_json(post, author)), 201
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
@@ -382,9 +428,22 @@ def posts_delete(post_id: int):
             if author_id != me:
                 return api_error(403, "FORBIDDEN", "You can only delete your own post.")
 
+            # autocomplete 的篇數要扣掉這篇的 tag（post_tag 會跟著 cascade 刪掉）
+            cur.execute(POST_TAGS_OF_POST, (post_id,))
+            tags = [r[0] for r in cur.fetchall()]
+
             # 刪除貼文（你的 schema 已設 on delete cascade：likes/comment 會一起被刪）
             cur.execute(f"DELETE FROM {tbl('post')} WHERE post_id = ? AND user_id = ?", (post_id, me))
             conn.commit()
+            tag_trie.add(tags, -1)
+            anon_feed_cache.invalidate()
+            cache.bump(POST_SEARCH_NAMESPACE)
+            cache.bump(COMMENTS_NAMESPACE, scope=post_id)
+            invalidate_posts(post_id)
+            trending.on_delete(post_id)
+            hot_reads.forget("post_likes_preview", post_id=post_id)
+            # 別人的「按讚」「留言」分頁裡也可能有這篇
+            invalidate_profile_bundle()
 
         return jsonify({"deleted": True, "postId": post_id}), 200
 
@@ -428,6 +487,11 @@ def like_post(post_id: int):
             cur.execute(f"SELECT likes FROM {tbl('post')} WHERE post_id=?", (post_id,))
             likes_now = int(cur.fetchone()[0])
             conn.commit()
+            hot_reads.forget("post_likes_preview", post_id=post_id)
+            invalidate_posts(post_id)
+            hub.publish(post_id, likes=likes_now, likes_delta=1)
+            trending.on_like(post_id)
+            invalidate_profile_bundle(me)
 
         return jsonify({"liked": True, "likes": likes_now}), 200
 
@@ -471,6 +535,12 @@ def unlike_post(post_id: int):
             likes_now = int(r[0])
 
             conn.commit()
+            hot_reads.forget("post_likes_preview", post_id=post_id)
+            if deleted:
+                invalidate_posts(post_id)
+                hub.publish(post_id, likes=likes_now, likes_delta=-1)
+                trending.on_unlike(post_id)
+                invalidate_profile_bundle(me)
 
         return jsonify({"liked": False, "likes": likes_now}), 200
 
@@ -478,86 +548,155 @@ def unlike_post(post_id: int):
         return api_error(500, "INTERNAL_ERROR", str(e))
 
 
-@bp.get("/<int:post_id>/likes")
-def post_likes_list(post_id: int):
+@bp.post("/likes/bulk")
+def like_posts_bulk():
     """
-    用法：
-      - Hover 預覽：GET /api/v1/posts/<post_id>/likes?limit=8
-      - Modal 全部：GET /api/v1/posts/<post_id>/likes?page=1&pageSize=200
+    POST /api/v1/posts/likes/bulk
+    body: {"postIds": [3, 5, 8]}
+    回傳: {"results": [{"postId": 3, "status": "liked" | "already" | "not_found", "likes": 12}, ...]}
+    一個 transaction：查狀態、INSERT ... WHERE NOT EXISTS（回傳真的新增的 post_id）、一個 UPDATE 把那幾篇各 +1、讀回 likes。
     """
-    limit_q = request.args.get("limit")
+    try:
+        me = require_auth_user_id()
+    except PermissionError:
+        return api_error(401, "UNAUTHORIZED", "Unauthorized.")
+
+    data: Dict[str, Any] = request.get_json(silent=True) or {}
+    ids, details = parse_id_list(data.get("postIds"), "postIds", Config.BULK_MAX_ITEMS)
+    if details:
+        return api_error(400, "VALIDATION_ERROR", "Invalid request body.", details)
 
     try:
         with get_conn() as conn:
             cur = conn.cursor()
+            cur.execute(BULK_LIKE_STATUS, (me, json_param(ids)))
+            liked = {int(r[0]): bool(r[1]) for r in cur.fetchall()}
+            candidates = [pid for pid in ids if pid in liked and not liked[pid]]
+
+            # 只算 INSERT 真的新增的那幾篇：狀態查完到 INSERT 之間同一個人重送 / 另一個 request 先按了的不算
+            new_ids: List[int] = []
+            likes: Dict[int, int] = {}
+            if candidates:
+                cur.execute(BULK_LIKE_INSERT, (me, json_param(candidates), me))
+                new_ids = [int(r[0]) for r in cur.fetchall()]
+            if new_ids:
+                cur.execute(BULK_LIKE_COUNTERS, (json_param(new_ids),))
+            if liked:
+                cur.execute(POST_LIKES_BY_IDS, (json_param(list(liked)),))
+                likes = {int(r[0]): int(r[1]) for r in cur.fetchall()}
+            conn.commit()
 
-            cur.execute(f"SELECT 1 FROM {tbl('post')} WHERE post_id = ?", (post_id,))
-            if not cur.fetchone():
-                return api_error(404, "NOT_FOUND", "Post not found.")
+        if new_ids:
+            invalidate_posts(*new_ids)
+            trending.on_like(*new_ids)
+            invalidate_profile_bundle(me)
+            for pid in new_ids:
+                hot_reads.forget("post_likes_preview", post_id=pid)
+                hub.publish(pid, likes=likes.get(pid), likes_delta=1)
+
+        inserted = set(new_ids)
+        results = []
+        for pid in ids:
+            if pid not in liked:
+                results.append({"postId": pid, "status": "not_found", "likes": None})
+            else:
+                results.append({"postId": pid, "status": "liked" if pid in inserted else "already", "likes": likes.get(pid)})
+        return jsonify({"results": results}), 200
 
-            cur.execute(f"SELECT COUNT(*) FROM {tbl('likes')} WHERE post_id = ?", (post_id,))
-            total = int(cur.fetchone()[0])
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
 
-            if limit_q is not None:
-                try:
-                    limit = int(limit_q)
-                except ValueError:
-                    return api_error(400, "VALIDATION_ERROR", "Invalid limit.", [])
 
-                if limit < 1:
-                    limit = 8
-                if limit > 50:
-                    limit = 50
+def _load_post_likers(post_id: int, offset: int, size: int, total_mode: str = "exact"):
+    """回傳 (total, rows, hasMore)；貼文不存在回 None。三個查詢互不相依，同時跑。"""
+    exists, total, rows = run_parallel(
+        lambda: fetch_one(f"SELECT 1 FROM {tbl('post')} WHERE post_id = ?", (post_id,)),
+        counter(total_mode, f"likes.post:{post_id}", f"SELECT COUNT(*) FROM {tbl('likes')} WHERE post_id = ?", (post_id,)),
+        lambda: fetch_all(
+            f"""
+            SELECT u.user_id, u.user_name, u.profile_pic
+            FROM {tbl('likes')} l
+            JOIN {tbl('users')} u ON u.user_id = l.user_id
+            WHERE l.post_id = ?
+            ORDER BY u.user_name ASC
+            {page_clause()};
+            """,
+            (post_id, offset, size + 1),
+        ),
+    )
+    if exists is None:
+        return None
+    rows, has_more = split_page(rows, size)
+    return total, rows, has_more
 
-                cur.execute(
-                    f"""
-                    SELECT TOP (?) u.user_id, u.user_name, u.profile_pic
-                    FROM {tbl('likes')} l
-                    JOIN {tbl('users')} u ON u.user_id = l.user_id
-                    WHERE l.post_id = ?
-                    ORDER BY u.user_name ASC;
-                    """,
-                    (limit, post_id),
-                )
-                rows = cur.fetchall()
-                return (
-                    jsonify({"items": [make_like_user_json(r) for r in rows], "total": total, "limit": limit}),
-                    200,
-                )
 
-            try:
-                page = int(request.args.get("page", 1))
-                page_size = int(request.args.get("pageSize", 200))
-            except ValueError:
-                return api_error(400, "VALIDATION_ERROR", "Invalid pagination.", [])
+@bp.get("/<int:post_id>/likes")
+def post_likes_list(post_id: int):
+    """
+    用法：
+      - Hover 預覽：GET /api/v1/posts/<post_id>/likes?limit=8
+      - Modal 全部：GET /api/v1/posts/<post_id>/likes?page=1&pageSize=200
+    """
+    limit_q = request.args.get("limit")
 
-            if page < 1:
-                page = 1
-            if page_size < 1:
-                page_size = 50
-            if page_size > 200:
-                page_size = 200
+    if limit_q is not None:
+        try:
+            limit = int(limit_q)
+        except ValueError:
+            return api_error(400, "VALIDATION_ERROR", "Invalid limit.", [])
+
+        if limit < 1:
+            limit = 8
+        if limit > 50:
+            limit = 50
+
+        try:
+            # hover 預覽：同一篇貼文同時很多人在看，共用同一次查詢
+            preview = hot_reads.do(
+                flight_key("post_likes_preview", post_id=post_id, limit=limit),
+                lambda: _load_post_likers(post_id, 0, limit),
+            )
+        except Exception as e:
+            return api_error(500, "INTERNAL_ERROR", str(e))
 
-            offset = (page - 1) * page_size
+        if preview is None:
+            return api_error(404, "NOT_FOUND", "Post not found.")
+        total, rows, _ = preview
+        return (
+            jsonify({"items": [make_like_user_json(r) for r in rows], "total": total, "limit": limit}),
+            200,
+        )
 
-            cur.execute(
-                f"""
-                SELECT u.user_id, u.user_name, u.profile_pic
-                FROM {tbl('likes')} l
-                JOIN {tbl('users')} u ON u.user_id = l.user_id
-                WHERE l.post_id = ?
-                ORDER BY u.user_name ASC
-                OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
-                """,
-                (post_id, offset, page_size),
-            )
-            rows = cur.fetchall()
+    try:
+        page = int(request.args.get("page", 1))
+        page_size = int(request.args.get("pageSize", 200))
+    except ValueError:
+        return api_error(400, "VALIDATION_ERROR", "Invalid pagination.", [])
+
+    if page < 1:
+        page = 1
+    if page_size < 1:
+        page_size = 50
+    if page_size > 200:
+        page_size = 200
+
+    offset = (page - 1) * page_size
+    total_mode, err = parse_total_mode(page)
+    if err:
+        return err
+
+    try:
+        result = _load_post_likers(post_id, offset, page_size, total_mode)
+        if result is None:
+            return api_error(404, "NOT_FOUND", "Post not found.")
+        total, rows, has_more = result
 
         return (
             jsonify(
                 {
                     "items": [make_like_user_json(r) for r in rows],
                     "total": total,
+                    "hasMore": has_more,
                     "page": page,
                     "pageSize": page_size,
                 }
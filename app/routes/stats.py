@@ -0,0 +1,99 @@
+from flask import Blueprint, jsonify
+
+from ..autocomplete import user_names
+from ..cache import cache
+from ..config import Config
+from ..db import dialect, get_conn, replica_router
+from ..feed_cache import anon_feed_cache
+from ..follow_graph import follow_graph
+from ..pubsub import hub
+from ..queries import plan_cache_stats
+from ..singleflight import hot_reads
+from ..suggestions import suggestions
+from ..tags import tag_trie
+from ..trending import trending
+
+bp = Blueprint("stats", __name__, url_prefix=f"{Config.API_PREFIX}/stats")
+
+
+def _server_plan_cache_hit_ratio():
+    """SQL Server 自己的 plan cache 命中率（需要 VIEW SERVER STATE 權限，沒有就回 None）。"""
+    if dialect.name != "mssql":
+        return None
+    try:
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT
+                    MAX(CASE WHEN counter_name = 'Cache Hit Ratio' THEN cntr_value END),
+                    MAX(CASE WHEN counter_name = 'Cache Hit Ratio Base' THEN cntr_value END)
+                FROM sys.dm_os_performance_counters
+                WHERE object_name LIKE '%:Plan Cache%' AND instance_name = 'SQL Plans'
+                """
+            )
+            row = cur.fetchone()
+        if not row or not row[1]:
+            return None
+        return round(float(row[0]) / float(row[1]), 4)
+    except Exception:
+        return None
+
+
+@bp.get("/db")
+def stats_db():
+    """GET /api/v1/stats/db：statement 重用率、server plan cache 命中率、replica 狀態"""
+    return jsonify(
+        {
+            "backend": dialect.name,
+            "planCache": plan_cache_stats.snapshot(),
+            "serverPlanCacheHitRatio": _server_plan_cache_hit_ratio(),
+            "replicas": replica_router.status(),
+        }
+    ), 200
+
+
+@bp.get("/cache")
+def stats_cache():
+    """GET /api/v1/stats/cache：各種快取的命中率"""
+    return jsonify({
+        "shared": cache.stats(),
+        "anonFeed": anon_feed_cache.stats(),
+        "singleFlight": hot_reads.stats(),
+    }), 200
+
+
+@bp.get("/stream")
+def stats_stream():
+    """GET /api/v1/stats/stream：這個 process 的 SSE 連線數與推播量"""
+    return jsonify(hub.stats()), 200
+
+
+@bp.get("/follow-graph")
+def stats_follow_graph():
+    """GET /api/v1/stats/follow-graph：這個 process 的 follow graph 大小（bytes）與命中率"""
+    return jsonify(follow_graph.stats()), 200
+
+
+@bp.get("/suggestions")
+def stats_suggestions():
+    """GET /api/v1/stats/suggestions：這個 process 的背景佇列長度、重算 / 增量次數、命中率"""
+    return jsonify(suggestions.stats()), 200
+
+
+@bp.get("/trending")
+def stats_trending():
+    """GET /api/v1/stats/trending：這個 process 的 trending top-K 大小、還沒寫回 DB 的增量、flush 次數"""
+    return jsonify(trending.stats()), 200
+
+
+@bp.get("/tags")
+def stats_tags():
+    """GET /api/v1/stats/tags：這個 process 的 tag trie 大小（tag 數、節點數）與重新載入次數"""
+    return jsonify(tag_trie.stats()), 200
+
+
+@bp.get("/autocomplete")
+def stats_autocomplete():
+    """GET /api/v1/stats/autocomplete：這個 process 的 user name 索引大小、重新載入次數、短 prefix 結果命中數"""
+    return jsonify(user_names.stats()), 200
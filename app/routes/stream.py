@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import List
+
+from flask import Blueprint, Response, request
+
+from ..config import Config
+from ..errors import api_error
+from ..pubsub import hub, sse_event
+
+
+bp = Blueprint("stream", __name__, url_prefix=Config.API_PREFIX)
+
+
+def _parse_post_ids() -> List[int]:
+    """postIds=1,2,3 -> [1, 2, 3]（去重、忽略壞掉的值）"""
+    ids: List[int] = []
+    seen = set()
+    for part in (request.args.get("postIds") or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            pid = int(part)
+        except ValueError:
+            continue
+        if pid not in seen:
+            seen.add(pid)
+            ids.append(pid)
+    return ids
+
+
+@bp.get("/stream")
+def stream():
+    """
+    GET /api/v1/stream?postIds=1,2,3（Server-Sent Events）
+    訂閱畫面上的貼文，按讚數 / 留言數有變化時推 update；不需要登入，也不碰 DB。
+    """
+    post_ids = _parse_post_ids()
+    if not post_ids:
+        return api_error(400, "VALIDATION_ERROR", "postIds is required.", [{"field": "postIds", "reason": "required"}])
+    if len(post_ids) > Config.STREAM_MAX_POSTS:
+        return api_error(400, "VALIDATION_ERROR", "Too many postIds.", [{"field": "postIds", "reason": "too_many"}])
+
+    sub = hub.subscribe(post_ids)
+    if sub is None:
+        resp, status = api_error(503, "UNAVAILABLE", "Too many stream connections.")
+        resp.headers["Retry-After"] = "10"
+        return resp, status
+
+    flush = Config.STREAM_FLUSH_MS / 1000.0
+    heartbeat = Config.STREAM_HEARTBEAT_SECONDS
+
+    def generate():
+        try:
+            # retry：EventSource 斷線後隔幾毫秒重連
+            yield "retry: 3000\n\n" + sse_event("ready", json.dumps({"postIds": sorted(sub.post_ids)}))
+            # 連線活太久就結束，讓 client 自己 reconnect（gthread worker 的 thread 才會釋放出來）
+            deadline = time.monotonic() + Config.STREAM_MAX_SECONDS
+            seq = 0
+            while time.monotonic() < deadline:
+                changes = sub.wait(heartbeat)
+                if not changes:
+                    yield ": ping\n\n"
+                    continue
+                seq += 1
+                yield sse_event("update", json.dumps({"posts": changes}, separators=(",", ":")), seq)
+                # 送完先等一下，這段時間的變化合併成下一筆
+                time.sleep(flush)
+        finally:
+            hub.unsubscribe(sub)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
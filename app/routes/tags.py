@@ -0,0 +1,77 @@
+from flask import Blueprint, jsonify, request
+
+from ..auth_utils import get_optional_auth_user_id
+from ..concurrency import fetch_all
+from ..config import Config
+from ..errors import api_error
+from ..hydrate import Hydrator
+from ..pagination import parse_cursor, split_page
+from ..queries import TAG_POSTS_PAGE
+from ..tags import TAG_TRIE_TOP, normalize_tag, tag_trie
+
+bp = Blueprint("tags", __name__, url_prefix=f"{Config.API_PREFIX}/tags")
+
+# 沒帶 cursor = 從最新的開始（比任何 post_id 都大）
+_NO_CURSOR = 2**31 - 1
+
+
+@bp.get("/autocomplete")
+def tags_autocomplete():
+    """
+    GET /api/v1/tags/autocomplete?prefix=pyt&limit=10
+    回傳：{ items: [{ tag, posts }] }，篇數多的在前；查記憶體裡的 tag trie，不碰 DB
+    """
+    prefix = (request.args.get("prefix") or "").strip().lstrip("#").lower()
+    try:
+        limit = int(request.args.get("limit", TAG_TRIE_TOP))
+    except ValueError:
+        return api_error(400, "VALIDATION_ERROR", "Invalid limit.", [{"field": "limit", "reason": "invalid"}])
+    limit = max(1, min(limit, TAG_TRIE_TOP))
+
+    if not prefix:
+        return jsonify({"items": []}), 200
+
+    try:
+        items = [{"tag": tag, "posts": n} for tag, n in tag_trie.complete(prefix, limit)]
+        return jsonify({"items": items}), 200
+
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
+
+
+@bp.get("/<tag>/posts")
+def tag_posts(tag: str):
+    """
+    GET /api/v1/tags/<tag>/posts?cursor=<postId>&pageSize=20
+    帶某個 #tag 的貼文，新到舊；keyset 分頁：下一頁帶上一頁回的 nextCursor（post_tag 的 PK 一次 seek，不用 OFFSET）
+    回傳：{ tag, items: [Post], nextCursor, hasMore }
+    """
+    normalized = normalize_tag(tag)
+    if normalized is None:
+        return api_error(400, "VALIDATION_ERROR", "Invalid tag.", [{"field": "tag", "reason": "invalid"}])
+
+    before, err = parse_cursor("cursor")
+    if err:
+        return err
+    try:
+        page_size = int(request.args.get("pageSize", 20))
+    except ValueError:
+        return api_error(400, "VALIDATION_ERROR", "Invalid pagination.", [])
+    page_size = max(1, min(page_size, 100))
+
+    me = get_optional_auth_user_id()
+
+    try:
+        rows = fetch_all(TAG_POSTS_PAGE, (normalized, _NO_CURSOR if before is None else before, 0, page_size + 1))
+        rows, has_more = split_page(rows, page_size)
+        ids = [int(r[0]) for r in rows]
+        items = Hydrator().post_items(ids, me)
+        return jsonify({
+            "tag": normalized,
+            "items": items,
+            "nextCursor": str(ids[-1]) if has_more else None,
+            "hasMore": has_more,
+        }), 200
+
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
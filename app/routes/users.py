@@ -1,10 +1,18 @@
 from flask import Blueprint, jsonify, request
-from datetime import datetime, timedelta, timezone
 
 from ..errors import api_error
-from ..db import get_conn, tbl
+from ..db import get_conn, limit_clause, page_clause, tbl, top_clause
 from ..auth_utils import require_auth_user_id, get_optional_auth_user_id
-from ..serializers import make_user_json, make_comment_json, make_post_json
+from ..serializers import dt_to_iso, make_user_json
+from ..concurrency import fetch_all, fetch_one, run_parallel
+from ..pagination import counter, parse_ids, parse_total_mode, split_page
+from ..cache import COMMENTS_NAMESPACE, POST_SEARCH_NAMESPACE, PROFILE_BUNDLE_NAMESPACE, PROFILE_NAMESPACE, cache
+from ..feed_cache import anon_feed_cache
+from ..follow_graph import follow_graph
+from ..hydrate import Hydrator, viewer_liked_post_ids
+from ..suggestions import suggestions
+from ..autocomplete import PREFIX_MAX_LEN, TOP_K, user_names
+from datetime import datetime
 from typing import Any, Dict, List
 import difflib
 
@@ -99,7 +107,7 @@ def users_search():
         return jsonify({"items": []}), 200
 
     try:
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             cur = conn.cursor()
 
             # 先用 SQL 做粗篩（避免整張表搬回來）
@@ -107,41 +115,24 @@ def users_search():
             ql = _norm(query)
             like = f"%{ql}%"
 
-            if viewer is None:
-                cur.execute(
-                    f"""
-                    SELECT TOP 200 user_id, Email, user_name, bio, profile_pic, banner_pic
-                    FROM {tbl('users')}
-                    WHERE LOWER(user_name) LIKE ? OR LOWER(Email) LIKE ? OR LOWER(ISNULL(bio,'')) LIKE ?
-                    """,
-                    (like, like, like),
-                )
-                rows = cur.fetchall()
-            else:
-                cur.execute(
-                    f"""
-                    SELECT TOP 200
-                        u.user_id, u.Email, u.user_name, u.bio, u.profile_pic, u.banner_pic,
-                        CASE WHEN EXISTS (
-                            SELECT 1 FROM {tbl('follow')} f
-                            WHERE f.follower_id = ? AND f.followee_id = u.user_id
-                        ) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END AS followedByMe
-                    FROM {tbl('users')} u
-                    WHERE LOWER(u.user_name) LIKE ? OR LOWER(u.Email) LIKE ? OR LOWER(ISNULL(u.bio,'')) LIKE ?
-                    """,
-                    (viewer, like, like, like),
-                )
-                rows = cur.fetchall()
+            cur.execute(
+                f"""
+                SELECT {top_clause(200)} user_id, Email, user_name, bio, profile_pic, banner_pic
+                FROM {tbl('users')}
+                WHERE LOWER(user_name) LIKE ? OR LOWER(Email) LIKE ? OR LOWER(COALESCE(bio,'')) LIKE ?
+                {limit_clause(200)}
+                """,
+                (like, like, like),
+            )
+            rows = cur.fetchall()
+
+        # followedByMe 查記憶體裡的 follow graph，不再每列 EXISTS
+        followed = follow_graph.followed_among(viewer, (int(r[0]) for r in rows)) if viewer is not None else set()
 
         items = []
         for r in rows:
-            # viewer 有/無，欄位數不同
-            if viewer is None:
-                user_id, email, user_name, bio, profile_pic, banner_pic = r
-                followed_by_me = False
-            else:
-                user_id, email, user_name, bio, profile_pic, banner_pic, followed_by_me = r
-                followed_by_me = bool(followed_by_me)
+            user_id, email, user_name, bio, profile_pic, banner_pic = r
+            followed_by_me = int(user_id) in followed
 
             m = _best_match(query, user_name, email, bio)
             if not m:
@@ -161,6 +152,79 @@ def users_search():
         return api_error(500, "INTERNAL_ERROR", str(e))
 
 
+@bp.get("/suggestions")
+def users_suggestions():
+    """
+    你可能認識的人（朋友的朋友）
+    GET /api/v1/users/suggestions?limit=20
+
+    回傳：{ items: [{ userId, userName, profilePic, mutualCount }], computedAt, pending }
+    名單是背景算好的（app/suggestions.py），這裡只讀 cache；還沒算過時 pending = true、items 是空的，
+    稍後再打一次就有。算好之後才追蹤的人在這裡濾掉。
+    """
+    try:
+        me = require_auth_user_id()
+    except PermissionError:
+        return api_error(401, "UNAUTHORIZED", "Unauthorized.")
+
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return api_error(400, "VALIDATION_ERROR", "Invalid limit.", [{"field": "limit", "reason": "invalid"}])
+    limit = max(1, min(limit, Config.SUGGESTIONS_MAX))
+
+    try:
+        data = suggestions.get(me)
+        if data is None:
+            return jsonify({"items": [], "computedAt": None, "pending": True}), 200
+
+        entries = data["items"]
+        followed = follow_graph.followed_among(me, (it[0] for it in entries))
+        entries = [it for it in entries if it[0] not in followed and it[0] != me][:limit]
+        authors = Hydrator().authors(it[0] for it in entries)
+        items = [
+            dict(authors[uid], mutualCount=mutual)
+            for uid, mutual, _ in entries
+            if uid in authors
+        ]
+        computed_at = datetime.fromtimestamp(data["computedAt"])
+        return jsonify({"items": items, "computedAt": dt_to_iso(computed_at), "pending": False}), 200
+
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
+
+
+@bp.get("/autocomplete")
+def users_autocomplete():
+    """
+    打字提示（只比對 userName 開頭，不分大小寫）
+    GET /api/v1/users/autocomplete?prefix=am&limit=10
+
+    回傳：{ items: [{ userId, userName, followers }] }，追蹤者多的在前
+    查記憶體裡的名字索引（app/autocomplete.py），不碰 DB；完整搜尋還是用 /users/search。
+    """
+    prefix = (request.args.get("prefix") or "").strip()
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        return api_error(400, "VALIDATION_ERROR", "Invalid limit.", [{"field": "limit", "reason": "invalid"}])
+    limit = max(1, min(limit, TOP_K))
+
+    if not prefix:
+        return jsonify({"items": []}), 200
+    if len(prefix) > PREFIX_MAX_LEN:
+        return api_error(400, "VALIDATION_ERROR", "Invalid prefix.", [{"field": "prefix", "reason": "too_long"}])
+
+    try:
+        items = [
+            {"userId": uid, "userName": name, "followers": followers}
+            for uid, name, followers in user_names.complete(prefix, limit)
+        ]
+        return jsonify({"items": items}), 200
+
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
+
 
 @bp.get('/me')
 def users_me_get():
@@ -174,7 +238,7 @@ def users_me_get():
         return api_error(401, "UNAUTHORIZED", msg)
 
     try:
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             cur = conn.cursor()
             cur.execute(
                 f"SELECT user_id, Email, user_name, bio, profile_pic, banner_pic FROM {tbl('users')} WHERE user_id = ?",
@@ -237,6 +301,7 @@ def users_me_patch():
         with get_conn() as conn:
             cur = conn.cursor()
 
+            old_user_name = None
             if new_user_name is not None:
                 nu = new_user_name.strip()
                 cur.execute(
@@ -245,6 +310,10 @@ def users_me_patch():
                 )
                 if cur.fetchone():
                     return api_error(409, "CONFLICT", "UserName already used.", [{"field": "userName", "reason": "already_used"}])
+                # autocomplete 索引要用舊名字找到自己那一格
+                cur.execute(f"SELECT user_name FROM {tbl('users')} WHERE user_id = ?", (me,))
+                r = cur.fetchone()
+                old_user_name = r[0] if r else None
 
             fields = []
             params = []
@@ -267,6 +336,14 @@ def users_me_patch():
                 sql = f"UPDATE {tbl('users')} SET " + ", ".join(fields) + " WHERE user_id = ?"
                 cur.execute(sql, tuple(params))
                 conn.commit()
+                if old_user_name is not None and old_user_name != nu:
+                    user_names.on_rename(me, old_user_name, nu)
+                # 名字 / 頭像也出現在 feed、搜尋結果、留言裡
+                cache.bump(PROFILE_NAMESPACE, scope=me)
+                anon_feed_cache.invalidate()
+                cache.bump(POST_SEARCH_NAMESPACE)
+                cache.bump(COMMENTS_NAMESPACE)
+                invalidate_profile_bundle()
 
             cur.execute(
                 f"SELECT user_id, Email, user_name, bio, profile_pic, banner_pic FROM {tbl('users')} WHERE user_id = ?",
@@ -282,16 +359,43 @@ def users_me_patch():
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
 
+def _load_user_row(user_id: int):
+    with get_conn(readonly=True) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT user_id, Email, user_name, bio, profile_pic, banner_pic FROM {tbl('users')} WHERE user_id = ?",
+            (user_id,),
+        )
+        row = cur.fetchone()
+        return list(row) if row else None
+
+
+@bp.get("")
+@bp.get("/")
+def users_multi_get():
+    """
+    GET /api/v1/users?ids=3,1,2
+    items 跟 ids 一一對應（不存在是 null）；跟 GET /users/{id} 共用同一份 per-user cache，沒命中的一個 IN 查詢。
+    """
+    ids, err = parse_ids()
+    if err:
+        return err
+    if ids is None:
+        return api_error(400, "VALIDATION_ERROR", "ids is required.", [{"field": "ids", "reason": "required"}])
+
+    try:
+        rows = Hydrator().users(ids)
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
+    return jsonify({"items": [make_user_json(rows[i]) if i in rows else None for i in ids]}), 200
+
+
 @bp.get('<int:user_id>')
 def users_get(user_id: int):
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                f"SELECT user_id, Email, user_name, bio, profile_pic, banner_pic FROM {tbl('users')} WHERE user_id = ?",
-                (user_id,),
-            )
-            row = cur.fetchone()
+        row = cache.get_or_load(
+            PROFILE_NAMESPACE, "row", lambda: _load_user_row(user_id), Config.PROFILE_CACHE_TTL, scope=user_id
+        )
 
         if not row:
             return api_error(404, "NOT_FOUND", "User not found.")
@@ -319,143 +423,235 @@ def _parse_pagination(default_size: int = 20, max_size: int = 100):
     return page, page_size, offset, None
 
 
-def _dt_to_iso(dt: datetime | None) -> str:
-    tz = timezone(timedelta(hours=8))
-    if dt is None:
-        return datetime.now(tz).replace(microsecond=0).isoformat()
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=tz)
-    return dt.replace(microsecond=0).isoformat()
+# ===== 個人頁各分頁的 SQL：只回 id（+ 排序欄位），內容交給 Hydrator =====
+# 參數：user_id, offset, page_size
+_USER_POSTS_PAGE = f"""
+    SELECT p.post_id, p.created_at
+    FROM {tbl('post')} p
+    WHERE p.user_id = ?
+    ORDER BY p.created_at DESC
+    {page_clause()};
+    """
 
+# 沒有 likes 的 created_at，所以用 post.created_at 排序；參數同上
+_USER_LIKES_PAGE = f"""
+    SELECT p.post_id, p.created_at
+    FROM {tbl('likes')} l
+    JOIN {tbl('post')} p ON p.post_id = l.post_id
+    WHERE l.user_id = ?
+    ORDER BY p.created_at DESC
+    {page_clause()};
+    """
 
-@bp.get("/<int:user_id>/posts")
-def user_posts(user_id: int):
-    page, page_size, offset, err = _parse_pagination(default_size=20, max_size=100)
-    if err:
-        return err
+# 留言本身（沒有 entity cache）；所屬貼文的摘要跟作者另外 hydrate。參數同上
+_USER_COMMENTS_PAGE = f"""
+    SELECT c.comment_id, c.post_id, c.content, c.created_at, c.updated_at, c.user_id
+    FROM {tbl('comment')} c
+    WHERE c.user_id = ?
+    ORDER BY c.created_at DESC, c.comment_id DESC
+    {page_clause()};
+    """
 
-    viewer = get_optional_auth_user_id()
 
+def _user_comment_items(hydrator: Hydrator, rows, viewer) -> List[Dict[str, Any]]:
+    """留言 + 所屬貼文的摘要（讓前端能「查看貼文」）；貼文剛好被刪掉的略過。"""
+    posts = hydrator.posts(int(r[1]) for r in rows)
+    rows = [r for r in rows if int(r[1]) in posts]
+    authors = hydrator.authors(p["authorId"] for p in posts.values())
+    items = hydrator.comment_items(rows, viewer)
+    for c in items:
+        p = posts[c["postId"]]
+        c["post"] = {
+            "postId": p["postId"],
+            "content": p["content"],
+            "createdAt": p["createdAt"],
+            "author": authors.get(p["authorId"]) or {"userId": p["authorId"], "userName": None, "profilePic": None},
+        }
+    return items
+
+
+# ===== profile bundle：個人頁第一次畫面需要的全部資料 =====
+PROFILE_BUNDLE_TABS = ("posts", "likes", "comments")
+
+# 使用者 + 各種數量：一個 statement，每個子查詢都是 index seek
+_PROFILE_SUMMARY = f"""
+    SELECT
+        u.user_id, u.Email, u.user_name, u.bio, u.profile_pic, u.banner_pic,
+        (SELECT COUNT(*) FROM {tbl('post')} p WHERE p.user_id = u.user_id) AS posts,
+        (SELECT COUNT(*) FROM {tbl('follow')} f WHERE f.followee_id = u.user_id) AS followers,
+        (SELECT COUNT(*) FROM {tbl('follow')} f WHERE f.follower_id = u.user_id) AS following,
+        (SELECT COUNT(*) FROM {tbl('likes')} l WHERE l.user_id = u.user_id) AS likes,
+        (SELECT COUNT(*) FROM {tbl('comment')} c WHERE c.user_id = u.user_id) AS comments
+    FROM {tbl('users')} u
+    WHERE u.user_id = ?
+    """
+
+
+def invalidate_profile_bundle(*user_ids: int) -> None:
+    """寫入之後呼叫；不給 user_id = 全部失效（例如改名：名字出現在別人的分頁裡）。"""
+    if not user_ids:
+        cache.bump(PROFILE_BUNDLE_NAMESPACE)
+    for uid in user_ids:
+        cache.bump(PROFILE_BUNDLE_NAMESPACE, scope=uid)
+
+
+def _load_profile_bundle(user_id: int, tabs: List[str], page_size: int):
+    """不分 viewer 的部分（likedByMe / editableByMe 一律 False）；使用者不存在回 None。"""
+    size = page_size + 1
+    queries = {
+        "posts": lambda: fetch_all(_USER_POSTS_PAGE, (user_id, 0, size)),
+        "likes": lambda: fetch_all(_USER_LIKES_PAGE, (user_id, 0, size)),
+        "comments": lambda: fetch_all(_USER_COMMENTS_PAGE, (user_id, 0, size)),
+    }
+    summary, *pages = run_parallel(
+        lambda: fetch_one(_PROFILE_SUMMARY, (user_id,)),
+        *(queries[t] for t in tabs),
+    )
+    if summary is None:
+        return None
+
+    stats = {
+        "posts": int(summary[6]),
+        "followers": int(summary[7]),
+        "following": int(summary[8]),
+        "likes": int(summary[9]),
+        "comments": int(summary[10]),
+    }
+    # 三個分頁共用一個 Hydrator：同一篇貼文 / 同一個作者只查一次
+    hydrator = Hydrator()
+    out_tabs: Dict[str, Any] = {}
+    for tab, rows in zip(tabs, pages):
+        rows, has_more = split_page(rows, page_size)
+        if tab == "comments":
+            items = _user_comment_items(hydrator, rows, None)
+        else:
+            items = hydrator.post_items([int(r[0]) for r in rows])
+        out_tabs[tab] = {
+            "items": items,
+            "page": 1,
+            "pageSize": page_size,
+            "total": stats[tab],
+            "hasMore": has_more,
+        }
+    return {"user": make_user_json(summary[:6]), "stats": stats, "tabs": out_tabs}
+
+
+def profile_bundle_base(user_id: int, tabs: List[str], page_size: int):
+    """不分 viewer 的 bundle（shared cache）；個人頁 HTML 內嵌的初始資料也用這份。"""
+    return cache.get_or_load(
+        PROFILE_BUNDLE_NAMESPACE, f"{','.join(tabs)}:{page_size}",
+        lambda: _load_profile_bundle(user_id, tabs, page_size),
+        Config.PROFILE_BUNDLE_CACHE_TTL,
+        scope=user_id,
+    )
+
+
+@bp.get("/<int:user_id>/profile-bundle")
+def user_profile_bundle(user_id: int):
+    """
+    GET /api/v1/users/<user_id>/profile-bundle?tabs=posts,likes,comments&pageSize=20
+    個人資料 + 數量 + viewer 追蹤狀態 + 每個分頁的第 1 頁，一次回傳。
+    不分 viewer 的部分放 shared cache（未登入 = 直接回快取）；登入者另外查追蹤狀態和按過讚的 post_id。
+    """
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
+        page_size = int(request.args.get("pageSize", 20))
+    except ValueError:
+        return api_error(400, "VALIDATION_ERROR", "Invalid pagination.", [])
+    page_size = min(max(page_size, 1), 100)
 
-            # user exists?
-            cur.execute(f"SELECT 1 FROM {tbl('users')} WHERE user_id = ?", (user_id,))
-            if not cur.fetchone():
-                return api_error(404, "NOT_FOUND", "User not found.")
+    raw_tabs = (request.args.get("tabs") or ",".join(PROFILE_BUNDLE_TABS)).split(",")
+    tabs = [t for t in PROFILE_BUNDLE_TABS if t in {x.strip() for x in raw_tabs}]
+    if len(tabs) != len({x.strip() for x in raw_tabs if x.strip()}):
+        return api_error(400, "VALIDATION_ERROR", "Invalid tabs.", [{"field": "tabs", "reason": "invalid"}])
 
-            cur.execute(f"SELECT COUNT(*) FROM {tbl('post')} WHERE user_id = ?", (user_id,))
-            total = int(cur.fetchone()[0])
+    viewer = get_optional_auth_user_id()
 
-            if viewer is None:
-                cur.execute(
-                    f"""
-                    SELECT
-                        p.post_id, p.picture, p.content, p.likes, p.created_at,
-                        u.user_id, u.user_name, u.profile_pic,
-                        CAST(0 AS bit) AS likedByMe,
-                        (SELECT COUNT(*) FROM {tbl('comment')} c WHERE c.post_id = p.post_id) AS commentCount
-                    FROM {tbl('post')} p
-                    JOIN {tbl('users')} u ON u.user_id = p.user_id
-                    WHERE p.user_id = ?
-                    ORDER BY p.created_at DESC
-                    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
-                    """,
-                    (user_id, offset, page_size),
-                )
-            else:
-                cur.execute(
-                    f"""
-                    SELECT
-                        p.post_id, p.picture, p.content, p.likes, p.created_at,
-                        u.user_id, u.user_name, u.profile_pic,
-                        CASE WHEN EXISTS (
-                            SELECT 1 FROM {tbl('likes')} l
-                            WHERE l.post_id = p.post_id AND l.user_id = ?
-                        ) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END AS likedByMe,
-                        (SELECT COUNT(*) FROM {tbl('comment')} c WHERE c.post_id = p.post_id) AS commentCount
-                    FROM {tbl('post')} p
-                    JOIN {tbl('users')} u ON u.user_id = p.user_id
-                    WHERE p.user_id = ?
-                    ORDER BY p.created_at DESC
-                    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
-                    """,
-                    (viewer, user_id, offset, page_size),
-                )
+    try:
+        load = lambda: profile_bundle_base(user_id, tabs, page_size)
+        if viewer is None or viewer == user_id:
+            bundle, followed = load(), False
+        else:
+            bundle, followed = run_parallel(load, lambda: follow_graph.follows(viewer, user_id))
 
-            rows = cur.fetchall()
+        if bundle is None:
+            return api_error(404, "NOT_FOUND", "User not found.")
 
-        items = [make_post_json(r) for r in rows]
-        return jsonify({"items": items, "page": page, "pageSize": page_size, "total": total}), 200
+        if viewer is not None:
+            posts = [p for t in ("posts", "likes") for p in bundle["tabs"].get(t, {}).get("items", [])]
+            liked = viewer_liked_post_ids(viewer, {p["postId"] for p in posts})
+            for p in posts:
+                p["likedByMe"] = p["postId"] in liked
+            for c in bundle["tabs"].get("comments", {}).get("items", []):
+                c["editableByMe"] = viewer == user_id
+
+        bundle["viewer"] = {"isMe": viewer is not None and viewer == user_id, "followedByMe": followed}
+        return jsonify(bundle), 200
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
 
 
-@bp.get("/<int:user_id>/likes")
-def user_liked_posts(user_id: int):
+@bp.get("/<int:user_id>/posts")
+def user_posts(user_id: int):
     page, page_size, offset, err = _parse_pagination(default_size=20, max_size=100)
+    if err:
+        return err
+    total_mode, err = parse_total_mode(page)
     if err:
         return err
 
     viewer = get_optional_auth_user_id()
 
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
+        exists, total, rows = run_parallel(
+            lambda: fetch_one(f"SELECT 1 FROM {tbl('users')} WHERE user_id = ?", (user_id,)),
+            counter(
+                total_mode, f"user_posts:{user_id}",
+                f"SELECT COUNT(*) FROM {tbl('post')} WHERE user_id = ?", (user_id,),
+            ),
+            lambda: fetch_all(_USER_POSTS_PAGE, (user_id, offset, page_size + 1)),
+        )
+        if exists is None:
+            return api_error(404, "NOT_FOUND", "User not found.")
+        rows, has_more = split_page(rows, page_size)
 
-            # user exists?
-            cur.execute(f"SELECT 1 FROM {tbl('users')} WHERE user_id = ?", (user_id,))
-            if not cur.fetchone():
-                return api_error(404, "NOT_FOUND", "User not found.")
+        items = Hydrator().post_items([int(r[0]) for r in rows], viewer)
+        return jsonify(
+            {"items": items, "page": page, "pageSize": page_size, "total": total, "hasMore": has_more}
+        ), 200
 
-            cur.execute(f"SELECT COUNT(*) FROM {tbl('likes')} WHERE user_id = ?", (user_id,))
-            total = int(cur.fetchone()[0])
+    except Exception as e:
+        return api_error(500, "INTERNAL_ERROR", str(e))
 
-            # 沒有 likes 的 created_at，所以用 post.created_at 排序
-            if viewer is None:
-                cur.execute(
-                    f"""
-                    SELECT
-                        p.post_id, p.picture, p.content, p.likes, p.created_at,
-                        u.user_id, u.user_name, u.profile_pic,
-                        CAST(0 AS bit) AS likedByMe,
-                        (SELECT COUNT(*) FROM {tbl('comment')} c WHERE c.post_id = p.post_id) AS commentCount
-                    FROM {tbl('likes')} l
-                    JOIN {tbl('post')} p ON p.post_id = l.post_id
-                    JOIN {tbl('users')} u ON u.user_id = p.user_id
-                    WHERE l.user_id = ?
-                    ORDER BY p.created_at DESC
-                    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
-                    """,
-                    (user_id, offset, page_size),
-                )
-            else:
-                cur.execute(
-                    f"""
-                    SELECT
-                        p.post_id, p.picture, p.content, p.likes, p.created_at,
-                        u.user_id, u.user_name, u.profile_pic,
-                        CASE WHEN EXISTS (
-                            SELECT 1 FROM {tbl('likes')} l2
-                            WHERE l2.post_id = p.post_id AND l2.user_id = ?
-                        ) THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END AS likedByMe,
-                        (SELECT COUNT(*) FROM {tbl('comment')} c WHERE c.post_id = p.post_id) AS commentCount
-                    FROM {tbl('likes')} l
-                    JOIN {tbl('post')} p ON p.post_id = l.post_id
-                    JOIN {tbl('users')} u ON u.user_id = p.user_id
-                    WHERE l.user_id = ?
-                    ORDER BY p.created_at DESC
-                    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
-                    """,
-                    (viewer, user_id, offset, page_size),
-                )
 
-            rows = cur.fetchall()
+@bp.get("/<int:user_id>/likes")
+def user_liked_posts(user_id: int):
+    page, page_size, offset, err = _parse_pagination(default_size=20, max_size=100)
+    if err:
+        return err
+    total_mode, err = parse_total_mode(page)
+    if err:
+        return err
 
-        items = [make_post_json(r) for r in rows]
-        return jsonify({"items": items, "page": page, "pageSize": page_size, "total": total}), 200
+    viewer = get_optional_auth_user_id()
+
+    try:
+        exists, total, rows = run_parallel(
+            lambda: fetch_one(f"SELECT 1 FROM {tbl('users')} WHERE user_id = ?", (user_id,)),
+            counter(
+                total_mode, f"user_likes:{user_id}",
+                f"SELECT COUNT(*) FROM {tbl('likes')} WHERE user_id = ?", (user_id,),
+            ),
+            lambda: fetch_all(_USER_LIKES_PAGE, (user_id, offset, page_size + 1)),
+        )
+        if exists is None:
+            return api_error(404, "NOT_FOUND", "User not found.")
+        rows, has_more = split_page(rows, page_size)
+
+        items = Hydrator().post_items([int(r[0]) for r in rows], viewer)
+        return jsonify(
+            {"items": items, "page": page, "pageSize": page_size, "total": total, "hasMore": has_more}
+        ), 200
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
@@ -464,65 +660,32 @@ def user_liked_posts(user_id: int):
 @bp.get("/<int:user_id>/comments")
 def user_comments(user_id: int):
     page, page_size, offset, err = _parse_pagination(default_size=50, max_size=200)
+    if err:
+        return err
+    total_mode, err = parse_total_mode(page)
     if err:
         return err
 
     viewer = get_optional_auth_user_id()
 
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-
-            # user exists?
-            cur.execute(f"SELECT 1 FROM {tbl('users')} WHERE user_id = ?", (user_id,))
-            if not cur.fetchone():
-                return api_error(404, "NOT_FOUND", "User not found.")
-
-            cur.execute(f"SELECT COUNT(*) FROM {tbl('comment')} WHERE user_id = ?", (user_id,))
-            total = int(cur.fetchone()[0])
+        exists, total, rows = run_parallel(
+            lambda: fetch_one(f"SELECT 1 FROM {tbl('users')} WHERE user_id = ?", (user_id,)),
+            counter(
+                total_mode, f"user_comments:{user_id}",
+                f"SELECT COUNT(*) FROM {tbl('comment')} WHERE user_id = ?", (user_id,),
+            ),
+            lambda: fetch_all(_USER_COMMENTS_PAGE, (user_id, offset, page_size + 1)),
+        )
+        if exists is None:
+            return api_error(404, "NOT_FOUND", "User not found.")
+        rows, has_more = split_page(rows, page_size)
 
-            # 回傳：comment + 所屬 post 的摘要（讓前端能「查看貼文」）
-            cur.execute(
-                f"""
-                SELECT
-                    c.comment_id, c.post_id, c.content, c.created_at, c.updated_at,
-                    au.user_id, au.user_name, au.profile_pic,
-                    CASE WHEN ? IS NOT NULL AND c.user_id = ? THEN CAST(1 AS bit) ELSE CAST(0 AS bit) END AS editableByMe,
-
-                    p.content AS post_content,
-                    p.created_at AS post_created_at,
-                    pu.user_id AS post_author_id,
-                    pu.user_name AS post_author_name,
-                    pu.profile_pic AS post_author_pic
-                FROM {tbl('comment')} c
-                JOIN {tbl('users')} au ON au.user_id = c.user_id
-                JOIN {tbl('post')} p ON p.post_id = c.post_id
-                JOIN {tbl('users')} pu ON pu.user_id = p.user_id
-                WHERE c.user_id = ?
-                ORDER BY c.created_at DESC, c.comment_id DESC
-                OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
-                """,
-                (viewer, viewer, user_id, offset, page_size),
-            )
-            rows = cur.fetchall()
+        items = _user_comment_items(Hydrator(), rows, viewer)
 
-        items = []
-        for r in rows:
-            # 前 9 欄符合 make_comment_json
-            c = make_comment_json(r[:9])
-            c["post"] = {
-                "postId": int(r[1]),
-                "content": (r[9] or ""),
-                "createdAt": _dt_to_iso(r[10]),
-                "author": {
-                    "userId": int(r[11]),
-                    "userName": r[12],
-                    "profilePic": r[13],
-                },
-            }
-            items.append(c)
-
-        return jsonify({"items": items, "page": page, "pageSize": page_size, "total": total}), 200
+        return jsonify(
+            {"items": items, "page": page, "pageSize": page_size, "total": total, "hasMore": has_more}
+        ), 200
 
     except Exception as e:
         return api_error(500, "INTERNAL_ERROR", str(e))
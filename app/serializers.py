@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 def now_iso8601() -> str:
     # 合約說 ISO 8601；這裡用 +08:00
@@ -29,27 +29,26 @@ def make_user_json(row: Tuple[Any, ...]) -> Dict[str, Any]:
         "createdAt": now_iso8601(),
     }
 
-def make_post_json(row) -> dict:
-    # row: post_id, picture, content, likes, created_at, author_id, author_name, author_pic,
-    #      (optional) likedByMe, (optional) commentCount
-    liked = bool(row[8]) if len(row) >= 9 else False
-    comment_count = int(row[9]) if len(row) >= 10 and row[9] is not None else 0
-
-    content = row[2] or ""
+def make_author_json(row) -> Dict[str, Any]:
+    # row: users entity（同 make_user_json）；貼文 / 留言裡只放這三個欄位
+    return {
+        "userId": int(row[0]),
+        "userName": row[2],
+        "profilePic": row[4],
+    }
 
+def make_post_json(post: Dict[str, Any], author: Optional[Dict[str, Any]], liked: bool = False) -> dict:
+    # post: hydrate.py 的貼文 entity（postId, picture, content, likes, createdAt, authorId, commentCount）
+    # author: make_author_json（使用者剛好被刪掉時是 None）
     return {
-        "postId": int(row[0]),
-        "author": {
-            "userId": int(row[5]),
-            "userName": row[6],
-            "profilePic": row[7],
-        },
-        "picture": row[1],
-        "content": content,
-        "likes": int(row[3] or 0),
-        "createdAt": dt_to_iso(row[4]),
+        "postId": post["postId"],
+        "author": author or {"userId": post["authorId"], "userName": None, "profilePic": None},
+        "picture": post["picture"],
+        "content": post["content"],
+        "likes": post["likes"],
+        "createdAt": post["createdAt"],
         "likedByMe": liked,
-        "commentCount": comment_count,
+        "commentCount": post["commentCount"],
     }
     
 def make_like_user_json(row) -> Dict[str, Any]:
@@ -67,10 +66,9 @@ def make_like_user_json(row) -> Dict[str, Any]:
     return payload
 
 
-def make_comment_json(row) -> Dict[str, Any]:
-    # row: comment_id, post_id, content, created_at, updated_at, author_id, author_name, author_pic, (optional) editableByMe
-    can_edit = bool(row[8]) if len(row) >= 9 else False
-    updated_at = row[4] if len(row) >= 5 else None
+def make_comment_json(row, author: Optional[Dict[str, Any]], editable: bool = False) -> Dict[str, Any]:
+    # row: comment_id, post_id, content, created_at, updated_at, author_id
+    updated_at = row[4]
     edited = updated_at is not None
 
     return {
@@ -80,10 +78,6 @@ def make_comment_json(row) -> Dict[str, Any]:
         "createdAt": dt_to_iso(row[3]),
         "updatedAt": dt_to_iso(updated_at) if updated_at is not None else None,
         "edited": edited,
-        "author": {
-            "userId": int(row[5]),
-            "userName": row[6],
-            "profilePic": row[7],
-        },
-        "editableByMe": can_edit,
+        "author": author or {"userId": int(row[5]), "userName": None, "profilePic": None},
+        "editableByMe": editable,
     }
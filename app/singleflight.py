@@ -0,0 +1,116 @@
+"""
+Single-flight：同一個 key 同時只跑一次 DB 查詢，其他 request 等它的結果
+
+熱門貼文爆紅時，幾百個 request 同時打同一個 hover 預覽 / 留言第一頁 / 使用者資料，
+原本每個都開連線跑一樣的 SQL；現在只有第一個（leader）去查，其他人共用結果。
+查完的結果還會保留 max_stale 秒，期間的新 request 也直接拿（這就是允許的最大延遲）。
+
+共用的結果會被多個 request 同時讀取，呼叫端不要修改它（要改就先 copy）。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .config import Config
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "done_at")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done_at = 0.0
+
+
+class SingleFlight:
+    def __init__(self, max_stale: float = 0.0, max_recent: int = 4096):
+        self.max_stale = max_stale
+        self.max_recent = max_recent
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._recent: "OrderedDict[Hashable, _Call]" = OrderedDict()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], max_stale: Optional[float] = None) -> Any:
+        stale = self.max_stale if max_stale is None else max_stale
+        with self._lock:
+            recent = self._recent.get(key)
+            if recent is not None:
+                if time.monotonic() - recent.done_at <= stale:
+                    self.shared += 1
+                    return recent.result
+                del self._recent[key]
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._inflight[key] = call
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            call.done_at = time.monotonic()
+            with self._lock:
+                self._inflight.pop(key, None)
+                # 失敗的結果不留
+                if call.error is None and stale > 0:
+                    self._recent[key] = call
+                    self._recent.move_to_end(key)
+                    while len(self._recent) > self.max_recent:
+                        self._recent.popitem(last=False)
+            call.event.set()
+        return call.result
+
+    def forget(self, endpoint: str, **params: Any) -> None:
+        """
+        寫入後呼叫：丟掉 endpoint 底下、參數包含 params 的舊結果，
+        例如 forget("comments_list", post_id=3) 會清掉那篇貼文所有分頁。
+        """
+        wanted = set(params.items())
+        with self._lock:
+            for key in [k for k in self._recent if k[0] == endpoint and wanted <= set(k[1:])]:
+                del self._recent[key]
+
+    def reset(self) -> None:
+        """fork 之後呼叫：lock 可能在 fork 當下被別的 thread 拿著，整個重建。"""
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._recent = OrderedDict()
+        self.leaders = 0
+        self.shared = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.shared
+        return {
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "shareRate": round(self.shared / total, 4) if total else None,
+            "inFlight": len(self._inflight),
+        }
+
+
+def flight_key(endpoint: str, **params: Any) -> Hashable:
+    """endpoint + 參數（排序後）當 key，參數順序不同也會是同一個 key。"""
+    return (endpoint,) + tuple(sorted(params.items()))
+
+
+hot_reads = SingleFlight(max_stale=Config.SINGLEFLIGHT_MAX_STALE_MS / 1000.0)
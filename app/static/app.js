@@ -18,6 +18,23 @@ const API = {
 };
 
 
+// =========================
+// Initial data（HTML 內嵌的第一屏資料，伺服器開 PAGES_EMBED_INITIAL_DATA 才會有）
+// =========================
+let initialData;
+
+function takeInitialData(key){
+  if (initialData === undefined){
+    const el = document.getElementById("initialData");
+    try{ initialData = el ? JSON.parse(el.textContent) : {}; }catch{ initialData = {}; }
+  }
+  // 只用一次：之後重新載入一律打 API
+  const v = initialData[key] ?? null;
+  delete initialData[key];
+  return v;
+}
+
+
 // =========================
 // Global state (in-memory)
 // =========================
@@ -380,6 +397,18 @@ async function apiFetch(path, options = {}){
   return data;
 }
 
+// 多個 API 合成一個 request（POST /api/v1/batch）；回傳 [{ id, status, body }]，順序同 requests
+async function apiBatch(requests, { _retry = false } = {}){
+  const data = await apiFetch("/api/v1/batch", { method: "POST", body: JSON.stringify({ requests }) });
+  const results = data?.results || [];
+
+  // 外層 request 不需要登入，token 過期只會反映在 sub-request 的 401
+  if (!_retry && getSession()?.accessToken && results.some(r => r.status === 401)){
+    if (await refreshAccessToken()) return await apiBatch(requests, { _retry: true });
+  }
+  return results;
+}
+
 // ===== my following list (for Home "追蹤" feed) =====
 async function ensureMyFollowingSet({ force = false } = {}){
   const meId = getMeId();
@@ -412,6 +441,7 @@ async function ensureMyFollowingSet({ force = false } = {}){
       all = all.concat(items);
 
       if (items.length === 0) break;
+      if (data.hasMore === false) break;
       if (total && all.length >= total) break;
 
       page += 1;
@@ -706,28 +736,151 @@ async function uploadImageIfNeeded(){
 async function loadPosts(opts = {}){
   try{
     const authorIds = (opts?.authorIds || "").trim();
-    const qs = authorIds ? `?page=1&pageSize=50&authorIds=${encodeURIComponent(authorIds)}` : "?page=1&pageSize=50";
+    // feed 不顯示總數：total=none 省掉 COUNT(*)
+    const qs = authorIds ? `?page=1&pageSize=50&total=none&authorIds=${encodeURIComponent(authorIds)}` : "?page=1&pageSize=50&total=none";
+
+    // 第一次載入先用 HTML 內嵌的 feed（未登入版本）；登入者畫完再照常查一次（likedByMe）
+    const embedded = authorIds ? null : takeInitialData("feed");
+    if (embedded){
+      await showPosts(embedded);
+      if (!getSession()?.accessToken) return;
+    }
+
     const data = await apiFetch(API.posts + qs, { method:"GET" });
-    postsCache = Array.isArray(data) ? data : (data.items || []);
+    await showPosts(data);
+  }catch(e){
+  }
+}
 
-    postsCache.sort((a,b)=>{
-      const ta = new Date(a.createdAt || a.time || 0).getTime();
-      const tb = new Date(b.createdAt || b.time || 0).getTime();
-      return tb - ta;
-    });
+async function showPosts(data){
+  postsCache = Array.isArray(data) ? data : (data.items || []);
 
-    // 整批更新後把 hover 快取清掉
-    likesPreviewCache.clear();
-    likesHoverState = { postId: null, isOpen: false };
-    hideLikesPopover();
+  postsCache.sort((a,b)=>{
+    const ta = new Date(a.createdAt || a.time || 0).getTime();
+    const tb = new Date(b.createdAt || b.time || 0).getTime();
+    return tb - ta;
+  });
+
+  // 整批更新後把 hover 快取清掉
+  likesPreviewCache.clear();
+  likesHoverState = { postId: null, isOpen: false };
+  hideLikesPopover();
+
+  // 若目前在主頁「追蹤」分頁，先確保追蹤名單已載入
+  if (homeFeedMode === "following" && getMeId()){
+    try{ await ensureMyFollowingSet({ force: false }); }catch{}
+  }
+
+  renderFeed();
+  syncLiveUpdates();
+}
+
+// =========================
+// Live counts (SSE: /api/v1/stream)
+// 預設關閉，使用者按「即時更新」才訂閱：每條 SSE 連線在伺服器上佔一個 thread，
+// 伺服器連線滿了（503）就改成每 LIVE_POLL_MS 輪詢一次 GET /posts?ids=
+// =========================
+const LIVE_STREAM_MAX_POSTS = 200;
+const LIVE_POLL_MS = 30000;
+const LIVE_UPDATES_KEY = "miniig_live_updates";
+let liveStream = null;
+let livePollTimer = null;
+
+function liveUpdatesEnabled(){
+  try{ return localStorage.getItem(LIVE_UPDATES_KEY) === "1"; }catch{ return false; }
+}
+
+function updateLiveToggleUI(){
+  const btn = $("liveToggleBtn");
+  if (!btn) return;
+  const on = liveUpdatesEnabled();
+  btn.classList.toggle("primary", on);
+  btn.textContent = !on ? "即時更新：關" : (livePollTimer ? "即時更新：輪詢" : "即時更新：開");
+}
+
+function toggleLiveUpdates(){
+  try{ localStorage.setItem(LIVE_UPDATES_KEY, liveUpdatesEnabled() ? "0" : "1"); }catch{}
+  syncLiveUpdates();
+}
+
+function liveIds(){
+  return (postsCache || []).map(p => p.postId).filter(Boolean).slice(0, LIVE_STREAM_MAX_POSTS);
+}
+
+function closeLiveUpdates(){
+  if (liveStream){ liveStream.close(); liveStream = null; }
+  if (livePollTimer){ clearInterval(livePollTimer); livePollTimer = null; }
+}
 
-    // 若目前在主頁「追蹤」分頁，先確保追蹤名單已載入
-    if (homeFeedMode === "following" && getMeId()){
-      try{ await ensureMyFollowingSet({ force: false }); }catch{}
+function syncLiveUpdates(){
+  closeLiveUpdates();
+  const ids = liveIds();
+  if (liveUpdatesEnabled() && ids.length){
+    if (typeof EventSource === "undefined") startLivePolling();
+    else openLiveStream(ids);
+  }
+  updateLiveToggleUI();
+}
+
+function openLiveStream(ids){
+  // 伺服器定期結束連線時 EventSource 會自己重連；回 503（連線滿了）時 EventSource 直接關掉，改輪詢
+  liveStream = new EventSource(`/api/v1/stream?postIds=${ids.join(",")}`);
+  liveStream.addEventListener("update", (ev) => {
+    let data;
+    try{ data = JSON.parse(ev.data); }catch{ return; }
+    (data.posts || []).forEach(applyLiveUpdate);
+  });
+  liveStream.addEventListener("error", () => {
+    if (liveStream && liveStream.readyState === EventSource.CLOSED){
+      liveStream = null;
+      startLivePolling();
+      updateLiveToggleUI();
     }
+  });
+}
 
-    renderFeed();
-  }catch(e){
+function startLivePolling(){
+  if (livePollTimer) return;
+  livePollTimer = setInterval(pollLiveCounts, LIVE_POLL_MS);
+}
+
+async function pollLiveCounts(){
+  const ids = liveIds();
+  if (!ids.length || document.hidden) return;
+  try{
+    const data = await apiFetch(`${API.posts}?ids=${ids.join(",")}`, { method:"GET" });
+    (data.items || []).forEach(it => {
+      if (!it) return;
+      const p = (postsCache || []).find(x => x.postId === it.postId);
+      if (!p) return;
+      const delta = Number(it.commentCount ?? 0) - Number(p.commentCount ?? 0);
+      applyLiveUpdate({ postId: it.postId, likes: it.likes, commentsDelta: delta, newCommentIds: [] });
+    });
+  }catch{}
+}
+
+function applyLiveUpdate(u){
+  const postId = Number(u.postId);
+  const p = (postsCache || []).find(x => x.postId === postId);
+  if (!p) return;
+
+  if (u.likes !== null && u.likes !== undefined && u.likes !== p.likes){
+    p.likes = u.likes;
+    invalidateLikesPreview(postId);
+    const el = document.querySelector(`.likesLink[data-post-id="${postId}"]`);
+    if (el) el.textContent = `likes: ${p.likes}`;
+  }
+
+  if (u.commentsDelta || (u.newCommentIds || []).length){
+    invalidateComments(postId);
+    if (commentsOpenSet.has(postId)){
+      // 留言區開著：重抓（自己剛送出的留言也會推回來，重抓才不會重複算）
+      loadComments(postId, { force: true }).catch(()=>{});
+    }else if (u.commentsDelta){
+      p.commentCount = Math.max(0, Number(p.commentCount ?? 0) + Number(u.commentsDelta));
+      const btn = document.getElementById(`commentsToggleBtn-${postId}`);
+      if (btn) btn.textContent = `💬 留言 (${p.commentCount})`;
+    }
   }
 }
 
@@ -1112,6 +1265,7 @@ async function loadAllLikesIntoModal(postId){
     all = all.concat(items);
 
     if (items.length === 0) break;
+    if (data.hasMore === false) break;
     if (total && all.length >= total) break;
 
     page += 1;
@@ -2196,8 +2350,7 @@ function initFollowingUi(){
             const meId = Number(getSession()?.user?.userId || 0);
             const profileUserId = Number(getProfileUserIdFromUrl() || 0);
             if (meId && profileUserId && meId === profileUserId){
-              await updateFollowingBtnCount(profileUserId);
-              await updateFollowersBtnCount(profileUserId);
+              await updateProfileFollowCounts(profileUserId);
             }
           }catch(err){
             alert(`操作失敗：${err.message}`);
@@ -2365,6 +2518,7 @@ async function loadFollowersIntoModal(userId){
     total = data.total ?? total;
     all = all.concat(items);
     if (items.length === 0) break;
+    if (data.hasMore === false) break;
     if (total && all.length >= total) break;
     page += 1;
     if (page > 200) break;
@@ -2415,6 +2569,7 @@ async function loadFollowingIntoModal(userId){
     all = all.concat(items);
 
     if (items.length === 0) break;
+    if (data.hasMore === false) break;
     if (total && all.length >= total) break;
 
     page += 1;
@@ -2427,6 +2582,32 @@ async function loadFollowingIntoModal(userId){
     : `<div class="msg" style="display:block;">目前沒有追蹤任何人</div>`;
 }
 
+// 追蹤名單 / 粉絲兩個數字一起更新（一個 batch request）
+async function updateProfileFollowCounts(userId){
+  const followingBtn = $("profileFollowingBtn");
+  const followersBtn = $("profileFollowersBtn");
+  if (!userId) return;
+
+  let byId = {};
+  try{
+    byId = Object.fromEntries((await apiBatch([
+      { id: "following", path: `${API.follows}/${userId}/following?page=1&pageSize=1` },
+      { id: "followers", path: `${API.follows}/${userId}/followers?page=1&pageSize=1` },
+    ])).map(r => [r.id, r]));
+  }catch{}
+
+  if (followingBtn){
+    followingBtn.textContent = byId.following?.status === 200
+      ? `追蹤名單 (${Number(byId.following.body?.total ?? 0)})`
+      : "追蹤名單";
+  }
+  if (followersBtn){
+    followersBtn.textContent = byId.followers?.status === 200
+      ? `粉絲 (${Number(byId.followers.body?.total ?? 0)})`
+      : "粉絲";
+  }
+}
+
 async function updateFollowingBtnCount(userId){
   const btn = $("profileFollowingBtn");
   if (!btn || !userId) return;
@@ -2881,11 +3062,21 @@ function initAuth(){
 let profileUser = null;
 let profileUserId = 0;
 
+// profile-bundle 順便帶回來的各分頁第一頁；每個分頁只用一次，之後切換照常重抓
+const PROFILE_TAB_PAGE_SIZE = 50;
+let profileTabPrefetch = {};
+
+function takeProfileTabPrefetch(tab){
+  const data = profileTabPrefetch[tab];
+  delete profileTabPrefetch[tab];
+  return data || null;
+}
+
 async function fetchUserPosts(userId){
-  return await apiFetch(`${API.users}/${userId}/posts?page=1&pageSize=50`, { method:"GET" });
+  return await apiFetch(`${API.users}/${userId}/posts?page=1&pageSize=${PROFILE_TAB_PAGE_SIZE}`, { method:"GET" });
 }
 async function fetchUserLikes(userId){
-  return await apiFetch(`${API.users}/${userId}/likes?page=1&pageSize=50`, { method:"GET" });
+  return await apiFetch(`${API.users}/${userId}/likes?page=1&pageSize=${PROFILE_TAB_PAGE_SIZE}`, { method:"GET" });
 }
 async function fetchUserComments(userId){
   return await apiFetch(`${API.users}/${userId}/comments?page=1&pageSize=100`, { method:"GET" });
@@ -3121,21 +3312,23 @@ async function loadProfileTab(tab){
   setProfileTab(tab);
 
   if (tab === "posts"){
-    const data = await fetchUserPosts(profileUserId);
+    const data = takeProfileTabPrefetch("posts") || await fetchUserPosts(profileUserId);
     postsCache = data.items || [];
     renderFeed(); // 沿用你的貼文渲染 + likes/comment 功能
     return;
   }
 
   if (tab === "likes"){
-    const data = await fetchUserLikes(profileUserId);
+    const data = takeProfileTabPrefetch("likes") || await fetchUserLikes(profileUserId);
     postsCache = data.items || [];
     renderFeed();
     return;
   }
 
   if (tab === "comments"){
-    const data = await fetchUserComments(profileUserId);
+    // 留言分頁一次顯示 100 則：bundle 的第一頁不夠就重抓
+    const pre = takeProfileTabPrefetch("comments");
+    const data = (pre && !pre.hasMore) ? pre : await fetchUserComments(profileUserId);
     const list = data.items || [];
     const box = document.getElementById("profileCommentsList");
     if (!box) return;
@@ -3230,14 +3423,27 @@ async function initProfile(){
   }
 
   try{
-    profileUser = await apiFetch(`${API.users}/${profileUserId}`, { method:"GET" });
+    // 個人資料、數量、追蹤狀態、各分頁第一頁：一個 request 拿齊
+    // HTML 內嵌的是未登入版本：登入者要 likedByMe / 追蹤狀態，還是打 API
+    const embedded = takeInitialData("profileBundle");
+    const bundle = (embedded && Number(embedded.user?.userId) === profileUserId && !getSession()?.accessToken)
+      ? embedded
+      : await apiFetch(`${API.users}/${profileUserId}/profile-bundle?pageSize=${PROFILE_TAB_PAGE_SIZE}`, { method:"GET" });
+    profileTabPrefetch = bundle.tabs || {};
+    profileUser = bundle.user;
     renderProfileHeader(profileUser);
 
     // follow / following list (profile)
     initProfileFollowUi(profileUserId);
+    if (getMeId()){
+      setFollowStatusCache(profileUserId, bundle.viewer?.followedByMe);
+    }
     await syncProfileFollowState(profileUserId);
-    await updateFollowingBtnCount(profileUserId);
-    await updateFollowersBtnCount(profileUserId);
+
+    const followingBtn = $("profileFollowingBtn");
+    if (followingBtn) followingBtn.textContent = `追蹤名單 (${Number(bundle.stats?.following ?? 0)})`;
+    const followersBtn = $("profileFollowersBtn");
+    if (followersBtn) followersBtn.textContent = `粉絲 (${Number(bundle.stats?.followers ?? 0)})`;
 
     // tabs
     document.getElementById("profileTabPosts")?.addEventListener("click", () => loadProfileTab("posts"));
@@ -0,0 +1,229 @@
+"""
+People you may know（GET /users/suggestions）
+
+朋友的朋友（我追蹤的人追蹤了誰）在大的 graph 上一次要掃幾萬條邊，不能在 request 裡算：
+- 背景 thread（每個 worker 一個，第一次用到才啟動）替「活躍的使用者」預先算好，存進 shared cache
+  （SUGGESTIONS namespace，scope = user_id），所有 worker 共用；request 只讀那一份
+- 活躍 = 登入、打 /users/suggestions、follow / unfollow 的人；沒算過或超過 SUGGESTIONS_REFRESH_SECONDS 就排進佇列
+- follow / unfollow 不重算，只在背景增量修改自己那一份：新追蹤的人追蹤的那些 mutual +1（取消追蹤 -1），
+  被追蹤的人本身移出名單；用的是 follow graph 裡那個人的追蹤名單（通常已經在記憶體裡）
+  間接影響（我的追隨者的候選人）不處理，等他們下次重算
+- 排序：mutual × (1 + 最近活動加權)，最近活動 = 最後一篇貼文，每 7 天權重減半
+
+存的格式：{"computedAt": epoch 秒, "items": [[user_id, mutual, lastActive epoch 秒 | null], ...]}（已排序）
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .cache import SUGGESTIONS_NAMESPACE, cache
+from .concurrency import fetch_all
+from .config import Config
+from .follow_graph import follow_graph
+from .queries import SUGGESTION_CANDIDATE_LIMIT, SUGGESTION_CANDIDATES, USERS_LAST_ACTIVE, json_param
+
+logger = logging.getLogger(__name__)
+
+SUGGESTIONS_KEY = "list"
+ACTIVITY_HALF_LIFE_DAYS = 7.0
+
+
+def _epoch(value: Any) -> Optional[float]:
+    # MAX(created_at) 在 SQLite 是字串（沒有 decltype 不會轉 datetime）；DB 存的是 server 當地時間
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def score(mutual: int, last_active: Optional[float], now: float) -> float:
+    if last_active is None:
+        return float(mutual)
+    age_days = max(now - last_active, 0.0) / 86400.0
+    return mutual * (1.0 + 0.5 ** (age_days / ACTIVITY_HALF_LIFE_DAYS))
+
+
+def _ranked(items: Iterable[List[Any]], limit: int, now: float) -> List[List[Any]]:
+    return sorted(items, key=lambda it: (-score(it[1], it[2], now), it[0]))[:limit]
+
+
+class SuggestionEngine:
+    def __init__(self, max_items: int, ttl: float, refresh: float, queue_max: int):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.refresh = refresh
+        self.queue_max = queue_max
+        self.reset()
+
+    def reset(self) -> None:
+        """fork 之後呼叫：thread 不會跟著 fork 過來，佇列也清掉。"""
+        self._cond = threading.Condition()
+        # 要重算的人（去重，照排入順序）；follow 事件另外一個佇列（照順序套用）
+        self._pending: "OrderedDict[int, None]" = OrderedDict()
+        self._events: Deque[Tuple[str, int, Tuple[int, ...]]] = deque()
+        self._thread: Optional[threading.Thread] = None
+        self.computed = 0
+        self.patched = 0
+        self.dropped = 0
+        self.errors = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ===== serving =====
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """算好的那一份（沒有回 None，同時排進背景佇列）；太舊的照樣回傳，背景重算。"""
+        data = cache.get(SUGGESTIONS_NAMESPACE, SUGGESTIONS_KEY, scope=user_id)
+        if data is None:
+            self.misses += 1
+            self.request(user_id)
+            return None
+        self.hits += 1
+        if time.time() - data["computedAt"] > self.refresh:
+            self.request(user_id)
+        return data
+
+    def warm(self, user_id: int) -> None:
+        """登入時呼叫：沒有或太舊就排進佇列，第一次打開推薦時已經算好。"""
+        data = cache.get(SUGGESTIONS_NAMESPACE, SUGGESTIONS_KEY, scope=user_id)
+        if data is None or time.time() - data["computedAt"] > self.refresh:
+            self.request(user_id)
+
+    # ===== background =====
+    def request(self, user_id: int) -> None:
+        with self._cond:
+            if user_id in self._pending:
+                return
+            if len(self._pending) >= self.queue_max:
+                self.dropped += 1
+                return
+            self._pending[user_id] = None
+            self._start()
+            self._cond.notify()
+
+    def on_follow(self, follower_id: int, *followee_ids: int) -> None:
+        self._event("follow", follower_id, followee_ids)
+
+    def on_unfollow(self, follower_id: int, *followee_ids: int) -> None:
+        self._event("unfollow", follower_id, followee_ids)
+
+    def _event(self, kind: str, follower_id: int, followee_ids: Tuple[int, ...]) -> None:
+        with self._cond:
+            if len(self._events) >= self.queue_max:
+                self.dropped += 1
+                return
+            self._events.append((kind, follower_id, followee_ids))
+            self._start()
+            self._cond.notify()
+
+    def _start(self) -> None:
+        # 呼叫時已拿著 lock；lazy：gunicorn preload 時 master 不開 thread
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="suggestions", daemon=True)
+            self._thread.start()
+
+    def _next(self):
+        with self._cond:
+            while not self._events and not self._pending:
+                self._cond.wait()
+            # follow 事件先做（便宜），免得被一長串重算卡住
+            if self._events:
+                return self._events.popleft()
+            user_id, _ = self._pending.popitem(last=False)
+            return ("compute", user_id, ())
+
+    def _run(self) -> None:
+        while True:
+            kind, user_id, ids = self._next()
+            try:
+                if kind == "compute":
+                    self.compute(user_id)
+                else:
+                    self.apply(kind, user_id, ids)
+            except Exception:
+                self.errors += 1
+                logger.warning("suggestions %s for user %s failed", kind, user_id, exc_info=True)
+
+    # ===== compute / incremental =====
+    def compute(self, user_id: int) -> Dict[str, Any]:
+        now = time.time()
+        rows = fetch_all(SUGGESTION_CANDIDATES, (user_id, user_id, user_id))
+        items = _ranked(([int(r[0]), int(r[1]), _epoch(r[2])] for r in rows), self.max_items, now)
+        data = {"computedAt": now, "items": items}
+        cache.set(SUGGESTIONS_NAMESPACE, SUGGESTIONS_KEY, data, self.ttl, scope=user_id)
+        self.computed += 1
+        return data
+
+    def apply(self, kind: str, user_id: int, followee_ids: Iterable[int]) -> None:
+        """
+        follow / unfollow 的增量修改（不查 follow 表）；還沒算過的人直接排重算。
+        名單只存前 max_items 名，名單外的候選人 mutual 不知道，新加入時從 1 算起（下次重算會修正）。
+        """
+        with self._cond:
+            if user_id in self._pending:
+                return  # 反正要重算
+        data = cache.get(SUGGESTIONS_NAMESPACE, SUGGESTIONS_KEY, scope=user_id)
+        if data is None:
+            self.request(user_id)
+            return
+
+        delta = 1 if kind == "follow" else -1
+        items: Dict[int, List[Any]] = {it[0]: it for it in data["items"]}
+        followee_ids = list(followee_ids)
+        their = {fid: follow_graph.following(fid) for fid in followee_ids}
+        # 已經追蹤的不當候選人（自己那份名單載入一次）
+        followed = follow_graph.followed_among(user_id, {uid for arr in their.values() for uid in arr})
+        added: List[int] = []
+        for fid in followee_ids:
+            if delta > 0:
+                items.pop(fid, None)
+            for uid in their[fid]:
+                if uid == user_id or uid in followed:
+                    continue
+                it = items.get(uid)
+                if it is None:
+                    if delta > 0:
+                        items[uid] = [uid, 1, None]
+                        added.append(uid)
+                    continue
+                it[1] += delta
+                if it[1] <= 0:
+                    del items[uid]
+
+        added = [uid for uid in added if uid in items][:SUGGESTION_CANDIDATE_LIMIT]
+        if added:
+            for r in fetch_all(USERS_LAST_ACTIVE, (json_param(added),)):
+                items[int(r[0])][2] = _epoch(r[1])
+        data["items"] = _ranked(items.values(), self.max_items, time.time())
+        cache.set(SUGGESTIONS_NAMESPACE, SUGGESTIONS_KEY, data, self.ttl, scope=user_id)
+        self.patched += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = len(self._pending)
+            events = len(self._events)
+        total = self.hits + self.misses
+        return {
+            "queued": queued,
+            "queuedEvents": events,
+            "computed": self.computed,
+            "patched": self.patched,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else None,
+        }
+
+
+suggestions = SuggestionEngine(
+    Config.SUGGESTIONS_MAX,
+    Config.SUGGESTIONS_CACHE_TTL,
+    Config.SUGGESTIONS_REFRESH_SECONDS,
+    Config.SUGGESTIONS_QUEUE_MAX,
+)
@@ -0,0 +1,174 @@
+"""
+#tag / @mention
+
+- parse_entities(content)：posts_create 時從內文抓出 tag（小寫）跟被提到的 user_name，
+  同一個 transaction 寫進 post_tag / post_mention（各一個 INSERT ... SELECT FROM json，跟數量無關）
+- tag feed（GET /tags/<tag>/posts）走 post_tag 的 PK (tag, post_id)：一次 index seek，不用 LIKE 掃內文
+- autocomplete：每個 worker 一份 tag trie（記憶體），每個節點存子樹裡篇數最多的前 TAG_TRIE_TOP 個 tag，
+  查 prefix = 走 len(prefix) 個節點，不用掃子樹
+  第一次用到才從 post_tag 載入（一個 GROUP BY）；這個 process 發 / 刪文直接改（write-through），
+  其他 worker 的新 tag 等 TAGS_TRIE_TTL 秒後整個重新載入
+"""
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .concurrency import fetch_all
+from .config import Config
+from .queries import TAG_COUNTS
+
+TAG_MAX_LEN = 50
+USER_NAME_MAX_LEN = 50
+MAX_TAGS_PER_POST = 20
+MAX_MENTIONS_PER_POST = 20
+# 每個節點存幾個候選（autocomplete 一次最多回這麼多）
+TAG_TRIE_TOP = 10
+
+# 前面不能是字元 / 斜線 / &（網址的 #fragment、&#123; 這種不算）；\w 包含中文
+_TAG_RE = re.compile(r"(?<![\w/&#])#(\w+)")
+# 前面不能是字元、點、@（email 不算）
+_MENTION_RE = re.compile(r"(?<![\w.@])@(\w+)")
+_TAG_VALID = re.compile(r"^\w+$")
+
+
+def normalize_tag(tag: str) -> Optional[str]:
+    """#Python / python → python；不合法（空的、太長、有符號）回 None。"""
+    tag = (tag or "").strip().lstrip("#").lower()
+    if not tag or len(tag) > TAG_MAX_LEN or not _TAG_VALID.match(tag):
+        return None
+    return tag
+
+
+def parse_entities(content: str) -> Tuple[List[str], List[str]]:
+    """回傳 (tags, mentions)：照出現順序、去重，超過長度的略過。"""
+    tags = [t for t in (normalize_tag(m) for m in _TAG_RE.findall(content)) if t]
+    mentions = [m for m in _MENTION_RE.findall(content) if len(m) <= USER_NAME_MAX_LEN]
+    return (
+        list(dict.fromkeys(tags))[:MAX_TAGS_PER_POST],
+        list(dict.fromkeys(mentions))[:MAX_MENTIONS_PER_POST],
+    )
+
+
+class _Node:
+    __slots__ = ("children", "count", "top")
+
+    def __init__(self):
+        self.children: Dict[str, _Node] = {}
+        self.count = 0
+        # 子樹（含自己）篇數最多的 tag：[(-count, tag)]，由多到少
+        self.top: List[Tuple[int, str]] = []
+
+
+class TagTrie:
+    def __init__(self, ttl: float, top: int = TAG_TRIE_TOP):
+        self.ttl = ttl
+        self.top_n = top
+        self.reset()
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._root = _Node()
+        self._loaded_at: Optional[float] = None
+        self.tags = 0
+        self.nodes = 1
+        self.loads = 0
+
+    # ===== 讀 =====
+    def complete(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """prefix 開頭、篇數最多的 tag：[(tag, 篇數)]。"""
+        self._ensure_loaded()
+        with self._lock:
+            node = self._root
+            for ch in prefix:
+                node = node.children.get(ch)
+                if node is None:
+                    return []
+            return [(tag, -neg) for neg, tag in node.top[:limit]]
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def _ensure_loaded(self) -> None:
+        if self._fresh():
+            return
+        # 同時只有一個人載入；已經有舊的那份時其他人先用舊的
+        if not self._load_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._fresh():
+                return
+            root, tags, nodes = _Node(), 0, 1
+            for tag, n in fetch_all(TAG_COUNTS):
+                created, added = self._apply(root, str(tag), int(n))
+                nodes += created
+                tags += added
+        finally:
+            self._load_lock.release()
+        with self._lock:
+            self._root, self.tags, self.nodes = root, tags, nodes
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+
+    # ===== write-through（commit 之後呼叫）=====
+    def add(self, tags: Iterable[str], delta: int = 1) -> None:
+        if self._loaded_at is None:
+            return  # 還沒載入：第一次讀的時候會從 DB 載到最新的
+        with self._lock:
+            for tag in tags:
+                created, added = self._apply(self._root, tag, delta)
+                self.nodes += created
+                self.tags += added
+
+    def _apply(self, root: _Node, tag: str, delta: int) -> Tuple[int, int]:
+        """tag 的篇數 += delta，沿路更新每個節點的 top；回傳 (新建了幾個節點, tag 數的變化)。"""
+        path = [root]
+        created = 0
+        node = root
+        for ch in tag:
+            nxt = node.children.get(ch)
+            if nxt is None:
+                if delta <= 0:
+                    return 0, 0
+                nxt = node.children[ch] = _Node()
+                created += 1
+            node = nxt
+            path.append(node)
+        old = node.count
+        node.count = max(old + delta, 0)
+        entry = (-node.count, tag)
+        # 由下往上：要重算的節點，子節點的 top 已經是新的
+        for depth in range(len(path) - 1, -1, -1):
+            n = path[depth]
+            top = [e for e in n.top if e[1] != tag]
+            if node.count < old and len(top) < len(n.top):
+                # 候選裡的 tag 被扣：子樹裡其他 tag 可能該補上來，從自己 + 子節點的 top 重算
+                n.top = self._collect(n, tag[:depth])
+                continue
+            if node.count > 0:
+                top.append(entry)
+                top.sort()
+            n.top = top[: self.top_n]
+        return created, int(node.count > 0) - int(old > 0)
+
+    def _collect(self, node: _Node, key: str) -> List[Tuple[int, str]]:
+        candidates = [(-node.count, key)] if node.count > 0 else []
+        for child in node.children.values():
+            candidates.extend(child.top)
+        return heapq.nsmallest(self.top_n, candidates)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "tags": self.tags,
+                "nodes": self.nodes,
+                "loads": self.loads,
+                "ttl": self.ttl,
+            }
+
+
+tag_trie = TagTrie(Config.TAGS_TRIE_TTL)
@@ -0,0 +1,229 @@
+"""
+Trending posts（GET /posts/trending）
+
+score = Σ 權重 × 0.5^((now - 事件時間) / half-life)：按讚 TRENDING_LIKE_WEIGHT、留言 TRENDING_COMMENT_WEIGHT，
+每 TRENDING_HALF_LIFE_HOURS 小時減半。
+
+衰減不用每次重算所有貼文：分數都以「epoch 起點」為基準存成 權重 × 2^((事件時間 - 起點) / half-life)，
+所有貼文乘的是同一個 2^(-(now - 起點) / half-life)，排名不會變，新事件直接加上去就好（unlike / 刪留言就減）。
+epoch 每 20 個 half-life 換一次（數字不會無限變大）：上一個 epoch 的分數乘上 2^-20 換到新的基準。
+
+- 記憶體：每個 worker 一份 top-K（dict + 依分數排序的 list，bisect 增刪），讚 / 留言當下就更新，讀取直接切片
+- 持久化：背景 thread 每 TRENDING_FLUSH_SECONDS 把這段時間的增量加進 post_trending（UPDATE score = score + ?，
+  多個 worker 同時加也不會蓋掉彼此），再從 post_trending 讀回前 K 名取代記憶體那份（合併其他 worker 的事件）
+- request 不查 post 表；重啟後第一次讀從 post_trending 載入
+掉出前 K 名的貼文只在 DB 裡，之後再有事件，記憶體先從增量算起，下一次 flush 讀回來就對了。
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from .concurrency import fetch_all
+from .config import Config
+from .db import IntegrityError, get_conn
+from .queries import TRENDING_ADD, TRENDING_INSERT, TRENDING_PRUNE, TRENDING_TOP, TRENDING_TOP_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# 一個 epoch 長幾個 half-life（2^20 ≈ 1e6，float 綽綽有餘）
+EPOCH_HALF_LIVES = 20
+
+
+class TrendingIndex:
+    def __init__(self, capacity: int, half_life_hours: float, flush_seconds: float,
+                 like_weight: float, comment_weight: float):
+        self.capacity = capacity
+        self.half_life = half_life_hours * 3600.0
+        self.period = self.half_life * EPOCH_HALF_LIVES
+        self.flush_seconds = flush_seconds
+        self.like_weight = like_weight
+        self.comment_weight = comment_weight
+        self.reset()
+
+    def reset(self) -> None:
+        """fork 之後呼叫：thread 不會跟著 fork 過來，記憶體那份下次讀的時候重新載入。"""
+        self._lock = threading.Lock()
+        self._epoch = self._epoch_of(time.time())
+        self._scores: Dict[int, float] = {}
+        self._ranked: List[Tuple[float, int]] = []  # 分數由小到大
+        # 還沒寫回 DB 的增量：(epoch, post_id) -> delta
+        self._pending: Dict[Tuple[int, int], float] = {}
+        self._loaded = False
+        self._thread: Optional[threading.Thread] = None
+        self.events = 0
+        self.flushes = 0
+        self.errors = 0
+
+    # ===== 時間 / 分數 =====
+    def _epoch_of(self, now: float) -> int:
+        return int(now // self.period)
+
+    def _boost(self, now: float, epoch: int) -> float:
+        return 2.0 ** ((now - epoch * self.period) / self.half_life)
+
+    # ===== 寫入路徑（commit 之後呼叫）=====
+    def on_like(self, *post_ids: int) -> None:
+        self._record(post_ids, self.like_weight)
+
+    def on_unlike(self, *post_ids: int) -> None:
+        # 不知道原本那個讚是什麼時候按的：當作現在的讚扣掉（最多扣到 0）
+        self._record(post_ids, -self.like_weight)
+
+    def on_comment(self, post_id: int) -> None:
+        self._record((post_id,), self.comment_weight)
+
+    def on_uncomment(self, post_id: int) -> None:
+        self._record((post_id,), -self.comment_weight)
+
+    def on_delete(self, post_id: int) -> None:
+        # DB 那邊 post_trending 跟著 post cascade 刪掉
+        with self._lock:
+            self._remove(post_id)
+            for key in [k for k in self._pending if k[1] == post_id]:
+                del self._pending[key]
+
+    def _record(self, post_ids, weight: float) -> None:
+        now = time.time()
+        epoch = self._epoch_of(now)
+        delta = weight * self._boost(now, epoch)
+        with self._lock:
+            self._rollover(epoch)
+            for pid in post_ids:
+                self._pending[(epoch, pid)] = self._pending.get((epoch, pid), 0.0) + delta
+                self._add(pid, delta)
+            self.events += len(post_ids)
+            self._start()
+
+    # ===== 記憶體裡的 top-K（呼叫時已拿著 lock）=====
+    def _remove(self, post_id: int) -> Optional[float]:
+        old = self._scores.pop(post_id, None)
+        if old is not None:
+            del self._ranked[bisect_left(self._ranked, (old, post_id))]
+        return old
+
+    def _add(self, post_id: int, delta: float) -> None:
+        score = (self._remove(post_id) or 0.0) + delta
+        if score <= 0:
+            return
+        self._scores[post_id] = score
+        insort(self._ranked, (score, post_id))
+        if len(self._ranked) > self.capacity:
+            _, dropped = self._ranked.pop(0)
+            del self._scores[dropped]
+
+    def _rollover(self, epoch: int) -> None:
+        # 換 epoch：全部乘同一個係數，順序不變，list 直接重建
+        if epoch == self._epoch:
+            return
+        factor = 2.0 ** (-(epoch - self._epoch) * EPOCH_HALF_LIVES)
+        self._scores = {pid: s * factor for pid, s in self._scores.items()}
+        self._ranked = [(s * factor, pid) for s, pid in self._ranked]
+        self._epoch = epoch
+
+    # ===== 讀 =====
+    def top(self, n: int) -> List[Tuple[int, float]]:
+        """[(post_id, 目前的分數)]，分數高的在前。"""
+        if not self._loaded:
+            self._reload()
+        now = time.time()
+        with self._lock:
+            self._rollover(self._epoch_of(now))
+            decay = 1.0 / self._boost(now, self._epoch)
+            self._start()
+            return [(pid, s * decay) for s, pid in reversed(self._ranked[-n:])] if n > 0 else []
+
+    # ===== 持久化 =====
+    def _start(self) -> None:
+        # 呼叫時已拿著 lock；lazy：gunicorn preload 時 master 不開 thread
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="trending", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception:
+                self.errors += 1
+                logger.warning("trending flush failed", exc_info=True)
+
+    def flush(self) -> None:
+        """把增量加進 post_trending，再讀回前 K 名（包含其他 worker 寫的）。"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        epoch = self._epoch_of(time.time())
+        with get_conn() as conn:
+            cur = conn.cursor()
+            try:
+                for (ep, pid), delta in pending.items():
+                    if ep < epoch - 1:
+                        continue
+                    cur.execute(TRENDING_ADD, (delta, ep, pid))
+                    if cur.rowcount == 0:
+                        try:
+                            cur.execute(TRENDING_INSERT, (ep, pid, delta, pid))
+                        except IntegrityError:
+                            # 另一個 worker 剛好先插了同一列
+                            cur.execute(TRENDING_ADD, (delta, ep, pid))
+                cur.execute(TRENDING_PRUNE, (epoch - 1,))
+                conn.commit()
+            except Exception:
+                # 沒寫進去的增量放回去，下次再寫
+                with self._lock:
+                    for key, delta in pending.items():
+                        self._pending[key] = self._pending.get(key, 0.0) + delta
+                raise
+            self.flushes += 1
+            # 同一條（primary）連線讀回來，replica 可能還沒看到剛剛的寫入
+            cur.execute(TRENDING_TOP, self._top_params(epoch))
+            rows = cur.fetchall()
+        self._install(epoch, rows)
+
+    @staticmethod
+    def _top_params(epoch: int) -> Tuple[int, float, int, int, float]:
+        factor = 2.0 ** -EPOCH_HALF_LIVES
+        return (epoch, factor, epoch - 1, epoch, factor)
+
+    def _reload(self) -> None:
+        epoch = self._epoch_of(time.time())
+        self._install(epoch, fetch_all(TRENDING_TOP, self._top_params(epoch)))
+
+    def _install(self, epoch: int, rows) -> None:
+        with self._lock:
+            self._epoch = epoch
+            self._scores = {}
+            self._ranked = []
+            for r in rows[: self.capacity]:
+                self._scores[int(r[0])] = float(r[1])
+            self._ranked = sorted((s, pid) for pid, s in self._scores.items())
+            # 讀的這段時間進來、還沒寫回的增量補上
+            for (ep, pid), delta in self._pending.items():
+                if ep == epoch:
+                    self._add(pid, delta)
+            self._loaded = True
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "posts": len(self._ranked),
+                "capacity": self.capacity,
+                "pending": len(self._pending),
+                "events": self.events,
+                "flushes": self.flushes,
+                "errors": self.errors,
+                "halfLifeHours": self.half_life / 3600.0,
+            }
+
+
+trending = TrendingIndex(
+    TRENDING_TOP_LIMIT,
+    Config.TRENDING_HALF_LIFE_HOURS,
+    Config.TRENDING_FLUSH_SECONDS,
+    Config.TRENDING_LIKE_WEIGHT,
+    Config.TRENDING_COMMENT_WEIGHT,
+)
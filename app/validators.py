@@ -1,4 +1,15 @@
 import re
+from typing import Any, Dict, List, Tuple
 
 def is_valid_email(email: str) -> bool:
-    return bool(re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email))
\ No newline at end of file
+    return bool(re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email))
+
+def parse_id_list(value: Any, field: str, limit: int) -> Tuple[List[int], List[Dict[str, str]]]:
+    """request body 裡的 id 陣列 → (去重、保留順序的 ids, details)"""
+    if not isinstance(value, list) or not value:
+        return [], [{"field": field, "reason": "required"}]
+    if len(value) > limit:
+        return [], [{"field": field, "reason": "too_many"}]
+    if any(isinstance(v, bool) or not isinstance(v, int) or v < 1 for v in value):
+        return [], [{"field": field, "reason": "invalid"}]
+    return list(dict.fromkeys(value)), []
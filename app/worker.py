@@ -0,0 +1,32 @@
+"""
+Per-worker 初始化
+
+gunicorn preload_app=True 時 master 先 import 並 create_app()，worker 是 fork 出來的；
+DB 連線、Redis 連線池、各種 lock 都不能跟 master / 其他 worker 共用，所以在 post_fork 裡重建。
+"""
+from __future__ import annotations
+
+from .autocomplete import user_names
+from .cache import cache
+from .concurrency import reset_executor
+from .db import dialect, replica_router
+from .follow_graph import follow_graph
+from .pubsub import hub
+from .singleflight import hot_reads
+from .suggestions import suggestions
+from .tags import tag_trie
+from .trending import trending
+
+
+def init_worker() -> None:
+    dialect.reset()
+    replica_router.reset()
+    cache.reset()
+    hot_reads.reset()
+    hub.reset()
+    follow_graph.reset()
+    suggestions.reset()
+    trending.reset()
+    tag_trie.reset()
+    user_names.reset()
+    reset_executor()
@@ -0,0 +1,99 @@
+"""
+python -m bench [--users 1000] [--rps 100] [--duration 30] [--out bench_results.json] [--baseline old.json]
+
+先 seed 合成資料（已 seed 過會沿用），再用目標 RPS 打混合流量，最後印出每個 endpoint 的
+p50/p95/p99 與平均 DB round trips。--out 存成 JSON，之後用 --baseline 比較效能變化。
+
+預設跑在本機 SQLite（--sqlite-path），不需要 SQL Server；--backend mssql 則用 .env 的設定。
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import platform
+import sys
+import time
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench")
+    ap.add_argument("--backend", choices=("sqlite", "mssql"), default="sqlite")
+    ap.add_argument("--sqlite-path", default="bench.db")
+    ap.add_argument("--users", type=int, default=1000)
+    ap.add_argument("--avg-follows", type=int, default=20)
+    ap.add_argument("--posts-per-user", type=float, default=5.0)
+    ap.add_argument("--likes-per-post", type=float, default=8.0)
+    ap.add_argument("--comments-per-post", type=float, default=2.0)
+    ap.add_argument("--reseed", action="store_true", help="always insert a fresh dataset")
+    ap.add_argument("--seed-only", action="store_true")
+    ap.add_argument("--rps", type=float, default=100.0)
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--warmup", type=float, default=2.0)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--base-url", default=None, help="hit a running server instead of the in-process app")
+    ap.add_argument("--out", default=None, help="write the report as JSON")
+    ap.add_argument("--baseline", default=None, help="compare against a previous --out file")
+    args = ap.parse_args(argv)
+
+    # Config 在 import 時讀環境變數，所以要先設好再 import app
+    os.environ["DB_BACKEND"] = args.backend
+    if args.backend == "sqlite":
+        os.environ["SQLITE_PATH"] = args.sqlite_path
+
+    from app import create_app
+
+    from .load import LoadConfig, dump_report, format_report, load_report, run_load, summarize
+    from .seed import SeedConfig, load_existing, seed
+
+    app = create_app()
+
+    seed_cfg = SeedConfig(
+        users=args.users,
+        avg_follows=args.avg_follows,
+        posts_per_user=args.posts_per_user,
+        likes_per_post=args.likes_per_post,
+        comments_per_post=args.comments_per_post,
+    )
+    data = None if args.reseed else load_existing(seed_cfg)
+    if data is None or not data.user_ids:
+        t0 = time.perf_counter()
+        data = seed(seed_cfg)
+        print(f"seeded {data.summary()} in {time.perf_counter() - t0:.1f}s")
+    else:
+        print(f"using existing bench data: {len(data.user_ids)} users, {len(data.post_ids)} posts")
+
+    if args.seed_only:
+        return 0
+
+    load_cfg = LoadConfig(
+        rps=args.rps,
+        duration=args.duration,
+        concurrency=args.concurrency,
+        warmup=args.warmup,
+        base_url=args.base_url,
+    )
+    result = run_load(app, data, load_cfg)
+    report = summarize(result)
+    baseline = load_report(args.baseline) if args.baseline else None
+    print(format_report(report, baseline))
+
+    if args.out:
+        dump_report(
+            args.out,
+            report,
+            {
+                "rps": args.rps,
+                "duration": args.duration,
+                "concurrency": args.concurrency,
+                "users": len(data.user_ids),
+                "posts": len(data.post_ids),
+                "backend": args.backend,
+                "target": args.base_url or "inproc",
+                "python": platform.python_version(),
+            },
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""
+Open-loop load driver：依目標 RPS 送出混合流量，紀錄每個 endpoint 的延遲與 DB round trips。
+
+- inproc 模式：直接走 Flask test client（完整 request path，但不經過 HTTP server）
+- http 模式：打真正的 server（例如 gunicorn），此時 DB round trips 量不到
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from app.auth_utils import create_access_token
+from app.db import add_query_hook, remove_query_hook
+
+from .seed import CJK_WORDS, LATIN_WORDS, SeedResult
+
+# (endpoint 名稱, 權重)：大致照前端實際的呼叫比例
+DEFAULT_MIX: Tuple[Tuple[str, float], ...] = (
+    ("posts_list", 0.30),
+    ("comments_list", 0.18),
+    ("like_post", 0.12),
+    ("follows", 0.15),
+    ("posts_search", 0.10),
+    ("users_search", 0.10),
+    ("post_likes_list", 0.05),
+)
+
+_round_trips: ContextVar[Optional[List[int]]] = ContextVar("bench_round_trips", default=None)
+
+
+def _count_round_trip(sql, params, elapsed, raw_conn) -> None:
+    counter = _round_trips.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    latency_ms: float
+    round_trips: Optional[int]
+
+
+@dataclass
+class LoadConfig:
+    rps: float = 100.0
+    duration: float = 30.0
+    concurrency: int = 32
+    warmup: float = 2.0
+    seed: int = 7
+    base_url: Optional[str] = None
+    mix: Tuple[Tuple[str, float], ...] = DEFAULT_MIX
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    token: Optional[str] = None
+
+
+class _HttpClient:
+    """每個 thread 一條 keep-alive 連線。"""
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self._host = parts.hostname or "127.0.0.1"
+        self._port = parts.port or 80
+        self._local = threading.local()
+
+    def _conn(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self._host, self._port, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def send(self, req: Request) -> Tuple[int, Optional[int]]:
+        headers = {"Content-Type": "application/json"}
+        if req.token:
+            headers["Authorization"] = f"Bearer {req.token}"
+        conn = self._conn()
+        try:
+            conn.request(req.method, req.path, body=b"" if req.method != "GET" else None, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            return resp.status, None
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            return 599, None
+
+
+class _InprocClient:
+    def __init__(self, app):
+        self._app = app
+        self._local = threading.local()
+
+    def send(self, req: Request) -> Tuple[int, Optional[int]]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._app.test_client()
+            self._local.client = client
+        headers = {"Authorization": f"Bearer {req.token}"} if req.token else {}
+        counter = [0]
+        token = _round_trips.set(counter)
+        try:
+            resp = client.open(req.path, method=req.method, headers=headers)
+            resp.close()
+            return resp.status_code, counter[0]
+        finally:
+            _round_trips.reset(token)
+
+
+class Workload:
+    """依 mix 隨機產生 request；參數分佈偏向熱門使用者/貼文。"""
+
+    def __init__(self, data: SeedResult, cfg: LoadConfig):
+        if not data.user_ids or not data.post_ids:
+            raise RuntimeError("No bench data. Seed the database first.")
+        self._rng = random.Random(cfg.seed)
+        self._lock = threading.Lock()
+        self._users = data.user_ids
+        self._posts = data.post_ids
+        self._names = [n for n, _ in cfg.mix]
+        self._weights = [w for _, w in cfg.mix]
+        self._tokens: Dict[int, str] = {}
+        self._liked: set = set()
+
+    def _token(self, user_id: int) -> str:
+        tok = self._tokens.get(user_id)
+        if tok is None:
+            tok = create_access_token(user_id)
+            self._tokens[user_id] = tok
+        return tok
+
+    def _hot(self, seq: List[int], from_end: bool = False) -> int:
+        # 大約 80/20：越前面的帳號（熱門）/ 越後面的貼文（越新）越常被點到
+        idx = min(len(seq) - 1, int(len(seq) * (self._rng.random() ** 3)))
+        return seq[-1 - idx] if from_end else seq[idx]
+
+    def next(self) -> Tuple[str, Request]:
+        with self._lock:
+            rng = self._rng
+            name = rng.choices(self._names, weights=self._weights, k=1)[0]
+            viewer = self._hot(self._users) if rng.random() < 0.7 else None
+            token = self._token(viewer) if viewer is not None else None
+            post_id = self._hot(self._posts, from_end=True)
+            user_id = self._hot(self._users)
+
+            if name == "posts_list":
+                page = 1 if rng.random() < 0.7 else rng.randint(2, 10)
+                return name, Request("GET", f"/api/v1/posts?page={page}&pageSize=20", token)
+            if name == "posts_search":
+                q = rng.choice(LATIN_WORDS) if rng.random() < 0.5 else rng.choice(CJK_WORDS)
+                return name, Request("GET", f"/api/v1/posts/search?query={quote(q)}&page=1&pageSize=20", token)
+            if name == "users_search":
+                q = rng.choice(LATIN_WORDS)[:3]
+                return name, Request("GET", f"/api/v1/users/search?query={quote(q)}&limit=20", token)
+            if name == "like_post":
+                liker = self._hot(self._users)
+                key = (liker, post_id)
+                method = "DELETE" if key in self._liked else "POST"
+                self._liked.symmetric_difference_update({key})
+                return name, Request(method, f"/api/v1/posts/{post_id}/like", self._token(liker))
+            if name == "comments_list":
+                return name, Request("GET", f"/api/v1/posts/{post_id}/comments?page=1&pageSize=50", token)
+            if name == "post_likes_list":
+                return name, Request("GET", f"/api/v1/posts/{post_id}/likes?limit=8", token)
+            # follows：狀態查詢 + 名單，偶爾追蹤/取消
+            r = rng.random()
+            if r < 0.5:
+                return name, Request("GET", f"/api/v1/follows/{user_id}", token)
+            if r < 0.8:
+                return name, Request("GET", f"/api/v1/follows/{user_id}/followers?page=1&pageSize=50", token)
+            actor = self._hot(self._users)
+            method = "POST" if rng.random() < 0.6 else "DELETE"
+            return name, Request(method, f"/api/v1/follows/{user_id}", self._token(actor))
+
+
+@dataclass
+class RunResult:
+    samples: List[Sample] = field(default_factory=list)
+    elapsed: float = 0.0
+    dropped: int = 0
+
+
+def run_load(app, data: SeedResult, cfg: LoadConfig, log: Callable[[str], None] = print) -> RunResult:
+    client = _HttpClient(cfg.base_url) if cfg.base_url else _InprocClient(app)
+    workload = Workload(data, cfg)
+    result = RunResult()
+    samples_lock = threading.Lock()
+    in_flight = threading.Semaphore(cfg.concurrency * 4)
+
+    if not cfg.base_url:
+        add_query_hook(_count_round_trip)
+
+    def fire(name: str, req: Request, scheduled: float, record: bool):
+        try:
+            status, rts = client.send(req)
+        except Exception:
+            status, rts = 599, None
+        # 延遲從「排定送出的時間」開始算，避免 coordinated omission
+        latency = (time.perf_counter() - scheduled) * 1000.0
+        in_flight.release()
+        if record:
+            with samples_lock:
+                result.samples.append(Sample(name, status, latency, rts))
+
+    interval = 1.0 / cfg.rps
+    try:
+        with ThreadPoolExecutor(max_workers=cfg.concurrency) as pool:
+            start = time.perf_counter()
+            end = start + cfg.warmup + cfg.duration
+            next_at = start
+            while next_at < end:
+                now = time.perf_counter()
+                if now < next_at:
+                    time.sleep(next_at - now)
+                if not in_flight.acquire(blocking=False):
+                    result.dropped += 1
+                else:
+                    name, req = workload.next()
+                    pool.submit(fire, name, req, next_at, next_at >= start + cfg.warmup)
+                next_at += interval
+        result.elapsed = cfg.duration
+    finally:
+        if not cfg.base_url:
+            remove_query_hook(_count_round_trip)
+
+    log(f"sent {len(result.samples)} requests, dropped {result.dropped}")
+    return result
+
+
+def _percentile(sorted_vals: List[float], pct: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def summarize(result: RunResult) -> Dict[str, Dict[str, float]]:
+    by_ep: Dict[str, List[Sample]] = {}
+    for s in result.samples:
+        by_ep.setdefault(s.endpoint, []).append(s)
+    by_ep["ALL"] = list(result.samples)
+
+    report: Dict[str, Dict[str, float]] = {}
+    for ep, samples in sorted(by_ep.items()):
+        lat = sorted(s.latency_ms for s in samples)
+        rts = [s.round_trips for s in samples if s.round_trips is not None]
+        report[ep] = {
+            "count": len(samples),
+            "errors": sum(1 for s in samples if s.status >= 500),
+            "rps": round(len(samples) / result.elapsed, 1) if result.elapsed else 0.0,
+            "p50": round(_percentile(lat, 50), 2),
+            "p95": round(_percentile(lat, 95), 2),
+            "p99": round(_percentile(lat, 99), 2),
+            "dbRoundTrips": round(sum(rts) / len(rts), 2) if rts else None,
+        }
+    return report
+
+
+def format_report(report: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    cols = ("count", "errors", "rps", "p50", "p95", "p99", "dbRoundTrips")
+    lines = ["endpoint".ljust(18) + "".join(c.rjust(14) for c in cols)]
+    for ep, row in report.items():
+        cells = []
+        for c in cols:
+            v = row.get(c)
+            cell = "-" if v is None else str(v)
+            base = (baseline or {}).get(ep, {}).get(c)
+            if c in ("p50", "p95", "p99") and isinstance(v, (int, float)) and base:
+                cell += f" ({(v - base) / base * 100:+.0f}%)"
+            cells.append(cell.rjust(14))
+        lines.append(ep.ljust(18) + "".join(cells))
+    return "\n".join(lines)
+
+
+def dump_report(path: str, report: Dict[str, Dict[str, float]], meta: Dict[str, object]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "report": report}, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("report", {})
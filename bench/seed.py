@@ -0,0 +1,232 @@
+"""
+合成資料：users + power-law follow graph + posts / likes / comments（中英混合內文）
+
+全部用 executemany 批次寫入；pyodbc 會開 fast_executemany。
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+import bcrypt
+
+from app.db import get_conn, tbl
+
+BENCH_EMAIL_DOMAIN = "bench.local"
+
+LATIN_WORDS = (
+    "coffee morning sunset city walk photo travel music weekend friends food "
+    "ramen cat dog beach mountain rain night coding book movie study gym trip "
+    "hello world today finally amazing little happy tired busy new old best"
+).split()
+
+CJK_WORDS = (
+    "咖啡 早安 夕陽 城市 散步 照片 旅行 音樂 週末 朋友 美食 拉麵 貓咪 狗狗 海邊 "
+    "山上 下雨 晚上 寫程式 看書 電影 讀書 健身 出遊 你好 今天 終於 好棒 開心 好累 忙碌"
+).split()
+
+TAGS = ("#daily", "#travel", "#food", "#cat", "#日常", "#旅行", "#美食", "#攝影")
+
+
+@dataclass
+class SeedConfig:
+    users: int = 1000
+    avg_follows: int = 20
+    posts_per_user: float = 5.0
+    likes_per_post: float = 8.0
+    comments_per_post: float = 2.0
+    zipf_alpha: float = 1.1
+    days: int = 30
+    seed: int = 42
+    batch_size: int = 1000
+
+
+@dataclass
+class SeedResult:
+    user_ids: List[int] = field(default_factory=list)
+    post_ids: List[int] = field(default_factory=list)
+    follows: int = 0
+    likes: int = 0
+    comments: int = 0
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "users": len(self.user_ids),
+            "posts": len(self.post_ids),
+            "follows": self.follows,
+            "likes": self.likes,
+            "comments": self.comments,
+        }
+
+
+def _zipf_weights(n: int, alpha: float) -> List[float]:
+    return [1.0 / ((i + 1) ** alpha) for i in range(n)]
+
+
+def _power_law_count(rng: random.Random, mean: float, alpha: float = 2.2, cap: int = 5000) -> int:
+    # Pareto 分布，平均值約等於 mean
+    if mean <= 0:
+        return 0
+    xm = mean * (alpha - 1) / alpha
+    return min(cap, int(xm * rng.paretovariate(alpha - 1)))
+
+
+def make_text(rng: random.Random, min_words: int = 3, max_words: int = 18) -> str:
+    n = rng.randint(min_words, max_words)
+    cjk_ratio = rng.choice((0.0, 0.3, 0.7, 1.0))
+    parts = []
+    for _ in range(n):
+        parts.append(rng.choice(CJK_WORDS) if rng.random() < cjk_ratio else rng.choice(LATIN_WORDS))
+    if rng.random() < 0.3:
+        parts.append(rng.choice(TAGS))
+    return " ".join(parts)[:500]
+
+
+def _executemany(cur, sql: str, rows: Sequence[tuple], batch_size: int) -> None:
+    if not rows:
+        return
+    try:
+        cur.fast_executemany = True
+    except AttributeError:
+        pass
+    for i in range(0, len(rows), batch_size):
+        cur.executemany(sql, rows[i: i + batch_size])
+
+
+def existing_bench_users(cur) -> List[int]:
+    cur.execute(
+        f"SELECT user_id FROM {tbl('users')} WHERE Email LIKE ? ORDER BY user_id",
+        (f"%@{BENCH_EMAIL_DOMAIN}",),
+    )
+    return [int(r[0]) for r in cur.fetchall()]
+
+
+def load_existing(cfg: SeedConfig) -> SeedResult:
+    """資料已經 seed 過就直接沿用（避免每次 benchmark 都重灌）。"""
+    res = SeedResult()
+    with get_conn() as conn:
+        cur = conn.cursor()
+        res.user_ids = existing_bench_users(cur)
+        if res.user_ids:
+            cur.execute(
+                f"""
+                SELECT p.post_id FROM {tbl('post')} p
+                JOIN {tbl('users')} u ON u.user_id = p.user_id
+                WHERE u.Email LIKE ?
+                ORDER BY p.post_id
+                """,
+                (f"%@{BENCH_EMAIL_DOMAIN}",),
+            )
+            res.post_ids = [int(r[0]) for r in cur.fetchall()]
+    return res
+
+
+def seed(cfg: SeedConfig) -> SeedResult:
+    rng = random.Random(cfg.seed)
+    res = SeedResult()
+    now = datetime.now().replace(microsecond=0)
+
+    # 全部 bench user 共用同一個密碼 hash（bcrypt 很慢，不需要每個都算）
+    pwd_hash = bcrypt.hashpw(b"benchpass", bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+    with get_conn() as conn:
+        cur = conn.cursor()
+
+        start = len(existing_bench_users(cur))
+        user_rows = []
+        for i in range(start, start + cfg.users):
+            name = f"{rng.choice(LATIN_WORDS)}_{i}" if rng.random() < 0.6 else f"{rng.choice(CJK_WORDS)}{i}"
+            user_rows.append((f"bench{i}@{BENCH_EMAIL_DOMAIN}", pwd_hash, make_text(rng, 2, 8), name[:50]))
+        _executemany(
+            cur,
+            f"INSERT INTO {tbl('users')}(Email, pwd, bio, user_name) VALUES (?, ?, ?, ?)",
+            user_rows,
+            cfg.batch_size,
+        )
+        conn.commit()
+        res.user_ids = existing_bench_users(cur)[start:]
+        users = res.user_ids
+        if not users:
+            return res
+
+        # follow：熱門帳號（排序前面）被追蹤的機率呈 power-law
+        weights = _zipf_weights(len(users), cfg.zipf_alpha)
+        follow_pairs = set()
+        for follower in users:
+            k = min(len(users) - 1, _power_law_count(rng, cfg.avg_follows))
+            if k <= 0:
+                continue
+            for followee in rng.choices(users, weights=weights, k=k):
+                if followee != follower:
+                    follow_pairs.add((follower, followee))
+        _executemany(
+            cur,
+            f"INSERT INTO {tbl('follow')}(follower_id, followee_id) VALUES (?, ?)",
+            sorted(follow_pairs),
+            cfg.batch_size,
+        )
+        res.follows = len(follow_pairs)
+
+        # posts：活躍度一樣是 power-law；created_at 打散在最近 cfg.days 天
+        post_rows = []
+        span = cfg.days * 24 * 3600
+        for uid in users:
+            for _ in range(_power_law_count(rng, cfg.posts_per_user, cap=500)):
+                created = now - timedelta(seconds=rng.randint(0, span))
+                post_rows.append((uid, None, make_text(rng), created))
+        post_rows.sort(key=lambda r: r[3])
+        _executemany(
+            cur,
+            f"INSERT INTO {tbl('post')}(user_id, picture, content, created_at) VALUES (?, ?, ?, ?)",
+            post_rows,
+            cfg.batch_size,
+        )
+        conn.commit()
+
+        cur.execute(
+            f"SELECT p.post_id FROM {tbl('post')} p WHERE p.user_id >= ? AND p.user_id <= ? ORDER BY p.post_id",
+            (users[0], users[-1]),
+        )
+        res.post_ids = [int(r[0]) for r in cur.fetchall()]
+        posts = res.post_ids
+
+        # likes / comments：越新的貼文越熱門
+        like_pairs = set()
+        comment_rows: List[Tuple[int, int, str]] = []
+        post_weights = _zipf_weights(len(posts), 0.8)[::-1]
+        for pid in posts:
+            for uid in rng.choices(users, weights=weights, k=_power_law_count(rng, cfg.likes_per_post)):
+                like_pairs.add((pid, uid))
+        n_comments = int(len(posts) * cfg.comments_per_post)
+        for pid in rng.choices(posts, weights=post_weights, k=n_comments) if posts else []:
+            comment_rows.append((rng.choice(users), pid, make_text(rng, 1, 10)))
+
+        _executemany(
+            cur,
+            f"INSERT INTO {tbl('likes')}(post_id, user_id) VALUES (?, ?)",
+            sorted(like_pairs),
+            cfg.batch_size,
+        )
+        _executemany(
+            cur,
+            f"INSERT INTO {tbl('comment')}(user_id, post_id, content) VALUES (?, ?, ?)",
+            comment_rows,
+            cfg.batch_size,
+        )
+        res.likes = len(like_pairs)
+        res.comments = len(comment_rows)
+
+        # post.likes 是反正規化的計數，一次補齊
+        cur.execute(
+            f"""
+            UPDATE {tbl('post')}
+            SET likes = (SELECT COUNT(*) FROM {tbl('likes')} l WHERE l.post_id = {tbl('post')}.post_id)
+            WHERE user_id >= ? AND user_id <= ?
+            """,
+            (users[0], users[-1]),
+        )
+        conn.commit()
+
+    return res
@@ -0,0 +1,175 @@
+"""
+python -m bench.workers [--mixes 1x1,1x8,2x4,4x2,4x8] [--rps 400] [--duration 15]
+
+對每一組 <workers>x<threads> 起一個 gunicorn（gunicorn.conf.py + wsgi:app），用同一份混合流量打，
+比較吞吐量與延遲。我們的 request 大多在等 DB，通常 thread 多一點比 process 多划算，實際以這裡的數字為準。
+
+資料跟 python -m bench 共用（同一個 --sqlite-path 會沿用已 seed 的資料）。
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_mixes(raw: str) -> List[Tuple[int, int]]:
+    mixes = []
+    for part in raw.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        w, _, t = part.partition("x")
+        mixes.append((int(w), int(t or 1)))
+    return mixes
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port: int, proc: subprocess.Popen, timeout: float = 30.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/api/v1/posts?page=1&pageSize=1")
+            ok = conn.getresponse().status == 200
+            conn.close()
+            if ok:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def start_server(workers: int, threads: int, env: Dict[str, str], log) -> Tuple[subprocess.Popen, int]:
+    port = _free_port()
+    child_env = dict(env)
+    child_env.update({
+        "WEB_BIND": f"127.0.0.1:{port}",
+        "WEB_WORKERS": str(workers),
+        "WEB_THREADS": str(threads),
+        "WEB_MAX_REQUESTS": "0",
+    })
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=ROOT,
+        env=child_env,
+        stdout=log,
+        stderr=log,
+    )
+    return proc, port
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def format_table(rows: List[Dict[str, object]]) -> str:
+    cols = ("workers", "threads", "rps", "errors", "dropped", "p50", "p95", "p99")
+    lines = ["mix".ljust(8) + "".join(c.rjust(10) for c in cols)]
+    for r in rows:
+        lines.append(str(r["mix"]).ljust(8) + "".join(str(r.get(c, "-")).rjust(10) for c in cols))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.workers")
+    ap.add_argument("--backend", choices=("sqlite", "mssql"), default="sqlite")
+    ap.add_argument("--sqlite-path", default="bench.db")
+    ap.add_argument("--users", type=int, default=1000)
+    ap.add_argument("--mixes", default="1x1,1x8,2x4,4x2,4x8")
+    ap.add_argument("--rps", type=float, default=400.0)
+    ap.add_argument("--duration", type=float, default=15.0)
+    ap.add_argument("--warmup", type=float, default=3.0)
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--out", default=None, help="write the comparison as JSON")
+    args = ap.parse_args(argv)
+
+    os.environ["DB_BACKEND"] = args.backend
+    if args.backend == "sqlite":
+        os.environ["SQLITE_PATH"] = os.path.abspath(args.sqlite_path)
+
+    from .load import LoadConfig, run_load, summarize
+    from .seed import SeedConfig, load_existing, seed
+
+    seed_cfg = SeedConfig(users=args.users)
+    data = load_existing(seed_cfg)
+    if data is None or not data.user_ids:
+        data = seed(seed_cfg)
+        print(f"seeded {data.summary()}")
+
+    rows: List[Dict[str, object]] = []
+    with tempfile.TemporaryFile(mode="w+") as server_log:
+        for workers, threads in parse_mixes(args.mixes):
+            mix = f"{workers}x{threads}"
+            proc, port = start_server(workers, threads, dict(os.environ), server_log)
+            try:
+                if not _wait_ready(port, proc):
+                    server_log.seek(0)
+                    print(f"[{mix}] server did not start:\n{server_log.read()[-2000:]}")
+                    return 1
+                cfg = LoadConfig(
+                    rps=args.rps,
+                    duration=args.duration,
+                    concurrency=args.concurrency,
+                    warmup=args.warmup,
+                    base_url=f"http://127.0.0.1:{port}",
+                )
+                result = run_load(None, data, cfg, log=lambda m: print(f"[{mix}] {m}"))
+            finally:
+                stop_server(proc)
+
+            total = summarize(result)["ALL"]
+            ok = total["count"] - total["errors"]
+            rows.append({
+                "mix": mix,
+                "workers": workers,
+                "threads": threads,
+                "rps": round(ok / result.elapsed, 1) if result.elapsed else 0.0,
+                "errors": total["errors"],
+                "dropped": result.dropped,
+                "p50": total["p50"],
+                "p95": total["p95"],
+                "p99": total["p99"],
+            })
+
+    print(format_table(rows))
+
+    if args.out:
+        meta = {
+            "targetRps": args.rps,
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+            "backend": args.backend,
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "mixes": rows}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
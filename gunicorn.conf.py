@@ -0,0 +1,55 @@
+"""
+gunicorn 設定（python -m gunicorn -c gunicorn.conf.py wsgi:app）
+
+所有值都可以用環境變數覆寫：
+  WEB_BIND        監聽位址（預設 127.0.0.1:8000）
+  WEB_WORKERS     process 數（預設 = CPU 核心數）
+  WEB_THREADS     每個 worker 的 thread 數（預設 4；>1 時用 gthread worker）
+  WEB_KEEPALIVE   keep-alive 秒數（放在 LB 後面時要比 LB 的 idle timeout 長）
+  WEB_TIMEOUT     request 卡住多久砍掉 worker
+  WEB_PRELOAD     1 = master 先載入 app 再 fork（省記憶體、啟動快）
+  WEB_MAX_REQUESTS 每個 worker 處理幾個 request 後換新（0 = 不換）
+
+reload：
+  kill -HUP <master>   graceful 重開所有 worker（讀新設定；preload 時不會載入新程式碼）
+  新程式碼：kill -USR2 <master> 起一組新的 master + worker，確認 OK 後 kill -TERM <舊 master>
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("WEB_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("WEB_WORKERS", str(multiprocessing.cpu_count())))
+threads = int(os.environ.get("WEB_THREADS", "4"))
+# 我們的 request 大部分時間在等 DB，thread 等 I/O 時會放掉 GIL
+worker_class = "gthread" if threads > 1 else "sync"
+
+keepalive = int(os.environ.get("WEB_KEEPALIVE", "5"))
+timeout = int(os.environ.get("WEB_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", "30"))
+backlog = int(os.environ.get("WEB_BACKLOG", "2048"))
+
+preload_app = os.environ.get("WEB_PRELOAD", "1") == "1"
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+
+# heartbeat 檔放在 tmpfs，避免 container 的磁碟 I/O 卡住 worker
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.environ.get("WEB_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.environ.get("WEB_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # DB / cache 連線與 lock 一律在 fork 之後建立
+    from app.worker import init_worker
+
+    init_worker()
+
+
+def when_ready(server):
+    server.log.info(
+        "workers=%s threads=%s worker_class=%s preload=%s keepalive=%ss",
+        workers, threads, worker_class, preload_app, keepalive,
+    )
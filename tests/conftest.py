@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# 匯入 app 會建立 DB dialect：測試不需要 SQL Server，用 SQLite（放在暫存目錄）
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(prefix="sm-tests-"), "test.db"))
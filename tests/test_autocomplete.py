@@ -0,0 +1,119 @@
+"""
+UserNameIndex：follow / unfollow / 註冊 / 改名之後，complete() 要跟暴力排序的結果一樣
+（名字夠多，短的 prefix 範圍超過 SCAN_LIMIT，會走載入時算好的前 TOP_K 名）。
+"""
+import itertools
+import random
+
+import pytest
+
+from app import autocomplete
+from app.autocomplete import SCAN_LIMIT, TOP_K, UserNameIndex
+
+ALPHABET = "abc"
+PREFIXES = [""] + ["".join(p) for n in (1, 2, 3) for p in itertools.product(ALPHABET, repeat=n)]
+
+
+def _random_name(rng):
+    # 大小寫混著：casefold 之後同名的人也要照 user_id 排
+    return "".join(rng.choice(ALPHABET + ALPHABET.upper()) for _ in range(rng.randint(1, 6)))
+
+
+class Model:
+    """暴力版：user_id -> [user_name, 追蹤者數]，每次查詢整個排序。"""
+
+    def __init__(self, users):
+        self.users = {uid: [name, n] for uid, name, n in users}
+
+    def rows(self):
+        return [(uid, name, n) for uid, (name, n) in self.users.items()]
+
+    def complete(self, prefix, limit):
+        key = prefix.casefold()
+        hits = [(uid, name, n) for uid, (name, n) in self.users.items() if name.casefold().startswith(key)]
+        hits.sort(key=lambda t: (-t[2], t[1].casefold(), t[0]))
+        return hits[:limit]
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    rng = random.Random(1234)
+    model = Model((uid, _random_name(rng), rng.randint(0, 8)) for uid in range(1, 3001))
+    monkeypatch.setattr(autocomplete, "fetch_all", lambda sql, params=(): model.rows())
+    index = UserNameIndex(ttl=3600)
+    return rng, model, index
+
+
+def _assert_same(index, model):
+    for prefix in PREFIXES:
+        for limit in (1, 7, TOP_K):
+            assert index.complete(prefix, limit) == model.complete(prefix, limit), (prefix, limit)
+
+
+def test_load_matches_brute_force(setup):
+    _, model, index = setup
+    _assert_same(index, model)
+    stats = index.stats()
+    assert stats["indexedPrefixes"] > 0
+    assert stats["topHits"] > 0 and stats["scans"] > 0
+
+
+def test_precomputed_prefixes_cover_large_ranges(setup):
+    _, model, index = setup
+    index.complete("a", 1)
+    for prefix in PREFIXES[1:]:
+        size = sum(1 for name, _ in model.users.values() if name.casefold().startswith(prefix))
+        assert (prefix in index._top) == (size > SCAN_LIMIT), prefix
+
+
+def test_follow_unfollow_keep_top_exact(setup):
+    rng, model, index = setup
+    _assert_same(index, model)
+    # 集中在現在的前幾名：扣掉之後名單外的人要補上來
+    leaders = [uid for uid, _, _ in model.complete("a", TOP_K) + model.complete("b", TOP_K)]
+    for step in range(600):
+        uid = rng.choice(leaders) if step % 2 else rng.randint(1, 3000)
+        delta = rng.choice((1, -1, -1))
+        if delta > 0:
+            index.on_follow(uid)
+        else:
+            index.on_unfollow(uid)
+        model.users[uid][1] = max(model.users[uid][1] + delta, 0)
+        if step % 50 == 0:
+            _assert_same(index, model)
+    _assert_same(index, model)
+
+
+def test_register_and_rename_keep_top_exact(setup):
+    rng, model, index = setup
+    _assert_same(index, model)
+    next_id = 3001
+    for step in range(300):
+        if step % 3 == 0:
+            name = _random_name(rng)
+            index.on_register(next_id, name)
+            followers = rng.randint(0, 12)
+            index.on_follow(*[next_id] * followers)
+            model.users[next_id] = [name, followers]
+            next_id += 1
+        else:
+            # 前幾名改名移出自己的 prefix，或是一般人改名移進別的 prefix
+            uid = rng.choice(model.complete(rng.choice(ALPHABET), TOP_K))[0] if step % 2 else rng.randint(1, 3000)
+            old, new = model.users[uid][0], _random_name(rng)
+            index.on_rename(uid, old, new)
+            model.users[uid][0] = new
+        if step % 30 == 0:
+            _assert_same(index, model)
+    _assert_same(index, model)
+
+
+def test_reload_after_writes_gives_same_answers(setup):
+    rng, model, index = setup
+    index.complete("a", 1)
+    for _ in range(200):
+        uid = rng.randint(1, 3000)
+        index.on_unfollow(uid)
+        model.users[uid][1] = max(model.users[uid][1] - 1, 0)
+    before = [index.complete(p, TOP_K) for p in PREFIXES]
+    index._reload()
+    assert [index.complete(p, TOP_K) for p in PREFIXES] == before
@@ -0,0 +1,219 @@
+"""
+SharedCache：LocalCache 與 RedisCache（接一個 in-memory 的 Redis stand-in）跑同一組測試。
+"""
+import threading
+import time
+
+import pytest
+
+from app.cache import LocalCache, RedisCache, SharedCache
+
+
+class FakeRedis:
+    """只實作 RedisCache 用到的指令（get / mget / set px nx / delete / incr / pexpire / pipeline）。"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.data = {}  # key -> [value bytes, 過期的 monotonic 時間 | None]
+        self.now = time.monotonic
+
+    def _entry(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self.now():
+            del self.data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entry(key)
+            return entry[0] if entry else None
+
+    def mget(self, keys):
+        return [self.get(k) for k in keys]
+
+    def set(self, key, value, px=None, nx=False):
+        with self._lock:
+            if nx and self._entry(key) is not None:
+                return None
+            if not isinstance(value, bytes):
+                value = str(value).encode("ascii")
+            self.data[key] = [value, self.now() + px / 1000.0 if px else None]
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            return int(self.data.pop(key, None) is not None)
+
+    def incr(self, key):
+        with self._lock:
+            entry = self._entry(key)
+            n = int(entry[0]) + 1 if entry else 1
+            self.data[key] = [str(n).encode("ascii"), entry[1] if entry else None]
+            return n
+
+    def pexpire(self, key, px):
+        with self._lock:
+            entry = self._entry(key)
+            if entry is None:
+                return False
+            entry[1] = self.now() + px / 1000.0
+            return True
+
+    def ttl_ms(self, key):
+        entry = self._entry(key)
+        return None if entry is None or entry[1] is None else (entry[1] - self.now()) * 1000.0
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self.client._lock:
+            return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@pytest.fixture(params=["local", "redis"])
+def make_cache(request):
+    """回傳一個 factory：同一個 test 裡呼叫多次 = 共用同一個 backend 的多個「worker」。"""
+    if request.param == "local":
+        backend = LocalCache(100)
+        return lambda **kw: SharedCache(backend, "t", **kw)
+    client = FakeRedis()
+    return lambda **kw: SharedCache(RedisCache(client=client), "t", **kw)
+
+
+def _loader(calls, value, delay=0.0):
+    def load():
+        calls.append(1)
+        if delay:
+            time.sleep(delay)
+        return value
+    return load
+
+
+# ===== version bump =====
+def test_bump_invalidates_namespace(make_cache):
+    cache = make_cache()
+    calls = []
+    assert cache.get_or_load("feed", "p1", _loader(calls, [1]), 60) == [1]
+    assert cache.get_or_load("feed", "p1", _loader(calls, [2]), 60) == [1]
+    assert len(calls) == 1
+
+    make_cache().bump("feed")  # 另一個 worker bump
+    assert cache.get_or_load("feed", "p1", _loader(calls, [2]), 60) == [2]
+    assert len(calls) == 2
+
+
+def test_bump_scope_only_invalidates_that_scope(make_cache):
+    cache = make_cache()
+    calls = []
+    cache.get_or_load("profile", "row", _loader(calls, "a7"), 60, scope=7)
+    cache.get_or_load("profile", "row", _loader(calls, "a8"), 60, scope=8)
+
+    cache.bump("profile", scope=7)
+    assert cache.get_or_load("profile", "row", _loader(calls, "b7"), 60, scope=7) == "b7"
+    assert cache.get_or_load("profile", "row", _loader(calls, "b8"), 60, scope=8) == "a8"
+    got = cache.get_or_load_many("profile", "row", [7, 8], lambda missing: {s: "c" for s in missing}, 60)
+    assert got == {7: "b7", 8: "a8"}
+
+
+def test_version_counter_expires_and_is_not_reused(make_cache):
+    cache = make_cache(version_ttl=0.05)
+    calls = []
+    cache.bump("post", scope=1)
+    before = cache.version("post", scope=1)
+    cache.get_or_load("post", "e", _loader(calls, "old"), 0.05, scope=1)
+
+    time.sleep(0.1)
+    # 過期的版本號讀成 0：那個版本的資料也已經過期，只會 miss
+    assert cache.version("post", scope=1)[1] == 0
+    assert cache.get_or_load("post", "e", _loader(calls, "new"), 60, scope=1) == "new"
+
+    time.sleep(0.002)
+    cache.bump("post", scope=1)
+    assert cache.version("post", scope=1)[1] > before[1]
+
+
+def test_local_counters_are_pruned():
+    backend = LocalCache(10)
+    cache = SharedCache(backend, "t", version_ttl=0.05)
+    for pid in range(1000):
+        cache.bump("post", scope=pid)
+    time.sleep(0.1)
+    cache.bump("post", scope="last")
+    assert len(backend._counters) == 1
+
+
+def test_local_counters_survive_lru_eviction():
+    cache = SharedCache(LocalCache(2), "t")
+    cache.bump("feed")
+    version = cache.version("feed")
+    for i in range(10):
+        cache.set("other", str(i), i, 60)
+    assert cache.version("feed") == version
+
+
+def test_redis_version_keys_get_expiry():
+    client = FakeRedis()
+    cache = SharedCache(RedisCache(client=client), "t", version_ttl=30)
+    cache.bump("comments", scope=5)
+    ttl = client.ttl_ms("t:ver:comments:5")
+    assert ttl is not None and 29000 < ttl <= 30000
+
+
+# ===== stampede =====
+def test_get_or_load_single_flight(make_cache):
+    cache = make_cache()
+    calls = []
+    load = _loader(calls, {"n": 1}, delay=0.1)
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(cache.get_or_load("ns", "k", load, 60))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert out == [{"n": 1}] * 8
+
+
+def test_lock_waiter_uses_value_written_by_owner():
+    client = FakeRedis()
+    owner, waiter = (SharedCache(RedisCache(client=client), "t", lock_timeout=1.0) for _ in range(2))
+    data_key = owner._data_key("ns", "k", None)
+    # owner 拿到 SET NX 鎖、正在查 DB
+    assert client.set(data_key + ":lock", b"1", px=1000, nx=True)
+
+    def finish():
+        time.sleep(0.1)
+        client.set(data_key, b'"from-owner"', px=60000)
+        client.delete(data_key + ":lock")
+
+    threading.Thread(target=finish).start()
+    calls = []
+    assert waiter.get_or_load("ns", "k", _loader(calls, "from-waiter"), 60) == "from-owner"
+    assert calls == []
+    assert waiter.lock_waits == 1
+
+
+def test_lock_waiter_loads_itself_after_timeout():
+    client = FakeRedis()
+    cache = SharedCache(RedisCache(client=client), "t", lock_timeout=0.1)
+    data_key = cache._data_key("ns", "k", None)
+    client.set(data_key + ":lock", b"1", px=100, nx=True)  # owner 掛了，沒寫回來
+
+    calls = []
+    assert cache.get_or_load("ns", "k", _loader(calls, "mine"), 60) == "mine"
+    assert len(calls) == 1
+    assert client.get(data_key) == b'"mine"'
@@ -0,0 +1,75 @@
+"""
+TagTrie：發文 / 刪文（add ±1）之後，每個 prefix 的 complete() 要跟暴力排序的結果一樣。
+"""
+import itertools
+import random
+
+import pytest
+
+from app import tags
+from app.tags import TagTrie, parse_entities
+
+ALPHABET = "abc"
+PREFIXES = [""] + ["".join(p) for n in (1, 2, 3) for p in itertools.product(ALPHABET, repeat=n)]
+
+
+def _random_tag(rng):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 5)))
+
+
+def _brute(counts, prefix, limit):
+    hits = sorted((-n, tag) for tag, n in counts.items() if n > 0 and tag.startswith(prefix))
+    return [(tag, -neg) for neg, tag in hits[:limit]]
+
+
+@pytest.fixture(params=[3, 10])
+def setup(request, monkeypatch):
+    rng = random.Random(request.param)
+    counts = {}
+    for _ in range(400):
+        tag = _random_tag(rng)
+        counts[tag] = rng.randint(1, 6)
+    monkeypatch.setattr(tags, "fetch_all", lambda sql, params=(): list(counts.items()))
+    return rng, counts, TagTrie(ttl=3600, top=request.param)
+
+
+def _assert_same(trie, counts):
+    for prefix in PREFIXES:
+        for limit in (1, trie.top_n):
+            assert trie.complete(prefix, limit) == _brute(counts, prefix, limit), (prefix, limit)
+
+
+def test_load_matches_brute_force(setup):
+    _, counts, trie = setup
+    _assert_same(trie, counts)
+    assert trie.stats()["tags"] == len(counts)
+
+
+def test_add_remove_keep_top_exact(setup):
+    rng, counts, trie = setup
+    _assert_same(trie, counts)
+    for step in range(1500):
+        if step % 2:
+            # 扣現在某個節點的第一名：子樹裡下一個 tag 要補上來
+            candidates = trie.complete(rng.choice(PREFIXES), 1)
+            tag = candidates[0][0] if candidates else _random_tag(rng)
+            delta = -1
+        else:
+            tag, delta = _random_tag(rng), rng.choice((1, 1, -1))
+        trie.add([tag], delta)
+        counts[tag] = max(counts.get(tag, 0) + delta, 0)
+        if step % 100 == 0:
+            _assert_same(trie, counts)
+    _assert_same(trie, counts)
+    assert trie.stats()["tags"] == sum(1 for n in counts.values() if n > 0)
+
+
+def test_add_before_load_is_ignored(setup):
+    _, counts, trie = setup
+    trie.add(["zzz"], 1)
+    _assert_same(trie, counts)
+    assert trie.complete("z", 10) == []
+
+
+def test_parse_entities():
+    assert parse_entities("#Python and #python, a@b.com @amy #x-y") == (["python", "x"], ["amy"])
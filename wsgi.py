@@ -0,0 +1,10 @@
+"""
+Production entry point：
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+（run.py 是開發用的 Werkzeug dev server）
+"""
+from app import create_app
+
+app = create_app()